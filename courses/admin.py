@@ -1,9 +1,35 @@
 from django.contrib import admin
-from .models import Course, Module, Lesson, Quiz, Question, Choice
+from .models import Course, Module, Lesson, Quiz, Question, Choice, FileBlob
 
-admin.site.register(Course)
 admin.site.register(Module)
-admin.site.register(Lesson)
-admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Choice)
+
+
+# search_fields también alimenta los autocomplete_fields de enrollments y feedback
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ("id", "titulo", "estado", "categoria", "created_at")
+    list_filter = ("estado",)
+    search_fields = ("titulo",)
+
+
+@admin.register(Lesson)
+class LessonAdmin(admin.ModelAdmin):
+    list_display = ("id", "titulo", "module", "tipo", "orden")
+    list_select_related = ("module",)
+    search_fields = ("titulo",)
+
+
+@admin.register(Quiz)
+class QuizAdmin(admin.ModelAdmin):
+    list_display = ("id", "titulo", "course", "module", "orden")
+    list_select_related = ("course", "module")
+    search_fields = ("titulo",)
+
+
+@admin.register(FileBlob)
+class FileBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "refcount", "created_at")
+    search_fields = ("sha256",)
+    readonly_fields = ("name", "sha256", "size", "refcount", "created_at")
@@ -0,0 +1,72 @@
+# courses/async_views.py
+"""
+Variantes async (ASGI) de los endpoints de lectura más usados. Mismas reglas
+de visibilidad y mismo JSON que CourseViewSet.list/retrieve y las vistas
+StudentCourse*View.
+"""
+from django.views.decorators.http import require_GET
+
+from learning_platform_backend.async_api import AsyncAuthError, aget_principal, error_response, json_response
+from .models import Course, Module, Lesson
+from .serializers import CourseListSerializer, CourseDetailSerializer, ModuleSerializer, LessonSerializer
+from .visibility import visible_courses
+
+
+@require_GET
+async def course_list(request):
+    """GET /api/async/courses/courses/"""
+    try:
+        p = await aget_principal(request)
+    except AsyncAuthError as exc:
+        return exc.response()
+
+    courses = [c async for c in visible_courses(Course.objects.all(), p)]
+    return json_response(CourseListSerializer(courses, many=True).data)
+
+
+@require_GET
+async def course_detail(request, pk):
+    """GET /api/async/courses/courses/<pk>/"""
+    try:
+        p = await aget_principal(request)
+    except AsyncAuthError as exc:
+        return exc.response()
+
+    qs = visible_courses(Course.objects.prefetch_related("modules__lessons"), p)
+    course = await qs.filter(pk=pk).afirst()
+    if course is None:
+        return error_response("No Course matches the given query.", 404)
+
+    # Mismo criterio que CanReadCourse (lectura)
+    if not (course.estado == Course.Estado.PUBLICADO or p.is_staff or p.owns(course.instructor_id)):
+        return error_response("No permitido.", 403)
+
+    return json_response(CourseDetailSerializer(course).data)
+
+
+@require_GET
+async def student_course_modules(request):
+    """GET /api/async/courses/student-modules/?course_id=ID"""
+    course_id = request.GET.get("course_id")
+    if not course_id:
+        return error_response("course_id requerido.", 400)
+
+    qs = Module.objects.filter(course_id=course_id).order_by("orden").prefetch_related("lessons")
+    modules = [m async for m in qs]
+    return json_response(ModuleSerializer(modules, many=True).data)
+
+
+@require_GET
+async def student_course_lessons(request):
+    """GET /api/async/courses/student-lessons/?course_id=ID[&module_id=ID]"""
+    course_id = request.GET.get("course_id")
+    if not course_id:
+        return error_response("course_id requerido.", 400)
+
+    qs = Lesson.objects.filter(module__course_id=course_id)
+    module_id = request.GET.get("module_id")
+    if module_id:
+        qs = qs.filter(module_id=module_id)
+
+    lessons = [l async for l in qs.order_by("module__orden", "orden")]
+    return json_response(LessonSerializer(lessons, many=True).data)
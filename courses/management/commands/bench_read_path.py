@@ -0,0 +1,97 @@
+# courses/management/commands/bench_read_path.py
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Rutas síncronas -> equivalentes async (ver learning_platform_backend/async_urls.py)
+READ_PATHS = {
+    "courses": ("/api/courses/courses/", "/api/async/courses/courses/"),
+    "course": ("/api/courses/courses/{course_id}/", "/api/async/courses/courses/{course_id}/"),
+    "modules": (
+        "/api/courses/student-modules/?course_id={course_id}",
+        "/api/async/courses/student-modules/?course_id={course_id}",
+    ),
+    "lessons": (
+        "/api/courses/student-lessons/?course_id={course_id}",
+        "/api/async/courses/student-lessons/?course_id={course_id}",
+    ),
+    "summary": (
+        "/api/feedback/ratings/summary/?course_id={course_id}",
+        "/api/async/feedback/ratings/summary/?course_id={course_id}",
+    ),
+    "my": ("/api/enrollments/enrollments/my/", "/api/async/enrollments/enrollments/my/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de los endpoints de lectura: despliegue WSGI (rutas síncronas) "
+        "contra ASGI (rutas /api/async/). Ejemplo:\n"
+        "  gunicorn learning_platform_backend.wsgi -w 4 -b :8000\n"
+        "  uvicorn learning_platform_backend.asgi:application --workers 4 --port 8001\n"
+        "  python manage.py bench_read_path --wsgi-url http://127.0.0.1:8000 "
+        "--asgi-url http://127.0.0.1:8001 --course-id 1"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", required=True, help="Base URL del despliegue WSGI")
+        parser.add_argument("--asgi-url", required=True, help="Base URL del despliegue ASGI")
+        parser.add_argument("--course-id", type=int, default=1)
+        parser.add_argument("--endpoint", choices=sorted(READ_PATHS), action="append", help="Repetible; por defecto todos menos 'my'")
+        parser.add_argument("--token", default="", help="JWT de acceso (necesario para 'my')")
+        parser.add_argument("--concurrency", type=int, default=50, help="Clientes concurrentes (por defecto 50)")
+        parser.add_argument("--requests", type=int, default=1000, help="Requests por endpoint y despliegue")
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        endpoints = options["endpoint"] or [name for name in READ_PATHS if name != "my"]
+        if "my" in endpoints and not options["token"]:
+            raise CommandError("El endpoint 'my' requiere --token.")
+
+        headers = {"Authorization": f"Bearer {options['token']}"} if options["token"] else {}
+
+        self.stdout.write(f"{'endpoint':<10}{'server':<7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in endpoints:
+            sync_path, async_path = READ_PATHS[name]
+            for server, base, path in (("wsgi", options["wsgi_url"], sync_path), ("asgi", options["asgi_url"], async_path)):
+                url = base.rstrip("/") + path.format(course_id=options["course_id"])
+                stats = self._run(url, headers, options["concurrency"], options["requests"], options["timeout"])
+                self.stdout.write(
+                    f"{name:<10}{server:<7}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                    f"{stats['p95']:>10.1f}{stats['p99']:>10.1f}{stats['errors']:>8}"
+                )
+
+    def _run(self, url, headers, concurrency, total, timeout):
+        def one(_):
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    ok = 200 <= response.status < 300
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return ok, (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(ms for ok, ms in results if ok)
+        errors = sum(1 for ok, _ in results if not ok)
+        if not latencies:
+            return {"rps": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "errors": errors}
+
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0]] * 99
+        return {
+            "rps": len(latencies) / elapsed,
+            "p50": cuts[49],
+            "p95": cuts[94],
+            "p99": cuts[98],
+            "errors": errors,
+        }
@@ -0,0 +1,115 @@
+# courses/management/commands/bench_visibility.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from courses.models import Choice, Course, Question, Quiz
+from courses.visibility import managed, readable, visible_courses
+from enrollments.models import Submission
+from feedback.models import Comment, CourseRating
+from users.principal import principal_for_user
+
+
+def _legacy_readable(qs, p, prefix):
+    # Versión anterior: OR entre columnas de tablas unidas + DISTINCT
+    if p.is_staff:
+        return qs
+    if p.is_instructor:
+        return qs.filter(
+            Q(**{f"{prefix}estado": "publicado"}) | Q(**{f"{prefix}instructor_id": p.instructor_profile_id})
+        ).distinct()
+    return qs.filter(**{f"{prefix}estado": "publicado"})
+
+
+def _legacy_managed(qs, p, *prefixes):
+    if p.is_staff:
+        return qs
+    q = Q()
+    for prefix in prefixes:
+        q |= Q(**{f"{prefix}instructor_id": p.instructor_profile_id})
+    return qs.filter(q).distinct()
+
+
+# nombre -> (antes, después), como los arman los ViewSets
+CASES = {
+    "courses": (
+        lambda p: _legacy_readable(Course.objects.all(), p, ""),
+        lambda p: visible_courses(Course.objects.all(), p),
+    ),
+    "comments": (
+        lambda p: _legacy_readable(Comment.objects.select_related("user", "course"), p, "course__"),
+        lambda p: readable(Comment.objects.select_related("user", "course"), p, "course_id"),
+    ),
+    "ratings": (
+        lambda p: _legacy_readable(CourseRating.objects.select_related("user", "course"), p, "course__"),
+        lambda p: readable(CourseRating.objects.select_related("user", "course"), p, "course_id"),
+    ),
+    "quizzes": (
+        lambda p: _legacy_managed(Quiz.objects.all(), p, "course__", "module__course__"),
+        lambda p: managed(Quiz.objects.all(), p, "course_id", "module__course_id"),
+    ),
+    "questions": (
+        lambda p: _legacy_managed(Question.objects.all(), p, "quiz__course__", "quiz__module__course__"),
+        lambda p: managed(Question.objects.all(), p, "quiz__course_id", "quiz__module__course_id"),
+    ),
+    "choices": (
+        lambda p: _legacy_managed(
+            Choice.objects.all(), p, "question__quiz__course__", "question__quiz__module__course__"
+        ),
+        lambda p: managed(Choice.objects.all(), p, "question__quiz__course_id", "question__quiz__module__course_id"),
+    ),
+    "submissions": (
+        lambda p: _legacy_managed(Submission.objects.all(), p, "quiz__course__", "quiz__module__course__"),
+        lambda p: managed(Submission.objects.all(), p, "quiz__course_id", "quiz__module__course_id"),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara planes y tiempos de los filtros de visibilidad: OR + DISTINCT "
+        "(antes) contra courses.visibility (IN sobre UNION ALL). Conviene "
+        "correrlo sobre Postgres con datos de seed_lms --courses 1000 o más:\n"
+        "  python manage.py bench_visibility --username instructor1 --analyze"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Usuario cuya visibilidad se mide (instructor)")
+        parser.add_argument("--case", choices=sorted(CASES), action="append", help="Repetible; por defecto todos")
+        parser.add_argument("--repeat", type=int, default=20, help="Ejecuciones por query para el tiempo")
+        parser.add_argument("--limit", type=int, default=100, help="Filas por página (LIMIT), como un listado")
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (Postgres); si no, solo EXPLAIN")
+        parser.add_argument("--no-plans", action="store_true", help="Solo tiempos")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['username']}.")
+        p = principal_for_user(user)
+        explain_options = {"analyze": True} if options["analyze"] and connection.vendor == "postgresql" else {}
+
+        rows = []
+        for name in options["case"] or sorted(CASES):
+            for label, build in zip(("antes", "después"), CASES[name]):
+                qs = build(p).order_by("pk")[: options["limit"]]
+                if not options["no_plans"]:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} ({label})"))
+                    self.stdout.write(str(qs.query))
+                    self.stdout.write(qs.explain(**explain_options))
+
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    count = len(list(qs.all()))  # .all(): sin la caché de resultados
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                rows.append((name, label, count, timings[len(timings) // 2], timings[-1]))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'caso':<12}{'versión':<9}{'filas':>7}{'p50 ms':>10}{'max ms':>10}")
+        for name, label, count, p50, worst in rows:
+            self.stdout.write(f"{name:<12}{label:<9}{count:>7}{p50:>10.2f}{worst:>10.2f}")
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.storage import adopt_legacy_files, collect_garbage, recount_blobs
+from courses.uploads import expire_abandoned
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los blobs de archivos de lección que ninguna lección referencia y las "
+        "subidas por partes abandonadas (con su temporal)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24, help="Solo blobs creados hace más de N horas")
+        parser.add_argument("--recount", action="store_true", help="Recalcular refcount desde Lesson.archivo antes de borrar")
+        parser.add_argument(
+            "--adopt-legacy", action="store_true", help="Pasar a blobs los archivos guardados en lessons/course_X/..."
+        )
+        parser.add_argument(
+            "--upload-expiry-hours",
+            type=float,
+            default=None,
+            help="Subidas sin partes nuevas en N horas (por defecto LESSON_UPLOAD_EXPIRY_HOURS)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Solo informar, sin borrar nada")
+
+    def handle(self, *args, **options):
+        if options["adopt_legacy"] and not options["dry_run"]:
+            self.stdout.write(f"Lecciones migradas a blobs: {adopt_legacy_files()}.")
+        if options["recount"] and not options["dry_run"]:
+            self.stdout.write(f"Contadores corregidos: {recount_blobs()}.")
+
+        expiry = options["upload_expiry_hours"]
+        if expiry is None:
+            expiry = getattr(settings, "LESSON_UPLOAD_EXPIRY_HOURS", 24)
+        uploads, upload_bytes = expire_abandoned(timezone.now() - timedelta(hours=expiry), dry_run=options["dry_run"])
+        verb = "Se borrarían" if options["dry_run"] else "Borradas"
+        self.stdout.write(f"{verb} {uploads} subidas abandonadas ({upload_bytes / 1024 / 1024:.1f} MB).")
+
+        older_than = timezone.now() - timedelta(hours=options["grace_hours"])
+        deleted, freed = collect_garbage(older_than, dry_run=options["dry_run"])
+        verb = "Se borrarían" if options["dry_run"] else "Borrados"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} blobs ({freed / 1024 / 1024:.1f} MB)."))
@@ -5,7 +5,8 @@ from faker import Faker
 import random
 
 from courses.models import Course, Module, Lesson, Quiz, Question, Choice
-from enrollments.models import Enrollment, LessonProgress, Submission
+from enrollments.models import Enrollment, LessonProgress, QuizResult, Submission
+from enrollments.quiz_results import rebuild_quiz_results
 from users.models import InstructorProfile  # <-- importante
 
 User = get_user_model()
@@ -34,6 +35,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING("Creando cursos completos..."))
         self._create_courses(instructors, students, num_courses)
 
+        # Los Submission se crean directo: recalcular la tabla resumen
+        rebuild_quiz_results(Submission, QuizResult)
+
         self.stdout.write(self.style.SUCCESS("Seed LMS completada."))
 
     # ---------- helpers ----------
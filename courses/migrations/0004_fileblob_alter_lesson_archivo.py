@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 13:37
+
+import courses.models
+import courses.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_lessonupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='archivo',
+            field=models.FileField(blank=True, null=True, storage=courses.storage.lesson_file_storage, upload_to=courses.models.lesson_upload_path),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 13:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_fileblob_alter_lesson_archivo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['estado'], name='course_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_estado_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
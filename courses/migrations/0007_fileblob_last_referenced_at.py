@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 14:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_lessonupload_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileblob',
+            name='last_referenced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
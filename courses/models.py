@@ -1,7 +1,15 @@
 import os
-from django.db import models
+import uuid
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from learning_platform_backend.response_cache import bump_version, drop_stale
+from .storage import lesson_file_storage
 
 def lesson_upload_path(instance, filename):
     course_id = instance.module.course_id
@@ -31,6 +39,12 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Rama "publicados" de courses.visibility (la otra usa el índice de instructor)
+            models.Index(fields=["estado"], name="course_estado_idx"),
+        ]
+
     def __str__(self):
         return self.titulo
 
@@ -65,7 +79,7 @@ class Lesson(models.Model):
     tipo = models.CharField(max_length=10, choices=Tipo.choices)
     contenido = models.TextField(blank=True, default="")
     url_video = models.URLField(blank=True, default="")
-    archivo = models.FileField(upload_to=lesson_upload_path, blank=True, null=True)
+    archivo = models.FileField(upload_to=lesson_upload_path, storage=lesson_file_storage, blank=True, null=True)
     orden = models.IntegerField()
 
     class Meta:
@@ -196,3 +210,159 @@ class Choice(models.Model):
 
     def __str__(self):
         return self.texto
+
+
+
+class LessonUpload(models.Model):
+    """
+    Subida por partes (reanudable) del archivo de una lección; ver courses.uploads.
+    Los bytes se van escribiendo en un temporal y, al completar, se adjuntan a
+    Lesson.archivo. Las que no reciben partes en LESSON_UPLOAD_EXPIRY_HOURS las
+    borra gc_lesson_blobs junto con su temporal.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="uploads")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="lesson_uploads")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()  # tamaño total declarado por el cliente
+    offset = models.BigIntegerField(default=0)  # bytes recibidos
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # última parte recibida
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+class FileBlob(models.Model):
+    """
+    Archivo de lección almacenado por contenido (ver courses.storage). refcount
+    es el número de lecciones cuyo archivo apunta a este blob; con 0 lo puede
+    borrar gc_lesson_blobs una vez pasado el margen desde last_referenced_at
+    (cada subida que cae en este blob lo renueva).
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} (refs={self.refcount})"
+
+
+# Conteo de referencias de FileBlob. El archivo anterior se lee de la fila en
+# la BD (bloqueada si hay transacción), no de lo que tenía la instancia en
+# memoria: dos ediciones o dos complete de la misma lección con la misma copia
+# vieja decrementarían dos veces el blob anterior.
+def _stored_archivo(instance, using):
+    qs = Lesson._base_manager.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        qs = qs.select_for_update()
+    return str(qs.values_list("archivo", flat=True).first() or "")
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_file(sender, instance, using, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and "archivo" not in update_fields):
+        instance._stored_archivo = ""
+        return
+    instance._stored_archivo = _stored_archivo(instance, using)
+
+
+@receiver(post_save, sender=Lesson)
+def count_lesson_file_refs(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and "archivo" not in update_fields:
+        return
+    new = instance.archivo.name or ""
+    old = instance._stored_archivo
+    if new != old:
+        if new:
+            FileBlob.objects.filter(name=new).update(refcount=F("refcount") + 1)
+        if old:
+            FileBlob.objects.filter(name=old).update(refcount=F("refcount") - 1)
+    instance._stored_archivo = new
+
+
+@receiver(pre_delete, sender=Lesson)
+def remember_deleted_lesson_file(sender, instance, using, **kwargs):
+    # Collector.delete corre en una transacción: la fila queda bloqueada
+    instance._stored_archivo = _stored_archivo(instance, using)
+
+
+@receiver(post_delete, sender=Lesson)
+def release_lesson_file_ref(sender, instance, **kwargs):
+    name = getattr(instance, "_stored_archivo", "")
+    if name:
+        FileBlob.objects.filter(name=name).update(refcount=F("refcount") - 1)
+
+
+# Invalidación de la caché de respuestas (ver learning_platform_backend.response_cache):
+# "courses" cubre el catálogo y "course:<id>" el contenido de un curso. Las
+# versiones se suben al confirmar la transacción: antes, un lector concurrente
+# podría guardar el contenido previo al commit bajo la versión nueva.
+def _bump_on_commit(*groups, using=None):
+    transaction.on_commit(lambda: bump_version(*groups), using=using)
+
+
+def _drop_stale_on_commit(*groups, using=None):
+    transaction.on_commit(lambda: drop_stale(*groups), using=using)
+
+
+# course_id / module_id cargados, para invalidar también el curso anterior
+# cuando un módulo o una lección cambia de curso
+@receiver(post_init, sender=Module)
+@receiver(post_init, sender=Lesson)
+def remember_parent(sender, instance, **kwargs):
+    field = "course_id" if sender is Module else "module_id"
+    instance._loaded_parent_id = instance.__dict__.get(field)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_cache(sender, instance, using, **kwargs):
+    _bump_on_commit("courses", f"course:{instance.pk}", using=using)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def drop_stale_course_cache(sender, instance, signal, using, **kwargs):
+    # Un curso despublicado o borrado no puede seguir saliendo como STALE
+    if signal is post_delete or instance.estado != Course.Estado.PUBLICADO:
+        _drop_stale_on_commit("courses", f"course:{instance.pk}", using=using)
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_module_cache(sender, instance, using, **kwargs):
+    course_ids = {instance.course_id, instance._loaded_parent_id} - {None}
+    _bump_on_commit(*(f"course:{course_id}" for course_id in course_ids), using=using)
+    instance._loaded_parent_id = instance.course_id
+
+
+def _course_of_module(module_id, using):
+    if module_id is None:
+        return None
+    return Module._base_manager.using(using).filter(pk=module_id).values_list("course_id", flat=True).first()
+
+
+@receiver(pre_delete, sender=Lesson)
+def remember_lesson_course(sender, instance, using, **kwargs):
+    # En un borrado en cascada el módulo ya no existe en post_delete
+    instance._deleted_course_id = _course_of_module(instance.module_id, using)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_cache(sender, instance, signal, using, **kwargs):
+    if signal is post_delete:
+        course_ids = {instance._deleted_course_id}
+    else:
+        module_ids = {instance.module_id, instance._loaded_parent_id}
+        course_ids = {_course_of_module(module_id, using) for module_id in module_ids}
+        instance._loaded_parent_id = instance.module_id
+    course_ids.discard(None)
+    _bump_on_commit(*(f"course:{course_id}" for course_id in course_ids), using=using)
@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from users.principal import get_principal
+
 
 class IsInstructorEnabledOrAdmin(BasePermission):
     """
@@ -8,11 +10,8 @@ class IsInstructorEnabledOrAdmin(BasePermission):
     - usuarios con instructor_enabled=True
     """
     def has_permission(self, request, view):
-        return bool(
-            request.user
-            and request.user.is_authenticated
-            and (request.user.is_staff or getattr(request.user, "instructor_enabled", False))
-        )
+        p = get_principal(request)
+        return bool(p.is_authenticated and (p.is_staff or p.instructor_enabled))
 
 
 class CanReadCourse(BasePermission):
@@ -20,22 +19,25 @@ class CanReadCourse(BasePermission):
     - Lectura pública si el curso está publicado.
     - Si no está publicado: solo admin o el instructor dueño.
     """
+    message = "No permitido."
+
     def has_object_permission(self, request, view, obj):
         # Lectura pública
         if request.method in SAFE_METHODS and obj.estado == "publicado":
             return True
 
+        p = get_principal(request)
+
         # No autenticado: no puede leer borradores
-        if not request.user or not request.user.is_authenticated:
+        if not p.is_authenticated:
             return False
 
         # Admin: puede leer todo
-        if request.user.is_staff:
+        if p.is_staff:
             return True
 
         # Instructor habilitado y dueño del curso (InstructorProfile)
-        ip = getattr(request.user, "instructor_profile", None)
-        return bool(getattr(request.user, "instructor_enabled", False) and ip and obj.instructor_id == ip.id)
+        return p.owns(obj.instructor_id)
 
 
 class IsCourseOwnerOrAdmin(BasePermission):
@@ -44,11 +46,13 @@ class IsCourseOwnerOrAdmin(BasePermission):
     - admin/staff
     - instructor habilitado dueño del curso
     """
+    message = "No permitido."
+
     def has_object_permission(self, request, view, obj):
-        if not request.user or not request.user.is_authenticated:
+        p = get_principal(request)
+        if not p.is_authenticated:
             return False
-        if request.user.is_staff:
+        if p.is_staff:
             return True
 
-        ip = getattr(request.user, "instructor_profile", None)
-        return bool(getattr(request.user, "instructor_enabled", False) and ip and obj.instructor_id == ip.id)
+        return p.owns(obj.instructor_id)
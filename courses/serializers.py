@@ -1,5 +1,8 @@
+import os
+
+from django.conf import settings
 from rest_framework import serializers
-from .models import Course, Module, Lesson, Quiz, Question, Choice
+from .models import Course, Module, Lesson, LessonUpload, Quiz, Question, Choice
 
 
 class LessonSerializer(serializers.ModelSerializer):
@@ -8,6 +11,29 @@ class LessonSerializer(serializers.ModelSerializer):
         fields = ("id", "module", "titulo", "tipo", "contenido", "url_video", "archivo", "orden")
 
 
+class LessonUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LessonUpload
+        fields = ("id", "lesson", "filename", "size", "offset", "sha256", "created_at", "completed_at")
+        read_only_fields = ("id", "offset", "sha256", "created_at", "completed_at")
+
+    def validate_lesson(self, value):
+        if value.tipo != Lesson.Tipo.ARCHIVO:
+            raise serializers.ValidationError("Solo se suben archivos a lecciones de tipo archivo.")
+        return value
+
+    def validate_filename(self, value):
+        if os.path.splitext(value)[1].lower() != ".pdf":
+            raise serializers.ValidationError("Solo se permite PDF.")
+        return os.path.basename(value)
+
+    def validate_size(self, value):
+        max_size = getattr(settings, "LESSON_UPLOAD_MAX_SIZE", 500 * 1024 * 1024)
+        if value <= 0 or value > max_size:
+            raise serializers.ValidationError(f"Tamaño entre 1 y {max_size} bytes.")
+        return value
+
+
 class ModuleSerializer(serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
 
@@ -18,7 +44,7 @@ class ModuleSerializer(serializers.ModelSerializer):
 
 class CourseListSerializer(serializers.ModelSerializer):
     # OJO: esto devuelve el ID del InstructorProfile
-    instructor_id = serializers.IntegerField(source="instructor.id", read_only=True)
+    instructor_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Course
@@ -37,7 +63,7 @@ class CourseListSerializer(serializers.ModelSerializer):
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
-    instructor_id = serializers.IntegerField(source="instructor.id", read_only=True)
+    instructor_id = serializers.IntegerField(read_only=True)
     modules = ModuleSerializer(many=True, read_only=True)
 
     class Meta:
@@ -0,0 +1,210 @@
+"""
+Almacenamiento direccionado por contenido para Lesson.archivo.
+
+Cada archivo se guarda una sola vez en blobs/<ab>/<cd>/<sha256><ext>, sin
+importar el curso, módulo o nombre con que se subió: el mismo PDF reutilizado
+en varios módulos o en un curso clonado ocupa disco una vez. Cada blob tiene
+su fila FileBlob con el número de lecciones que lo referencian; los signals de
+Lesson mantienen ese contador y `manage.py gc_lesson_blobs` borra los blobs
+que quedan sin referencias.
+
+La escritura es a un temporal en el mismo directorio + os.replace, así que dos
+subidas simultáneas del mismo contenido no se pisan ni dejan archivos a medias.
+_save y el GC se coordinan con un lock sobre la fila FileBlob: _save la crea o
+renueva last_referenced_at antes de mirar si el archivo existe, y el GC borra
+fila y archivo con la fila bloqueada, así que una subida que reutiliza un blob
+sin referencias nunca se queda con el archivo borrado.
+Los archivos antiguos (lessons/course_X/...) siguen legibles: la ubicación
+base es la misma MEDIA_ROOT.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+BLOB_PREFIX = "blobs/"
+
+
+def blob_name(sha256, ext=""):
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def file_sha256(content):
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que ignora el nombre propuesto por upload_to y devuelve
+    el nombre del blob. Si `content` trae el atributo sha256 (p. ej. una subida
+    por partes que ya lo calculó) no se vuelve a leer para hashear.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo lo decide _save; nunca se renombra con sufijos
+        return name
+
+    def _save(self, name, content):
+        from .models import FileBlob
+
+        sha256 = getattr(content, "sha256", None) or file_sha256(content)
+        name = blob_name(sha256, os.path.splitext(name)[1])
+        path = self.path(name)
+
+        with transaction.atomic():
+            # Primero la fila (bloqueada): si el GC la tenía, esperamos a que
+            # termine de borrar y la recreamos; después, el archivo
+            blob, created = FileBlob.objects.select_for_update().get_or_create(
+                name=name, defaults={"sha256": sha256, "size": content.size or 0}
+            )
+            if not created:
+                FileBlob.objects.filter(pk=blob.pk).update(last_referenced_at=timezone.now())
+
+            if os.path.exists(path):
+                # Renueva el mtime: el barrido de archivos sin fila mira la antigüedad
+                os.utime(path)
+            else:
+                self._write(path, content)
+            if created:
+                FileBlob.objects.filter(pk=blob.pk).update(size=os.path.getsize(path))
+        return name
+
+    def _write(self, path, content):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def delete(self, name):
+        """
+        No borra blobs que alguna lección sigue usando (el blob puede estar
+        compartido). Los blobs sin referencias los elimina el GC.
+        """
+        if is_blob(name):
+            from .models import FileBlob
+
+            if FileBlob.objects.filter(name=name, refcount__gt=0).exists():
+                return
+        super().delete(name)
+
+
+_storage = ContentAddressedStorage()
+
+
+def lesson_file_storage():
+    return _storage
+
+
+def recount_blobs():
+    """Recalcula FileBlob.refcount desde Lesson.archivo. Devuelve cuántos cambiaron."""
+    from django.db.models import Count
+
+    from .models import FileBlob, Lesson
+
+    counts = dict(
+        Lesson.objects.filter(archivo__startswith=BLOB_PREFIX)
+        .values("archivo")
+        .annotate(n=Count("id"))
+        .values_list("archivo", "n")
+    )
+    changed = 0
+    for blob in FileBlob.objects.only("id", "name", "refcount").iterator():
+        refcount = counts.get(blob.name, 0)
+        if blob.refcount != refcount:
+            FileBlob.objects.filter(pk=blob.pk).update(refcount=refcount)
+            changed += 1
+    return changed
+
+
+def collect_garbage(older_than, dry_run=False):
+    """
+    Borra los blobs sin referencias que nadie reutilizó desde `older_than` (el
+    margen evita llevarse un blob recién subido cuya lección aún no se guardó)
+    y los archivos de blobs/ sin fila FileBlob. Devuelve (blobs, bytes) liberados.
+    Un blob con lecciones que lo usan no se borra aunque su refcount diga 0: se
+    corrige el contador.
+    """
+    from .models import FileBlob, Lesson
+
+    storage = lesson_file_storage()
+    deleted = freed = 0
+
+    candidates = FileBlob.objects.filter(refcount__lte=0, last_referenced_at__lt=older_than)
+    for blob in candidates.iterator():
+        if not dry_run:
+            with transaction.atomic():
+                # Se vuelve a comprobar con la fila bloqueada: _save pudo reutilizarlo
+                locked = candidates.select_for_update().filter(pk=blob.pk).first()
+                if locked is None:
+                    continue
+                # El contador puede estar mal (signals que no corrieron, bulk
+                # updates): con la fila bloqueada se cuentan las lecciones reales
+                refcount = Lesson.objects.filter(archivo=blob.name).count()
+                if refcount:
+                    FileBlob.objects.filter(pk=blob.pk).update(refcount=refcount)
+                    continue
+                locked.delete()
+                storage.delete(blob.name)
+        deleted += 1
+        freed += blob.size
+
+    root = storage.path(BLOB_PREFIX)
+    cutoff = older_than.timestamp()
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, storage.location).replace(os.sep, "/")
+            if os.path.getmtime(path) >= cutoff or FileBlob.objects.filter(name=name).exists():
+                continue
+            size = os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+            deleted += 1
+            freed += size
+
+    return deleted, freed
+
+
+def adopt_legacy_files():
+    """
+    Mueve los archivos guardados con lesson_upload_path (lessons/course_X/...)
+    a blobs. Las lecciones pasan a apuntar al blob y el archivo viejo se borra
+    cuando ninguna lección lo usa. Devuelve cuántas lecciones se migraron.
+    """
+    from .models import Lesson
+
+    storage = lesson_file_storage()
+    adopted = 0
+    lessons = Lesson.objects.exclude(archivo="").exclude(archivo__isnull=True).exclude(
+        archivo__startswith=BLOB_PREFIX
+    )
+    for lesson in lessons.iterator():
+        old = lesson.archivo.name
+        if not storage.exists(old):
+            continue
+        with storage.open(old, "rb") as fh:
+            lesson.archivo.name = storage.save(old, fh)
+        lesson.save(update_fields=["archivo"])
+        adopted += 1
+        if not Lesson.objects.filter(archivo=old).exists():
+            storage.delete(old)
+    return adopted
@@ -0,0 +1,646 @@
+import hashlib
+import io
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from enrollments.models import Enrollment, QuizResult, Submission
+from learning_platform_backend.local_cache import local_cache
+from learning_platform_backend.response_cache import bump_version, response_cache
+from learning_platform_backend.testing import APITestHelpersMixin
+from users.principal import get_principal, principal_for_user
+from . import storage, uploads, visibility
+from .models import Course, FileBlob, Module, Lesson, LessonUpload, Quiz
+
+User = get_user_model()
+
+
+class CoursesAPITestMixin(APITestHelpersMixin):
+    def setUp(self):
+        cache.clear()
+        local_cache().clear()
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)  # los conteos asumen el usuario en caché
+class PrincipalTests(CoursesAPITestMixin, APITestCase):
+    def test_quizzes_resolve_instructor_once(self):
+        instructor = self.make_user("inst", role="instructor")
+        course = self.make_course(instructor)
+        Quiz.objects.create(course=course, titulo="Quiz 1")
+        self.auth_as("inst")
+        self.client.get("/api/courses/quizzes/")  # calienta la caché de auth
+
+        # Solo la query del listado: ni users_user ni users_instructorprofile
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/courses/quizzes/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_get_principal_is_memoized_per_request(self):
+        from django.test import RequestFactory
+
+        instructor = self.make_user("inst2", role="instructor")
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=instructor.pk)
+
+        with self.assertNumQueries(1):
+            first = get_principal(request)
+            second = get_principal(request)
+        self.assertIs(first, second)
+        self.assertEqual(first.instructor_profile_id, instructor.instructor_profile.id)
+        self.assertTrue(first.is_instructor)
+
+
+class VisibilityTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.make_user("inst_v", role="instructor")
+        other = self.make_user("inst_o", role="instructor")
+        self.own_published = self.make_course(self.owner, titulo="Propio publicado")
+        self.own_draft = self.make_course(self.owner, estado="borrador", titulo="Propio borrador")
+        self.other_published = self.make_course(other, titulo="Ajeno publicado")
+        self.make_course(other, estado="borrador", titulo="Ajeno borrador")
+
+    def test_instructor_sees_published_and_own_drafts_once(self):
+        self.auth_as("inst_v")
+        res = self.client.get("/api/courses/courses/")
+        self.assertEqual(
+            sorted(c["id"] for c in res.data),
+            sorted([self.own_published.id, self.own_draft.id, self.other_published.id]),
+        )
+
+        p = principal_for_user(self.owner)
+        sql = str(visibility.visible_courses(Course.objects.all(), p).query).upper()
+        self.assertIn("UNION ALL", sql)
+        self.assertNotIn("DISTINCT", sql)
+
+    def test_quizzes_scoped_to_own_courses(self):
+        mine = Quiz.objects.create(course=self.own_draft, titulo="Mío")
+        module = Module.objects.create(course=self.own_published, titulo="M", orden=1)
+        in_module = Quiz.objects.create(module=module, titulo="En módulo")
+        Quiz.objects.create(course=self.other_published, titulo="Ajeno")
+
+        self.auth_as("inst_v")
+        res = self.client.get("/api/courses/quizzes/")
+        self.assertEqual(sorted(q["id"] for q in res.data), sorted([mine.id, in_module.id]))
+
+        # Un IN por camino unidos con UNION ALL, sin OR a través del LEFT JOIN
+        p = principal_for_user(self.owner)
+        sql = str(visibility.managed(Quiz.objects.all(), p, "course_id", "module__course_id").query).upper()
+        self.assertIn("UNION ALL", sql)
+        self.assertNotIn(" OR ", sql)
+        self.assertNotIn("LEFT OUTER JOIN", sql)
+
+    def test_bench_command_runs(self):
+        out = io.StringIO()
+        call_command("bench_visibility", "--username=inst_v", "--repeat=1", "--case=courses", stdout=out)
+        self.assertIn("después", out.getvalue())
+
+
+class StudentLessonsTests(CoursesAPITestMixin, APITestCase):
+    def test_student_lessons_ordered_by_module(self):
+        instructor = self.make_user("inst3", role="instructor")
+        course = self.make_course(instructor)
+        m2 = Module.objects.create(course=course, titulo="M2", orden=2)
+        m1 = Module.objects.create(course=course, titulo="M1", orden=1)
+        Lesson.objects.create(module=m2, titulo="L2", tipo="texto", contenido="x", orden=1)
+        Lesson.objects.create(module=m1, titulo="L1", tipo="texto", contenido="x", orden=1)
+
+        res = self.client.get(f"/api/courses/student-lessons/?course_id={course.id}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([l["titulo"] for l in res.data], ["L1", "L2"])
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)  # los conteos asumen el usuario en caché
+class CourseDetailQueryCountTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.make_user("owner", role="instructor")
+        self.course = self.make_course(self.instructor, estado="borrador")
+        for i in range(1, 4):
+            module = Module.objects.create(course=self.course, titulo=f"M{i}", orden=i)
+            for j in range(1, 4):
+                Lesson.objects.create(module=module, titulo=f"L{i}.{j}", tipo="texto", contenido="x", orden=j)
+        self.auth_as("owner")
+        self.client.get("/api/courses/courses/")  # calienta la caché de auth
+
+    def test_retrieve_fetches_course_once(self):
+        # curso + módulos + lecciones
+        with self.assertNumQueries(3):
+            res = self.client.get(f"/api/courses/courses/{self.course.id}/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["modules"]), 3)
+        self.assertEqual(len(res.data["modules"][0]["lessons"]), 3)
+
+    def test_publish_reuses_prefetched_tree(self):
+        # curso + módulos + lecciones + (SAVEPOINT, SELECT FOR UPDATE, UPDATE, INSERT outbox, RELEASE)
+        with self.assertNumQueries(8):
+            res = self.client.post(f"/api/courses/courses/{self.course.id}/publish/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["estado"], "publicado")
+        self.assertEqual(len(res.data["modules"]), 3)
+
+    def test_update_fetches_course_once(self):
+        # curso + UPDATE
+        with self.assertNumQueries(2):
+            res = self.client.patch(
+                f"/api/courses/courses/{self.course.id}/",
+                {"titulo": "Nuevo"},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["titulo"], "Nuevo")
+
+    def test_non_owner_cannot_publish(self):
+        self.make_user("other", role="instructor")
+        self.course.estado = "publicado"
+        self.course.save(update_fields=["estado"])
+        self.auth_as("other")
+
+        res = self.client.post(f"/api/courses/courses/{self.course.id}/draft/")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(res.data["detail"], "No permitido.")
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)  # los conteos asumen el usuario en caché
+class GradebookTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.make_user("gb_inst", role="instructor")
+        self.course = self.make_course(self.instructor)
+        module = Module.objects.create(course=self.course, titulo="M1", orden=1)
+        self.q_course = Quiz.objects.create(course=self.course, titulo="Final")
+        self.q_module = Quiz.objects.create(module=module, titulo="Módulo 1")
+
+        self.students = [self.make_user(f"gb_s{i}") for i in range(3)]
+        for s in self.students:
+            Enrollment.objects.create(user=s, course=self.course)
+
+        s0 = self.students[0]
+        for quiz, attempt, score in ((self.q_course, 1, 40), (self.q_course, 2, 90), (self.q_module, 1, 70)):
+            QuizResult.record(Submission.objects.create(user=s0, quiz=quiz, attempt=attempt, score=score))
+
+    def test_gradebook_matrix(self):
+        self.auth_as("gb_inst")
+        self.client.get("/api/courses/courses/")  # calienta la caché de auth
+
+        # curso + quizzes + COUNT + página + resúmenes
+        with self.assertNumQueries(5):
+            res = self.client.get(f"/api/courses/courses/{self.course.id}/gradebook/?page_size=2")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 3)
+        self.assertIsNotNone(res.data["next"])
+
+        quiz_ids = [q["id"] for q in res.data["quizzes"]]
+        self.assertEqual(set(quiz_ids), {self.q_course.id, self.q_module.id})
+
+        first = res.data["results"][0]
+        self.assertEqual(first["username"], "gb_s0")
+        i = quiz_ids.index(self.q_course.id)
+        self.assertEqual(first["best_score"][i], 90)
+        self.assertEqual(first["attempts"][i], 2)
+        self.assertEqual(res.data["results"][1]["attempts"], [0, 0])
+
+    def test_gradebook_requires_owner(self):
+        self.make_user("gb_other", role="instructor")
+        self.auth_as("gb_other")
+        res = self.client.get(f"/api/courses/courses/{self.course.id}/gradebook/")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AsyncReadPathTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.make_user("inst5", role="instructor")
+        self.course = self.make_course(self.instructor)
+        self.draft = self.make_course(self.instructor, estado="borrador", titulo="Borrador")
+        module = Module.objects.create(course=self.course, titulo="M1", orden=1)
+        Lesson.objects.create(module=module, titulo="L1", tipo="texto", contenido="x", orden=1)
+        self.make_user("stud5")
+
+    def assertSameJSON(self, sync_url, async_url):
+        sync_res = self.client.get(sync_url)
+        async_res = self.client.get(async_url)
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        self.assertEqual(async_res.json(), sync_res.json())
+        return async_res
+
+    def test_course_list_and_detail_match_sync(self):
+        for username in (None, "stud5", "inst5"):
+            if username:
+                self.auth_as(username)
+            self.assertSameJSON("/api/courses/courses/", "/api/async/courses/courses/")
+            self.assertSameJSON(
+                f"/api/courses/courses/{self.course.id}/", f"/api/async/courses/courses/{self.course.id}/"
+            )
+
+    def test_draft_hidden_from_students(self):
+        self.auth_as("stud5")
+        res = self.assertSameJSON(
+            f"/api/courses/courses/{self.draft.id}/", f"/api/async/courses/courses/{self.draft.id}/"
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_student_views_match_sync(self):
+        self.auth_as("stud5")
+        for path in ("student-modules", "student-lessons"):
+            self.assertSameJSON(
+                f"/api/courses/{path}/?course_id={self.course.id}",
+                f"/api/async/courses/{path}/?course_id={self.course.id}",
+            )
+
+    def test_invalid_token_is_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer nope")
+        res = self.client.get("/api/async/courses/courses/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ResponseCacheTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.make_user("inst6", role="instructor")
+        self.course = self.make_course(self.instructor)
+        self.draft = self.make_course(self.instructor, estado="borrador", titulo="Borrador")
+        self.module = Module.objects.create(course=self.course, titulo="M1", orden=1)
+        Lesson.objects.create(module=self.module, titulo="L1", tipo="texto", contenido="x", orden=1)
+        self.make_user("stud6")
+
+    def test_anonymous_catalog_served_from_cache(self):
+        self.assertEqual(self.client.get("/api/courses/courses/")["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/courses/courses/")
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual([c["id"] for c in res.json()], [self.course.id])
+
+    def test_key_varies_on_audience_not_user(self):
+        self.client.get("/api/courses/courses/")
+
+        self.auth_as("stud6")
+        self.assertEqual(self.client.get("/api/courses/courses/")["X-Cache"], "HIT")
+
+        self.auth_as("inst6")
+        res = self.client.get("/api/courses/courses/")
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual({c["id"] for c in res.data}, {self.course.id, self.draft.id})
+
+    def test_course_change_invalidates_catalog(self):
+        self.client.get("/api/courses/courses/")
+        self.draft.estado = "publicado"
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.draft.save()
+            # Antes del commit la versión no cambia: nadie puede cachear el
+            # contenido sin confirmar bajo la versión nueva
+            self.assertEqual(self.client.get("/api/courses/courses/")["X-Cache"], "HIT")
+        self.assertTrue(callbacks)
+
+        res = self.client.get("/api/courses/courses/")
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data), 2)
+
+    def test_student_lessons_invalidated_per_course(self):
+        url = f"/api/courses/student-lessons/?course_id={self.course.id}"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual((res["X-Cache"], res["X-Cache-Tier"]), ("HIT", "local"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(module=self.module, titulo="L2", tipo="texto", contenido="x", orden=2)
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual([l["titulo"] for l in res.data], ["L1", "L2"])
+
+    def test_moved_lesson_invalidates_old_course(self):
+        other = Module.objects.create(course=self.draft, titulo="M2", orden=1)
+        url = f"/api/courses/student-lessons/?course_id={self.course.id}"
+        self.client.get(url)
+
+        lesson = Lesson.objects.get(titulo="L1")
+        lesson.module = other
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.save()
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data, [])
+
+    def test_local_tier_falls_back_to_shared(self):
+        url = f"/api/courses/student-lessons/?course_id={self.course.id}"
+        self.client.get(url)
+        local_cache().clear()  # otro worker: LRU vacía, caché compartida caliente
+
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache-Tier"], "shared")
+        self.assertEqual(self.client.get(url)["X-Cache-Tier"], "local")
+
+
+class SingleFlightTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.make_user("inst7", role="instructor")
+        self.course = self.make_course(self.instructor, titulo="Original")
+        self.url = f"/api/courses/courses/{self.course.id}/"
+
+    def lock_held_elsewhere(self):
+        # Otro worker tiene el lock de reconstrucción de la clave
+        return mock.patch.object(response_cache(), "add", return_value=False)
+
+    def test_retrieve_cached_per_course(self):
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(res.json()["titulo"], "Original")
+
+    def test_serves_stale_while_another_worker_rebuilds(self):
+        self.client.get(self.url)
+        self.course.titulo = "Editado"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+
+        with self.lock_held_elsewhere(), self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res["X-Cache"], "STALE")
+        self.assertEqual(res.json()["titulo"], "Original")
+
+        res = self.client.get(self.url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["titulo"], "Editado")
+
+    @override_settings(RESPONSE_CACHE_SINGLE_FLIGHT_WAIT=0.1)
+    def test_unpublished_course_is_not_served_stale(self):
+        self.client.get(self.url)
+        self.course.estado = "borrador"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+
+        with self.lock_held_elsewhere():
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RESPONSE_CACHE_SINGLE_FLIGHT_WAIT=0.1)
+    def test_failed_rebuild_drops_stale_copy(self):
+        self.client.get(self.url)
+        # Despublicado sin señales (UPDATE masivo): la entrada se invalida, la copia stale no
+        Course.objects.filter(pk=self.course.pk).update(estado="borrador")
+        bump_version(f"course:{self.course.pk}")
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        with self.lock_held_elsewhere():
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RESPONSE_CACHE_SINGLE_FLIGHT_WAIT=0.1)
+    def test_without_stale_waits_then_rebuilds(self):
+        with self.lock_held_elsewhere():
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+
+class LessonUploadTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media.name, LESSON_UPLOAD_TEMP_DIR=os.path.join(self.media.name, "tmp")
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.instructor = self.make_user("inst8", role="instructor")
+        course = self.make_course(self.instructor)
+        module = Module.objects.create(course=course, titulo="M1", orden=1)
+        self.lesson = Lesson.objects.create(module=module, titulo="PDF", tipo="archivo", orden=1)
+        self.pdf = b"%PDF-1.4\n" + b"x" * 1000
+        self.auth_as("inst8")
+
+    def start(self, size=None, filename="apunte.pdf"):
+        return self.client.post(
+            "/api/courses/lesson-uploads/",
+            {"lesson": self.lesson.id, "filename": filename, "size": size or len(self.pdf)},
+            format="json",
+        )
+
+    def send(self, upload_id, offset, chunk):
+        return self.client.patch(
+            f"/api/courses/lesson-uploads/{upload_id}/",
+            data=chunk,
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload_resumes_and_attaches(self):
+        upload_id = self.start().data["id"]
+        self.assertEqual(self.send(upload_id, 0, self.pdf[:400]).data["offset"], 400)
+
+        # Reintento de una parte ya recibida: se rechaza con el offset correcto
+        res = self.send(upload_id, 0, self.pdf[:400])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["offset"], 400)
+
+        # El cliente reanuda desde el offset que informa el servidor
+        uploads._hashers.clear()  # la siguiente parte llega a otro worker
+        offset = self.client.get(f"/api/courses/lesson-uploads/{upload_id}/").data["offset"]
+        self.send(upload_id, offset, self.pdf[offset:])
+
+        res = self.client.post(
+            f"/api/courses/lesson-uploads/{upload_id}/complete/",
+            {"sha256": hashlib.sha256(self.pdf).hexdigest()},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.archivo.name, storage.blob_name(hashlib.sha256(self.pdf).hexdigest(), ".pdf"))
+        with self.lesson.archivo.open("rb") as fh:
+            self.assertEqual(fh.read(), self.pdf)
+        self.assertEqual(os.listdir(os.path.join(self.media.name, "tmp")), [])
+
+    def test_repeated_complete_returns_first_result(self):
+        upload_id = self.start().data["id"]
+        self.send(upload_id, 0, self.pdf)
+        first = self.client.post(f"/api/courses/lesson-uploads/{upload_id}/complete/")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        # Reintento con el temporal ya borrado: mismo resultado, sin tocar contadores
+        again = self.client.post(f"/api/courses/lesson-uploads/{upload_id}/complete/")
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["sha256"], first.data["sha256"])
+        self.assertEqual(FileBlob.objects.get().refcount, 1)
+
+    def test_first_chunk_must_be_pdf(self):
+        upload_id = self.start().data["id"]
+        res = self.send(upload_id, 0, b"MZ\x90\x00" + b"x" * 100)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["offset"], 0)
+
+    def test_incomplete_or_corrupt_upload_is_not_attached(self):
+        upload_id = self.start().data["id"]
+        self.send(upload_id, 0, self.pdf[:500])
+        res = self.client.post(f"/api/courses/lesson-uploads/{upload_id}/complete/")
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        self.send(upload_id, 500, self.pdf[500:])
+        res = self.client.post(f"/api/courses/lesson-uploads/{upload_id}/complete/", {"sha256": "0" * 64})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.lesson.refresh_from_db()
+        self.assertFalse(self.lesson.archivo)
+
+    def test_only_course_owner_can_start(self):
+        self.make_user("inst9", role="instructor")
+        self.auth_as("inst9")
+        self.assertEqual(self.start().status_code, status.HTTP_403_FORBIDDEN)
+        self.auth_as("inst8")
+        self.assertEqual(self.start(filename="video.mp4").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_archivo_lessons_accept_uploads(self):
+        Lesson.objects.filter(pk=self.lesson.pk).update(tipo="texto", contenido="x")
+        res = self.start()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("lesson", res.data)
+
+    def test_tipo_changed_before_complete(self):
+        upload_id = self.start().data["id"]
+        self.send(upload_id, 0, self.pdf)
+        Lesson.objects.filter(pk=self.lesson.pk).update(tipo="texto", contenido="x")
+        res = self.client.post(f"/api/courses/lesson-uploads/{upload_id}/complete/")
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.lesson.refresh_from_db()
+        self.assertFalse(self.lesson.archivo)
+
+    def test_gc_expires_abandoned_uploads(self):
+        stale_id = self.start().data["id"]
+        self.send(stale_id, 0, self.pdf[:100])
+        fresh_id = self.start().data["id"]
+        LessonUpload.objects.filter(pk=stale_id).update(updated_at=timezone.now() - timedelta(days=2))
+        orphan = os.path.join(self.media.name, "tmp", "huerfano.part")
+        open(orphan, "wb").close()
+        os.utime(orphan, (0, 0))
+
+        call_command("gc_lesson_blobs", stdout=io.StringIO())
+
+        self.assertEqual(list(LessonUpload.objects.values_list("id", flat=True)), [uuid.UUID(fresh_id)])
+        self.assertEqual(os.listdir(os.path.join(self.media.name, "tmp")), [f"{fresh_id}.part"])
+
+
+class FileBlobStorageTests(CoursesAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.instructor = self.make_user("inst10", role="instructor")
+        course = self.make_course(self.instructor)
+        self.m1 = Module.objects.create(course=course, titulo="M1", orden=1)
+        self.m2 = Module.objects.create(course=course, titulo="M2", orden=2)
+        self.pdf = b"%PDF-1.4\n" + b"y" * 500
+
+    def lesson_with_pdf(self, module, orden, filename="guia.pdf", data=None):
+        lesson = Lesson(module=module, titulo=f"L{orden}", tipo="archivo", orden=orden)
+        lesson.archivo.save(filename, ContentFile(data or self.pdf), save=False)
+        lesson.save()
+        return lesson
+
+    def blob_files(self):
+        return [f for _, _, files in os.walk(os.path.join(self.media.name, "blobs")) for f in files]
+
+    def test_same_content_is_stored_once_and_refcounted(self):
+        a = self.lesson_with_pdf(self.m1, 1, "guia.pdf")
+        b = self.lesson_with_pdf(self.m2, 1, "copia de guia.pdf")
+
+        self.assertEqual(a.archivo.name, b.archivo.name)
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(FileBlob.objects.get().refcount, 2)
+
+        a.delete()
+        self.assertEqual(FileBlob.objects.get().refcount, 1)
+        with b.archivo.open("rb") as fh:
+            self.assertEqual(fh.read(), self.pdf)
+
+        # Cambiar el archivo de una lección suelta la referencia al blob anterior
+        b.archivo.save("otra.pdf", ContentFile(b"%PDF-1.4\nz"), save=True)
+        self.assertEqual(FileBlob.objects.get(name=a.archivo.name).refcount, 0)
+        self.assertEqual(FileBlob.objects.get(name=b.archivo.name).refcount, 1)
+
+    def test_stale_instance_releases_old_blob_once(self):
+        shared = self.lesson_with_pdf(self.m1, 1)
+        lesson = self.lesson_with_pdf(self.m2, 1)
+        first, second = Lesson.objects.get(pk=lesson.pk), Lesson.objects.get(pk=lesson.pk)
+
+        # Dos ediciones con la misma copia vieja: el blob compartido baja una sola vez
+        first.archivo.save("a.pdf", ContentFile(b"%PDF-1.4\na"), save=True)
+        second.archivo.save("b.pdf", ContentFile(b"%PDF-1.4\nb"), save=True)
+
+        self.assertEqual(FileBlob.objects.get(name=shared.archivo.name).refcount, 1)
+        self.assertEqual(FileBlob.objects.get(name=first.archivo.name).refcount, 0)
+        self.assertEqual(FileBlob.objects.get(name=second.archivo.name).refcount, 1)
+
+    def test_gc_recounts_before_deleting(self):
+        lesson = self.lesson_with_pdf(self.m1, 1)
+        FileBlob.objects.update(refcount=0)
+
+        call_command("gc_lesson_blobs", "--grace-hours=-1", stdout=io.StringIO())
+
+        self.assertEqual(FileBlob.objects.get().refcount, 1)
+        with lesson.archivo.open("rb") as fh:
+            self.assertEqual(fh.read(), self.pdf)
+
+    def test_gc_deletes_only_unreferenced_blobs(self):
+        keep = self.lesson_with_pdf(self.m1, 1)
+        self.lesson_with_pdf(self.m2, 1, data=b"%PDF-1.4\nborrar").delete()
+        self.assertEqual(len(self.blob_files()), 2)
+
+        # Dentro del margen no se toca nada
+        call_command("gc_lesson_blobs", stdout=io.StringIO())
+        self.assertEqual(len(self.blob_files()), 2)
+
+        call_command("gc_lesson_blobs", "--grace-hours=-1", stdout=io.StringIO())
+        self.assertEqual(FileBlob.objects.get().name, keep.archivo.name)
+        self.assertEqual(self.blob_files(), [os.path.basename(keep.archivo.name)])
+
+    def test_reused_blob_is_not_collected(self):
+        self.lesson_with_pdf(self.m1, 1).delete()
+        blob = FileBlob.objects.get()
+        FileBlob.objects.filter(pk=blob.pk).update(
+            created_at=timezone.now() - timedelta(days=3), last_referenced_at=timezone.now() - timedelta(days=3)
+        )
+
+        # Nueva subida del mismo contenido, aún sin guardar la lección
+        lesson = Lesson(module=self.m2, titulo="Nueva", tipo="archivo", orden=1)
+        lesson.archivo.save("guia.pdf", ContentFile(self.pdf), save=False)
+        call_command("gc_lesson_blobs", stdout=io.StringIO())
+        lesson.save()
+
+        self.assertEqual(FileBlob.objects.get(pk=blob.pk).refcount, 1)
+        with lesson.archivo.open("rb") as fh:
+            self.assertEqual(fh.read(), self.pdf)
+
+    def test_recount_and_adopt_legacy_files(self):
+        legacy = "lessons/course_1/module_1/viejo.pdf"
+        os.makedirs(os.path.join(self.media.name, os.path.dirname(legacy)))
+        with open(os.path.join(self.media.name, legacy), "wb") as fh:
+            fh.write(self.pdf)
+        old = Lesson.objects.create(module=self.m1, titulo="Vieja", tipo="archivo", archivo=legacy, orden=1)
+        new = self.lesson_with_pdf(self.m2, 1)
+        FileBlob.objects.update(refcount=7)
+
+        call_command("gc_lesson_blobs", "--adopt-legacy", "--recount", stdout=io.StringIO())
+
+        old.refresh_from_db()
+        self.assertEqual(old.archivo.name, new.archivo.name)
+        self.assertEqual(FileBlob.objects.get().refcount, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, legacy)))
@@ -0,0 +1,199 @@
+"""
+Subidas por partes de archivos de lección (LessonUploadViewSet).
+
+Cada parte llega en el cuerpo crudo de un PATCH con la cabecera Upload-Offset y
+se escribe a disco en bloques, sin pasar por MultiPartParser ni cargarse
+entera en memoria. El SHA-256 se calcula incrementalmente: el estado del hash
+queda en memoria del worker (LocalLRU) y, si la siguiente parte cae en otro
+worker, se reconstruye leyendo una vez el prefijo ya escrito.
+
+La firma %PDF- se valida con la primera parte; al completar, el archivo se
+adjunta a Lesson.archivo (courses.storage: si el blob ya existe no se copia) en
+una transacción que bloquea la subida y la lección; completar dos veces la misma
+subida devuelve el primer resultado. Si falla la BD, el blob queda sin
+referencias y lo borra gc_lesson_blobs. Solo se admiten lecciones tipo=archivo.
+
+Las subidas abandonadas (sin partes nuevas en LESSON_UPLOAD_EXPIRY_HOURS) y los
+temporales sin registro los limpia expire_abandoned, desde gc_lesson_blobs.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from learning_platform_backend.local_cache import LocalLRU
+from .models import Lesson, LessonUpload
+
+PDF_SIGNATURE = b"%PDF-"
+READ_BLOCK = 64 * 1024
+
+# upload_id -> (offset, hasher). Entradas de "1 byte": acota el número de subidas
+_hashers = LocalLRU(max_bytes=256, ttl=3600)
+
+
+class UploadError(Exception):
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def temp_dir():
+    return Path(getattr(settings, "LESSON_UPLOAD_TEMP_DIR", Path(settings.MEDIA_ROOT) / "uploads_tmp"))
+
+
+def temp_path(upload):
+    return temp_dir() / f"{upload.id}.part"
+
+
+def start(upload):
+    path = temp_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def discard(upload):
+    _hashers.delete(str(upload.id))
+    try:
+        os.remove(temp_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def _hasher(upload):
+    cached = _hashers.get(str(upload.id))
+    if cached is not None and cached[0] == upload.offset:
+        return cached[1]
+
+    # Otro worker recibió las partes anteriores: rehacer el hash del prefijo
+    hasher = hashlib.sha256()
+    with open(temp_path(upload), "rb") as fh:
+        remaining = upload.offset
+        while remaining:
+            block = fh.read(min(READ_BLOCK, remaining))
+            if not block:
+                raise UploadError("El temporal de la subida está incompleto; reiniciar la subida.", 409)
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Escribe `length` bytes de `stream` en la posición `offset`. Solo se acepta
+    la parte que continúa exactamente donde terminó la anterior. Devuelve el
+    nuevo offset. Si algo falla, el temporal vuelve a su tamaño anterior.
+    """
+    if upload.completed_at is not None:
+        raise UploadError("La subida ya está completada.", 409)
+    if offset != upload.offset:
+        raise UploadError(f"Upload-Offset esperado: {upload.offset}.", 409)
+    if length <= 0:
+        raise UploadError("Parte vacía.")
+    if length > getattr(settings, "LESSON_UPLOAD_MAX_CHUNK", 8 * 1024 * 1024):
+        raise UploadError("Parte demasiado grande.", 413)
+    if offset + length > upload.size:
+        raise UploadError("La parte excede el tamaño declarado.")
+
+    hasher = _hasher(upload).copy()
+    written = 0
+    with open(temp_path(upload), "r+b") as fh:
+        fh.seek(offset)
+        try:
+            while written < length:
+                block = stream.read(min(READ_BLOCK, length - written))
+                if not block:
+                    raise UploadError("Parte incompleta: el cuerpo es más corto que Content-Length.")
+                fh.write(block)
+                hasher.update(block)
+                written += len(block)
+
+            if offset == 0:
+                fh.seek(0)
+                if fh.read(len(PDF_SIGNATURE)) != PDF_SIGNATURE:
+                    raise UploadError("Solo se permite PDF.")
+        except Exception:
+            fh.truncate(offset)
+            raise
+        fh.truncate(offset + written)
+
+    upload.offset = offset + written
+    upload.save(update_fields=["offset", "updated_at"])
+    _hashers.set(str(upload.id), (upload.offset, hasher), 1)
+    return upload.offset
+
+
+def complete(upload, expected_sha256=None):
+    """
+    Verifica tamaño y hash y adjunta el archivo a la lección. Devuelve la Lesson.
+
+    La subida y la lección se bloquean durante todo el proceso: un reintento
+    (o un complete concurrente) espera y, si la subida ya se completó,
+    devuelve el resultado existente en vez de volver a adjuntar. `upload` se
+    refresca desde la BD.
+    """
+    with transaction.atomic():
+        upload.refresh_from_db(from_queryset=LessonUpload.objects.select_for_update())
+        if upload.completed_at is not None:
+            return Lesson.objects.select_related("module").get(pk=upload.lesson_id)
+        if upload.offset != upload.size:
+            raise UploadError(f"Faltan bytes: recibidos {upload.offset} de {upload.size}.", 409)
+
+        digest = _hasher(upload).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            raise UploadError("sha256 no coincide con lo recibido.")
+
+        lesson = Lesson.objects.select_for_update(of=("self",)).select_related("module").get(pk=upload.lesson_id)
+        if lesson.tipo != Lesson.Tipo.ARCHIVO:
+            raise UploadError("La lección ya no es de tipo archivo.", 409)
+
+        with open(temp_path(upload), "rb") as fh:
+            content = File(fh, name=upload.filename)
+            content.sha256 = digest  # ContentAddressedStorage no vuelve a hashear
+            lesson.archivo.save(upload.filename, content, save=False)
+        try:
+            lesson.clean()
+        except ValidationError as exc:
+            raise UploadError(" ".join(exc.messages))
+        lesson.save(update_fields=["archivo"])
+        upload.sha256 = digest
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=["sha256", "completed_at"])
+
+    discard(upload)
+    return lesson
+
+
+def expire_abandoned(older_than, dry_run=False):
+    """
+    Borra las subidas sin completar cuya última parte es anterior a
+    `older_than` y los temporales .part que no tienen registro. Devuelve
+    (subidas, bytes) liberados.
+    """
+    expired = freed = 0
+    stale = LessonUpload.objects.filter(completed_at__isnull=True, updated_at__lt=older_than)
+    for upload in stale.iterator():
+        path = temp_path(upload)
+        freed += path.stat().st_size if path.exists() else 0
+        if not dry_run:
+            discard(upload)
+            upload.delete()
+        expired += 1
+
+    base = temp_dir()
+    if base.is_dir():
+        known = {str(pk) for pk in LessonUpload.objects.filter(completed_at__isnull=True).values_list("id", flat=True)}
+        cutoff = older_than.timestamp()
+        for path in base.glob("*.part"):
+            if path.stem in known or path.stat().st_mtime >= cutoff:
+                continue
+            freed += path.stat().st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+            expired += 1
+    return expired, freed
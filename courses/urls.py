@@ -5,6 +5,7 @@ from .views import (
     CourseViewSet,
     ModuleViewSet,
     LessonViewSet,
+    LessonUploadViewSet,
     QuizViewSet,
     QuestionViewSet,
     ChoiceViewSet,
@@ -16,6 +17,7 @@ router = DefaultRouter()
 router.register(r"courses", CourseViewSet, basename="courses")
 router.register(r"modules", ModuleViewSet, basename="modules")
 router.register(r"lessons", LessonViewSet, basename="lessons")
+router.register(r"lesson-uploads", LessonUploadViewSet, basename="lesson-uploads")
 router.register(r"quizzes", QuizViewSet, basename="quizzes")
 router.register(r"questions", QuestionViewSet, basename="questions")
 router.register(r"choices", ChoiceViewSet, basename="choices")
@@ -1,22 +1,30 @@
 # courses/views.py
+from django.db import transaction
 from django.db.models import Q
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Course, Module, Lesson, Quiz, Question, Choice
-from enrollments.models import Enrollment
+from . import uploads
+from .models import Course, Module, Lesson, LessonUpload, Quiz, Question, Choice
+from enrollments.models import Enrollment, QuizResult
+from learning_platform_backend.response_cache import cache_response, everyone
+from outbox.events import COURSE_PUBLISHED, record_event
+from users.principal import get_principal
 from .permissions import IsInstructorEnabledOrAdmin, CanReadCourse, IsCourseOwnerOrAdmin
+from .visibility import managed, visible_courses
 from .serializers import (
     CourseListSerializer,
     CourseDetailSerializer,
     CourseCreateUpdateSerializer,
     ModuleSerializer,
     LessonSerializer,
+    LessonUploadSerializer,
     QuizSerializer,
     QuestionSerializer,
     ChoiceSerializer,
@@ -27,21 +35,42 @@ def get_instructor_profile(user):
     return getattr(user, "instructor_profile", None)
 
 
+class GradebookPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 # =========================
 # Courses
 # =========================
 class CourseViewSet(viewsets.ModelViewSet):
-    # Solo seguimos la FK instructor; el modelo User ya no tiene "user"
-    queryset = (
-        Course.objects
-        .select_related("instructor")  # antes: "instructor", "instructor__user"
-        .all()
-    )
+    # instructor_id sale de la propia fila: no hace falta JOIN con instructor
+    queryset = Course.objects.all()
+
+    # Acciones que responden con CourseDetailSerializer (módulos + lecciones anidados)
+    detail_actions = ("retrieve", "publish", "draft")
 
     def get_permissions(self):
+        # Los permisos de objeto se evalúan en get_object(), sobre la única
+        # instancia que se trae de la BD.
         if self.action in ("list", "retrieve"):
-            return [AllowAny()]
-        return [IsAuthenticated(), IsInstructorEnabledOrAdmin()]
+            return [AllowAny(), CanReadCourse()]
+        if self.action == "create":
+            return [IsAuthenticated(), IsInstructorEnabledOrAdmin()]
+        return [IsAuthenticated(), IsInstructorEnabledOrAdmin(), IsCourseOwnerOrAdmin()]
+
+    @cache_response("course_list", versions=lambda request, **kwargs: ["courses"])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(
+        "course_detail",
+        versions=lambda request, pk=None, **kwargs: [f"course:{pk}"],
+        single_flight=True,
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -52,21 +81,10 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = self.queryset
-        user = getattr(self.request, "user", None)
+        if self.action in self.detail_actions:
+            qs = qs.prefetch_related("modules__lessons")
 
-        if not user or not user.is_authenticated:
-            return qs.filter(estado=Course.Estado.PUBLICADO)
-
-        if user.is_staff:
-            return qs
-
-        ip = get_instructor_profile(user)
-        if ip is not None:
-            return qs.filter(
-                Q(estado=Course.Estado.PUBLICADO) | Q(instructor=ip)
-            ).distinct()
-
-        return qs.filter(estado=Course.Estado.PUBLICADO)
+        return visible_courses(qs, get_principal(self.request))
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -83,33 +101,6 @@ class CourseViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("InstructorProfile no encontrado para el usuario.")
         serializer.save(instructor=ip)
 
-    def retrieve(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not CanReadCourse().has_object_permission(request, self, obj):
-            return Response(
-                {"detail": "No permitido."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-        return super().retrieve(request, *args, **kwargs)
-
-    def update(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not IsCourseOwnerOrAdmin().has_object_permission(request, self, obj):
-            return Response(
-                {"detail": "No permitido."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-        return super().update(request, *args, **kwargs)
-
-    def destroy(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not IsCourseOwnerOrAdmin().has_object_permission(request, self, obj):
-            return Response(
-                {"detail": "No permitido."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-        return super().destroy(request, *args, **kwargs)
-
     @action(
         detail=True,
         methods=["post"],
@@ -117,15 +108,7 @@ class CourseViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated, IsInstructorEnabledOrAdmin],
     )
     def publish(self, request, pk=None):
-        course = self.get_object()
-        if not IsCourseOwnerOrAdmin().has_object_permission(request, self, course):
-            return Response(
-                {"detail": "No permitido."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-        course.estado = Course.Estado.PUBLICADO
-        course.save(update_fields=["estado"])
-        return Response(CourseDetailSerializer(course).data)
+        return self._set_estado(Course.Estado.PUBLICADO)
 
     @action(
         detail=True,
@@ -134,14 +117,78 @@ class CourseViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated, IsInstructorEnabledOrAdmin],
     )
     def draft(self, request, pk=None):
+        return self._set_estado(Course.Estado.BORRADOR)
+
+    @action(detail=True, methods=["get"], url_path="gradebook")
+    def gradebook(self, request, pk=None):
+        """
+        Matriz estudiantes × quizzes (mejor nota, intentos, último intento),
+        leída de QuizResult. Layout columnar: ids de quiz una vez, arrays alineados por estudiante.
+        Paginado por estudiante (?page=&page_size=).
+        """
         course = self.get_object()
-        if not IsCourseOwnerOrAdmin().has_object_permission(request, self, course):
-            return Response(
-                {"detail": "No permitido."},
-                status=status.HTTP_403_FORBIDDEN,
+
+        quizzes = list(
+            Quiz.objects.filter(Q(course=course) | Q(module__course=course))
+            .order_by("module__orden", "orden", "id")
+            .values("id", "titulo")
+        )
+        quiz_ids = [q["id"] for q in quizzes]
+        column = {qid: i for i, qid in enumerate(quiz_ids)}
+
+        students_qs = (
+            Enrollment.objects.filter(course=course)
+            .order_by("user_id")
+            .values("user_id", "user__username")
+        )
+        paginator = GradebookPagination()
+        page = paginator.paginate_queryset(students_qs, request, view=self)
+
+        rows = {}
+        for e in page:
+            rows[e["user_id"]] = {
+                "user_id": e["user_id"],
+                "username": e["user__username"],
+                "best_score": [None] * len(quiz_ids),
+                "attempts": [0] * len(quiz_ids),
+                "last_attempt": [None] * len(quiz_ids),
+            }
+
+        if rows and quiz_ids:
+            # Celdas desde el resumen mantenido por submit (una fila por user × quiz)
+            cells = QuizResult.objects.filter(quiz_id__in=quiz_ids, user_id__in=rows.keys()).values_list(
+                "user_id", "quiz_id", "best_score", "attempts", "last_submitted_at"
             )
-        course.estado = Course.Estado.BORRADOR
-        course.save(update_fields=["estado"])
+            for user_id, quiz_id, best, attempts, last in cells:
+                row = rows[user_id]
+                i = column[quiz_id]
+                row["best_score"][i] = best
+                row["attempts"][i] = attempts
+                row["last_attempt"][i] = last
+
+        response = paginator.get_paginated_response(list(rows.values()))
+        response.data["course_id"] = course.id
+        response.data["quizzes"] = quizzes
+        return response
+
+    def _set_estado(self, estado):
+        # get_object() ya trae módulos/lecciones y valida IsCourseOwnerOrAdmin
+        course = self.get_object()
+        with transaction.atomic():
+            # Estado actual con la fila bloqueada: publicar un curso ya
+            # publicado (o dos publish a la vez) no repite el evento
+            current = Course.objects.select_for_update().filter(pk=course.pk).values_list("estado", flat=True).get()
+            course.estado = estado
+            if current == estado:
+                return Response(CourseDetailSerializer(course).data)
+            course.save(update_fields=["estado"])
+            if estado == Course.Estado.PUBLICADO:
+                record_event(
+                    COURSE_PUBLISHED,
+                    "course",
+                    course.id,
+                    {"instructor_id": course.instructor_id, "titulo": course.titulo},
+                )
         return Response(CourseDetailSerializer(course).data)
 
 
@@ -154,14 +201,14 @@ class ModuleViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsInstructorEnabledOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if not user.is_staff:
-            ip = get_instructor_profile(user)
-            if ip is None:
+        if not p.is_staff:
+            ip_id = p.instructor_profile_id
+            if ip_id is None:
                 return qs.none()
-            qs = qs.filter(course__instructor=ip)
+            qs = qs.filter(course__instructor_id=ip_id)
 
         course_id = self.request.query_params.get("course_id")
         if course_id:
@@ -185,14 +232,14 @@ class LessonViewSet(viewsets.ModelViewSet):
     parser_classes = [JSONParser, MultiPartParser, FormParser]  # <- aquí acepta JSON también
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if not user.is_staff:
-            ip = get_instructor_profile(user)
-            if ip is None:
+        if not p.is_staff:
+            ip_id = p.instructor_profile_id
+            if ip_id is None:
                 return qs.none()
-            qs = qs.filter(module__course__instructor=ip)
+            qs = qs.filter(module__course__instructor_id=ip_id)
 
         course_id = self.request.query_params.get("course_id")
         if course_id:
@@ -204,6 +251,82 @@ class LessonViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    # En una transacción, los signals de FileBlob leen el archivo anterior con
+    # la fila de la lección bloqueada (dos ediciones simultáneas no descuentan
+    # dos veces el mismo blob)
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+
+class LessonUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Subida reanudable del PDF de una lección (ver courses.uploads):
+
+    POST   /api/courses/lesson-uploads/                {lesson, filename, size}
+    PATCH  /api/courses/lesson-uploads/<id>/           cuerpo = bytes, Upload-Offset: N
+    GET    /api/courses/lesson-uploads/<id>/           offset actual, para reanudar
+    POST   /api/courses/lesson-uploads/<id>/complete/  {sha256?} -> adjunta a la lección
+    DELETE /api/courses/lesson-uploads/<id>/           cancela y borra el temporal
+    """
+    queryset = LessonUpload.objects.all()
+    serializer_class = LessonUploadSerializer
+    permission_classes = [IsAuthenticated, IsInstructorEnabledOrAdmin]
+
+    def get_queryset(self):
+        p = get_principal(self.request)
+        if p.is_staff:
+            return self.queryset
+        return self.queryset.filter(created_by_id=p.user_id)
+
+    def perform_create(self, serializer):
+        lesson = Lesson.objects.select_related("module__course").get(pk=serializer.validated_data["lesson"].pk)
+        p = get_principal(self.request)
+        if not (p.is_staff or p.owns(lesson.module.course.instructor_id)):
+            raise PermissionDenied("No permitido.")
+        upload = serializer.save(created_by=self.request.user)
+        uploads.start(upload)
+
+    def partial_update(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ValidationError({"Upload-Offset": "Requerido (entero)."})
+
+        # El cuerpo se lee en bloques desde la request: no se usa request.data
+        with transaction.atomic():
+            upload = self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            try:
+                new_offset = uploads.append_chunk(upload, offset, request.stream, length)
+            except uploads.UploadError as exc:
+                return Response({"detail": exc.detail, "offset": upload.offset}, status=exc.status_code)
+
+        response = Response({"offset": new_offset, "size": upload.size})
+        response["Upload-Offset"] = str(new_offset)
+        return response
+
+    @action(detail=True, methods=["post"], url_path="complete")
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            lesson = uploads.complete(upload, request.data.get("sha256"))
+        except uploads.UploadError as exc:
+            return Response({"detail": exc.detail}, status=exc.status_code)
+        return Response(
+            {"lesson": LessonSerializer(lesson, context={"request": request}).data, "sha256": upload.sha256}
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        upload = self.get_object()
+        uploads.discard(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 # =========================
 # Quizzes
@@ -220,14 +343,12 @@ class QuizViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsInstructorEnabledOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if not user.is_staff:
-            ip = get_instructor_profile(user)
-            if ip is None:
-                return qs.none()
-            qs = qs.filter(Q(course__instructor=ip) | Q(module__course__instructor=ip)).distinct()
+        if not p.is_staff and p.instructor_profile_id is None:
+            return qs.none()
+        qs = managed(qs, p, "course_id", "module__course_id")
 
         course_id = self.request.query_params.get("course_id")
         if course_id:
@@ -254,16 +375,12 @@ class QuestionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsInstructorEnabledOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if not user.is_staff:
-            ip = get_instructor_profile(user)
-            if ip is None:
-                return qs.none()
-            qs = qs.filter(
-                Q(quiz__course__instructor=ip) | Q(quiz__module__course__instructor=ip)
-            ).distinct()
+        if not p.is_staff and p.instructor_profile_id is None:
+            return qs.none()
+        qs = managed(qs, p, "quiz__course_id", "quiz__module__course_id")
 
         quiz_id = self.request.query_params.get("quiz_id")
         if quiz_id:
@@ -287,17 +404,12 @@ class ChoiceViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsInstructorEnabledOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if not user.is_staff:
-            ip = get_instructor_profile(user)
-            if ip is None:
-                return qs.none()
-            qs = qs.filter(
-                Q(question__quiz__course__instructor=ip)
-                | Q(question__quiz__module__course__instructor=ip)
-            ).distinct()
+        if not p.is_staff and p.instructor_profile_id is None:
+            return qs.none()
+        qs = managed(qs, p, "question__quiz__course_id", "question__quiz__module__course_id")
 
         question_id = self.request.query_params.get("question_id")
         if question_id:
@@ -331,6 +443,12 @@ class StudentCourseLessonsView(APIView):
     """
     permission_classes = [AllowAny]
 
+    @cache_response(
+        "student_lessons",
+        vary_on=everyone,
+        versions=lambda request, **kwargs: [f"course:{request.query_params.get('course_id')}"],
+        local=True,
+    )
     def get(self, request, *args, **kwargs):
         course_id = request.query_params.get("course_id")
         if not course_id:
@@ -0,0 +1,99 @@
+"""
+Filtros de visibilidad por curso, compartidos por los ViewSets.
+
+Antes cada vista armaba `Q(publicado) | Q(dueño)` sobre los JOIN hacia Course
+y terminaba en .distinct(). Los JOIN son todos hacia adelante (FK), así que el
+DISTINCT no quitaba duplicados, pero obligaba a ordenar o hashear las filas
+completas. El OR entre columnas de tablas distintas tampoco deja usar índices.
+
+Aquí el conjunto de cursos se resuelve aparte, como subquery:
+
+    SELECT id FROM course WHERE estado = 'publicado'
+    UNION ALL
+    SELECT id FROM course WHERE instructor_id = %s
+
+y cada tabla se filtra con `<fk> IN (subquery)`, un semi-join que el planner
+resuelve con los índices de course (estado, instructor_id) y la FK de la
+tabla filtrada. Ver `manage.py bench_visibility` para los planes de antes y
+después.
+"""
+from .models import Course
+
+
+def published_course_ids():
+    return Course.objects.filter(estado=Course.Estado.PUBLICADO).values("id")
+
+
+def owned_course_ids(p):
+    return Course.objects.filter(instructor_id=p.instructor_profile_id).values("id")
+
+
+def readable_course_ids(p):
+    """
+    Subquery con los ids de curso que el principal puede leer, o None si no
+    hay restricción (staff). Igual que CanReadCourse: publicados, y además los
+    propios si es instructor habilitado. Con UNION ALL un curso propio y
+    publicado sale dos veces, lo que no afecta a un IN.
+    """
+    if p.is_authenticated and p.is_staff:
+        return None
+    if p.is_authenticated and p.is_instructor:
+        return published_course_ids().union(owned_course_ids(p), all=True)
+    return published_course_ids()
+
+
+def managed_course_ids(p):
+    """Cursos que el principal administra: None (staff), los propios, o ninguno."""
+    if p.is_staff:
+        return None
+    if p.instructor_profile_id is None:
+        return Course.objects.none().values("id")
+    return owned_course_ids(p)
+
+
+def restrict_to_courses(qs, course_ids, *paths):
+    """
+    Filtra `qs` a las filas cuyo curso está en `course_ids`. `paths` son los
+    caminos hasta el id del curso (p. ej. "course_id" o, para lo que cuelga de
+    course o de module, "quiz__course_id", "quiz__module__course_id").
+    course_ids=None no filtra.
+
+    Con un solo camino es un `<fk> IN (subquery)` directo. Con varios, un OR
+    entre `course_id` y `module.course_id` cruza el LEFT JOIN, evalúa la
+    subquery una vez por rama y vuelve a impedir los índices; en su lugar cada
+    camino aporta sus pk por separado y se filtra una sola vez:
+
+        WHERE id IN (SELECT id FROM quiz WHERE course_id IN (...)
+                     UNION ALL
+                     SELECT quiz.id FROM quiz JOIN module ... WHERE module.course_id IN (...))
+
+    Cada rama usa solo INNER JOIN y el índice de su FK.
+    """
+    if course_ids is None:
+        return qs
+    if len(paths) == 1:
+        return qs.filter(**{f"{paths[0]}__in": course_ids})
+    manager = qs.model._default_manager
+    branches = [manager.filter(**{f"{path}__in": course_ids}).order_by().values("pk") for path in paths]
+    return qs.filter(pk__in=branches[0].union(*branches[1:], all=True))
+
+
+def visible_courses(qs, p):
+    """
+    Cursos visibles para el principal (ver readable_course_ids). Sin cursos
+    propios basta con filtrar la propia tabla por estado.
+    """
+    course_ids = readable_course_ids(p)
+    if course_ids is None:
+        return qs
+    if not (p.is_authenticated and p.is_instructor):
+        return qs.filter(estado=Course.Estado.PUBLICADO)
+    return restrict_to_courses(qs, course_ids, "id")
+
+
+def readable(qs, p, *paths):
+    return restrict_to_courses(qs, readable_course_ids(p), *paths)
+
+
+def managed(qs, p, *paths):
+    return restrict_to_courses(qs, managed_course_ids(p), *paths)
@@ -1,26 +1,53 @@
 from django.contrib import admin
-from .models import Enrollment, LessonProgress, Submission
+
+from learning_platform_backend.admin_tools import LargeTableAdmin
+from .models import Enrollment, LessonProgress, PartitionArchive, QuizResult, Submission
 
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(LargeTableAdmin):
     list_display = ("id", "user", "course", "estado", "progreso", "fecha")
-    list_filter = ("estado", "course")
-    search_fields = ("user__username", "user__email", "course__titulo")
-    ordering = ("-fecha",)
+    list_filter = ("estado",)
+    list_select_related = ("user", "course")
+    autocomplete_fields = ("user", "course")
+    search_id_fields = ("id", "user_id", "course_id")
+    search_exact_fields = ("user__username",)
+    ordering = ("-id",)
 
 
 @admin.register(LessonProgress)
-class LessonProgressAdmin(admin.ModelAdmin):
+class LessonProgressAdmin(LargeTableAdmin):
     list_display = ("id", "enrollment", "lesson", "completado", "completed_at")
     list_filter = ("completado",)
-    search_fields = ("enrollment__user__username", "lesson__titulo", "enrollment__course__titulo")
-    ordering = ("-completed_at", "-id")
+    list_select_related = ("enrollment__user", "enrollment__course", "lesson")
+    autocomplete_fields = ("enrollment", "lesson")
+    search_id_fields = ("id", "enrollment_id", "lesson_id")
+    search_exact_fields = ("enrollment__user__username",)
+    ordering = ("-id",)
 
 
 @admin.register(Submission)
-class SubmissionAdmin(admin.ModelAdmin):
+class SubmissionAdmin(LargeTableAdmin):
     list_display = ("id", "user", "quiz", "attempt", "score", "fecha")
-    list_filter = ("quiz",)
-    search_fields = ("user__username", "quiz__titulo")
-    ordering = ("-fecha", "-attempt")
+    list_select_related = ("user", "quiz")
+    autocomplete_fields = ("user", "quiz")
+    search_id_fields = ("id", "user_id", "quiz_id")
+    search_exact_fields = ("user__username",)
+    ordering = ("-id",)
+
+
+@admin.register(QuizResult)
+class QuizResultAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "quiz", "best_score", "latest_score", "attempts", "last_submitted_at")
+    list_select_related = ("user", "quiz")
+    autocomplete_fields = ("user", "quiz")
+    search_id_fields = ("id", "user_id", "quiz_id")
+    search_exact_fields = ("user__username",)
+    ordering = ("-id",)
+
+
+@admin.register(PartitionArchive)
+class PartitionArchiveAdmin(admin.ModelAdmin):
+    list_display = ("partition", "range_start", "range_end", "rows", "path", "archived_at")
+    list_filter = ("table",)
+    readonly_fields = ("table", "partition", "range_start", "range_end", "path", "rows", "sha256", "archived_at")
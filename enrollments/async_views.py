@@ -0,0 +1,33 @@
+"""
+Variante async (ASGI) de EnrollmentViewSet.my: mismo JSON, orden e
+?include=course, y mismos permisos (IsAuthenticated + IsStudentEnabled). La
+paginación por cursor solo existe en la vista síncrona.
+"""
+from django.views.decorators.http import require_GET
+
+from learning_platform_backend.async_api import AsyncAuthError, aget_principal, error_response, json_response
+from .models import Enrollment
+from .serializers import EnrollmentSerializer, EnrollmentWithCourseSerializer
+
+
+@require_GET
+async def my_enrollments(request):
+    """GET /api/async/enrollments/enrollments/my/"""
+    try:
+        p = await aget_principal(request)
+    except AsyncAuthError as exc:
+        return exc.response()
+
+    if not p.is_authenticated:
+        return error_response("Authentication credentials were not provided.", 401)
+    if not (p.is_staff or p.student_enabled):
+        return error_response("You do not have permission to perform this action.", 403)
+
+    qs = Enrollment.objects.filter(user_id=p.user_id).order_by("-last_activity_at", "-id")
+    serializer_class = EnrollmentSerializer
+    if "course" in request.GET.get("include", "").split(","):
+        qs = qs.select_related("course")
+        serializer_class = EnrollmentWithCourseSerializer
+
+    enrollments = [e async for e in qs]
+    return json_response(serializer_class(enrollments, many=True).data)
@@ -0,0 +1,88 @@
+"""
+Panel del estudiante (GET /api/enrollments/enrollments/dashboard/).
+
+Reúne en una respuesta lo que el frontend pedía curso a curso (matrícula,
+curso, siguiente lección, últimas notas de quiz y si ya valoró el curso). El
+número de queries es fijo, no depende de cuántos cursos tenga el estudiante:
+
+1. Matrículas + curso, con la siguiente lección como subquery anotada.
+2. Siguientes lecciones con su módulo (id IN).
+3. QuizResult del usuario en esos cursos, más recientes primero.
+4. CourseRating del usuario en esos cursos.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+from courses.models import Lesson
+from feedback.models import CourseRating
+from .models import Enrollment, QuizResult
+from .next_lesson import next_lesson_id
+
+RECENT_QUIZZES = 3  # notas de quiz por curso
+
+
+def build_dashboard(user):
+    enrollments = list(
+        Enrollment.objects.filter(user=user)
+        .select_related("course")
+        .annotate(next_lesson_id=next_lesson_id())
+        .order_by("-fecha", "-id")
+    )
+    if not enrollments:
+        return []
+    course_ids = [e.course_id for e in enrollments]
+
+    lesson_ids = [e.next_lesson_id for e in enrollments if e.next_lesson_id is not None]
+    lessons = Lesson.objects.select_related("module").in_bulk(lesson_ids) if lesson_ids else {}
+
+    quizzes = defaultdict(list)
+    results = (
+        QuizResult.objects.filter(user=user)
+        .filter(Q(quiz__course_id__in=course_ids) | Q(quiz__module__course_id__in=course_ids))
+        .annotate(course_id=Coalesce("quiz__course_id", "quiz__module__course_id"))
+        .select_related("quiz")
+        .order_by("-last_submitted_at", "-id")
+    )
+    for result in results:
+        if len(quizzes[result.course_id]) < RECENT_QUIZZES:
+            quizzes[result.course_id].append(
+                {
+                    "quiz": result.quiz_id,
+                    "titulo": result.quiz.titulo,
+                    "latest_score": result.latest_score,
+                    "best_score": result.best_score,
+                    "attempts": result.attempts,
+                    "last_submitted_at": result.last_submitted_at,
+                }
+            )
+
+    ratings = dict(
+        CourseRating.objects.filter(user=user, course_id__in=course_ids).values_list("course_id", "rating")
+    )
+
+    data = []
+    for enrollment in enrollments:
+        course = enrollment.course
+        lesson = lessons.get(enrollment.next_lesson_id)
+        data.append(
+            {
+                "enrollment": enrollment.id,
+                "estado": enrollment.estado,
+                "fecha": enrollment.fecha,
+                "progreso": enrollment.progreso,
+                "course": {"id": course.id, "titulo": course.titulo, "imagen": course.imagen},
+                "next_lesson": None
+                if lesson is None
+                else {
+                    "id": lesson.id,
+                    "titulo": lesson.titulo,
+                    "tipo": lesson.tipo,
+                    "module": {"id": lesson.module_id, "titulo": lesson.module.titulo},
+                },
+                "recent_quizzes": quizzes.get(course.id, []),
+                "rating": {"rated": course.id in ratings, "value": ratings.get(course.id)},
+            }
+        )
+    return data
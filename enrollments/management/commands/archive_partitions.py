@@ -0,0 +1,49 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollments.partitions import (
+    PartitioningError,
+    add_months,
+    archive_submission_partition,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta a NDJSON comprimido las particiones mensuales de Submission más "
+        "antiguas que --older-than-months y las elimina de la BD. Los resúmenes "
+        "(QuizResult) se conservan vía ArchivedSubmissionStats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-months", type=int, default=12, help="Meses completos que se mantienen en la BD")
+        parser.add_argument("--dir", help="Directorio de destino (por defecto SUBMISSION_ARCHIVE_DIR)")
+        parser.add_argument("--dry-run", action="store_true", help="Exportar sin eliminar la partición")
+
+    def handle(self, *args, **options):
+        if options["older_than_months"] < 1:
+            raise CommandError("--older-than-months debe ser al menos 1.")
+        directory = options["dir"] or getattr(settings, "SUBMISSION_ARCHIVE_DIR", "archive")
+        cutoff = add_months(month_start(datetime.now(dt_timezone.utc)), -options["older_than_months"])
+
+        try:
+            if not is_partitioned("submission"):
+                raise CommandError("Submission no está particionada (ver manage_partitions --convert).")
+
+            archived = 0
+            for partition, start, _estimate in list_partitions("submission"):
+                if start is None or add_months(start, 1) > cutoff:
+                    continue
+                archive = archive_submission_partition(partition, start, directory, dry_run=options["dry_run"])
+                verb = "exportada (dry-run)" if options["dry_run"] else "archivada"
+                self.stdout.write(f"{partition}: {archive.rows} filas {verb} en {archive.path} (sha256 {archive.sha256[:12]}).")
+                archived += 1
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"Particiones procesadas: {archived}."))
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollments.partitions import (
+    PARTITIONED,
+    PartitioningError,
+    add_months,
+    convert_to_partitioned,
+    enabled_tables,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene las particiones mensuales de Submission (Postgres, "
+        "DB_PARTITIONED_TABLES). Pensado para un cron diario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--table", choices=sorted(PARTITIONED), action="append", help="Por defecto las de DB_PARTITIONED_TABLES")
+        parser.add_argument("--ahead", type=int, help="Meses futuros a crear (por defecto DB_PARTITION_MONTHS_AHEAD)")
+        parser.add_argument("--convert", action="store_true", help="Convertir a particionada si todavía no lo está")
+        parser.add_argument("--list", action="store_true", help="Solo listar particiones y filas estimadas")
+
+    def handle(self, *args, **options):
+        tables = options["table"] or enabled_tables()
+        if not tables:
+            raise CommandError("No hay tablas: usar --table o DB_PARTITIONED_TABLES.")
+        ahead = options["ahead"] if options["ahead"] is not None else getattr(settings, "DB_PARTITION_MONTHS_AHEAD", 3)
+        until = add_months(month_start(datetime.now(dt_timezone.utc)), ahead)
+
+        try:
+            for name in tables:
+                if options["convert"] and not options["list"]:
+                    if convert_to_partitioned(name, months_ahead=ahead):
+                        self.stdout.write(self.style.SUCCESS(f"{name}: convertida a tabla particionada."))
+                if not is_partitioned(name):
+                    self.stderr.write(f"{name}: no está particionada (usar --convert).")
+                    continue
+
+                if not options["list"]:
+                    # Desde el mes en curso: los meses pasados que falten ya no reciben filas nuevas
+                    created = ensure_partitions(name, month_start(datetime.now(dt_timezone.utc)), until)
+                    self.stdout.write(f"{name}: particiones creadas: {', '.join(created) or 'ninguna'}.")
+
+                for partition, start, estimate in list_partitions(name):
+                    label = start.strftime("%Y-%m") if start else "DEFAULT"
+                    self.stdout.write(f"  {partition:<48}{label:>9}{estimate:>12}")
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from enrollments.models import ArchivedSubmissionStats, QuizResult, Submission
+from enrollments.quiz_results import rebuild_quiz_results
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla resumen QuizResult (mejor/último intento por usuario y quiz) desde Submission"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quiz", type=int, help="Solo este quiz_id")
+        parser.add_argument("--user", type=int, help="Solo este user_id")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Filas por lote de inserción (por defecto 1000)",
+        )
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options["quiz"]:
+            filters["quiz_id"] = options["quiz"]
+        if options["user"]:
+            filters["user_id"] = options["user"]
+
+        total = rebuild_quiz_results(
+            Submission,
+            QuizResult,
+            batch_size=options["batch_size"],
+            archive_model=ArchivedSubmissionStats,
+            **filters,
+        )
+        self.stdout.write(self.style.SUCCESS(f"QuizResult reconstruido: {total} filas."))
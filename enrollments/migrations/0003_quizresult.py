@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-19 13:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def build_initial_results(apps, schema_editor):
+    # Copia congelada de enrollments.quiz_results.rebuild_quiz_results: la
+    # migración no debe depender de cómo evolucione ese módulo.
+    Submission = apps.get_model("enrollments", "Submission")
+    QuizResult = apps.get_model("enrollments", "QuizResult")
+    db = schema_editor.connection.alias
+
+    latest_score = (
+        Submission.objects.using(db)
+        .filter(user_id=OuterRef("user_id"), quiz_id=OuterRef("quiz_id"))
+        .order_by("-attempt")
+        .values("score")[:1]
+    )
+    rows = (
+        Submission.objects.using(db)
+        .order_by()
+        .values("user_id", "quiz_id")
+        .annotate(best=Max("score"), n=Count("id"), last=Max("fecha"), latest=Subquery(latest_score))
+    )
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(
+            QuizResult(
+                user_id=row["user_id"],
+                quiz_id=row["quiz_id"],
+                best_score=row["best"],
+                latest_score=row["latest"],
+                attempts=row["n"],
+                last_submitted_at=row["last"],
+            )
+        )
+        if len(batch) >= 1000:
+            QuizResult.objects.using(db).bulk_create(batch)
+            batch = []
+    if batch:
+        QuizResult.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_initial'),
+        ('enrollments', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.FloatField(default=0)),
+                ('latest_score', models.FloatField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='courses.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_results', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'quiz'), name='unique_quiz_result_user_quiz')],
+            },
+        ),
+        migrations.RunPython(build_initial_results, migrations.RunPython.noop),
+    ]
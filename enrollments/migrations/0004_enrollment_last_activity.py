@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-19 13:40
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_last_activity(apps, schema_editor):
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    LessonProgress = apps.get_model("enrollments", "LessonProgress")
+    QuizResult = apps.get_model("enrollments", "QuizResult")
+
+    last_lesson = (
+        LessonProgress.objects.filter(enrollment_id=OuterRef("pk"))
+        .order_by()
+        .values("enrollment_id")
+        .annotate(m=Max("completed_at"))
+        .values("m")
+    )
+    last_quiz = (
+        QuizResult.objects.filter(user_id=OuterRef("user_id"))
+        .filter(Q(quiz__course_id=OuterRef("course_id")) | Q(quiz__module__course_id=OuterRef("course_id")))
+        .order_by()
+        .values("user_id")
+        .annotate(m=Max("last_submitted_at"))
+        .values("m")
+    )
+    Enrollment.objects.update(
+        last_activity_at=Greatest(
+            F("fecha"),
+            Coalesce(Subquery(last_lesson), F("fecha")),
+            Coalesce(Subquery(last_quiz), F("fecha")),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_fileblob_alter_lesson_archivo'),
+        ('enrollments', '0003_quizresult'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-last_activity_at', '-id'], name='enrollment_user_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-19 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_estado_idx'),
+        ('enrollments', '0004_enrollment_last_activity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartitionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100)),
+                ('partition', models.CharField(max_length=100, unique=True)),
+                ('range_start', models.DateTimeField()),
+                ('range_end', models.DateTimeField()),
+                ('path', models.CharField(max_length=500)),
+                ('rows', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['table', 'range_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubmissionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempt', models.PositiveIntegerField(default=0)),
+                ('best_score', models.FloatField(default=0)),
+                ('latest_score', models.FloatField(default=0)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'quiz'), name='unique_archived_stats_user_quiz')],
+            },
+        ),
+    ]
@@ -13,11 +13,23 @@ class Enrollment(models.Model):
     fecha = models.DateTimeField(auto_now_add=True)
     estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.ACTIVO)
     progreso = models.FloatField(default=0)  # 0..100
+    # Última lección completada o quiz enviado; la mantienen los jobs de enrollments.tasks
+    last_activity_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "course"], name="unique_enrollment_user_course")
         ]
+        indexes = [
+            # EnrollmentViewSet.my: WHERE user_id = ? ORDER BY last_activity_at DESC, id DESC
+            models.Index(fields=["user", "-last_activity_at", "-id"], name="enrollment_user_activity_idx"),
+        ]
+
+    @classmethod
+    def touch(cls, when, **filters):
+        """Adelanta last_activity_at a `when` (nunca lo atrasa)."""
+        if when is not None:
+            cls.objects.filter(last_activity_at__lt=when, **filters).update(last_activity_at=when)
 
     def __str__(self):
         return f"{self.user.username} - {self.course.titulo}"
@@ -60,3 +72,92 @@ class Submission(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.titulo} (attempt {self.attempt})"
+
+
+class QuizResult(models.Model):
+    """
+    Resumen por (user, quiz) mantenido en SubmissionViewSet.submit (misma
+    transacción que el Submission). Las vistas de lectura usan esta tabla en
+    lugar de recorrer todos los intentos. Reconstruible con
+    `manage.py rebuild_quiz_results`.
+    """
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="quiz_results")
+    quiz = models.ForeignKey("courses.Quiz", on_delete=models.CASCADE, related_name="results")
+
+    best_score = models.FloatField(default=0)  # 0..100
+    latest_score = models.FloatField(default=0)  # 0..100
+    attempts = models.PositiveIntegerField(default=0)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "quiz"], name="unique_quiz_result_user_quiz")
+        ]
+
+    @classmethod
+    def lock(cls, user_id, quiz_id):
+        """
+        Bloquea (creándola vacía si falta) la fila del resumen. Debe llamarse
+        dentro de transaction.atomic(). submit la toma antes de numerar el
+        intento: con Submission particionada la BD ya no impone
+        (user, quiz, attempt) único, así que esta fila serializa los intentos
+        concurrentes del mismo usuario sobre el mismo quiz.
+        """
+        result, _ = cls.objects.select_for_update().get_or_create(user_id=user_id, quiz_id=quiz_id)
+        return result
+
+    def add(self, submission):
+        """Incorpora un intento nuevo a una fila ya bloqueada con lock()."""
+        self.best_score = max(self.best_score, submission.score)
+        self.latest_score = submission.score
+        self.attempts += 1
+        self.last_submitted_at = submission.fecha
+        self.save(update_fields=["best_score", "latest_score", "attempts", "last_submitted_at"])
+        return self
+
+    @classmethod
+    def record(cls, submission):
+        """Atajo de lock() + add(); debe llamarse dentro de transaction.atomic()."""
+        return cls.lock(submission.user_id, submission.quiz_id).add(submission)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.titulo} (best {self.best_score})"
+
+
+class ArchivedSubmissionStats(models.Model):
+    """
+    Agregado por (user, quiz) de los Submission que ya se archivaron (ver
+    enrollments.partitions). rebuild_quiz_results lo suma a lo que queda en la
+    tabla, así el gradebook y la numeración de intentos no pierden historia.
+    """
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="+")
+    quiz = models.ForeignKey("courses.Quiz", on_delete=models.CASCADE, related_name="+")
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempt = models.PositiveIntegerField(default=0)
+    best_score = models.FloatField(default=0)
+    latest_score = models.FloatField(default=0)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "quiz"], name="unique_archived_stats_user_quiz")
+        ]
+
+
+class PartitionArchive(models.Model):
+    """Partición mensual exportada a NDJSON comprimido y eliminada de la BD."""
+    table = models.CharField(max_length=100)
+    partition = models.CharField(max_length=100, unique=True)
+    range_start = models.DateTimeField()
+    range_end = models.DateTimeField()
+    path = models.CharField(max_length=500)
+    rows = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["table", "range_start"]
+
+    def __str__(self):
+        return f"{self.partition} ({self.rows} filas)"
@@ -0,0 +1,40 @@
+"""
+Resolución de la "siguiente lección" de una matrícula (continuar aprendiendo).
+
+Es la primera lección del curso, en orden de módulo y de lección, sin un
+LessonProgress completado para la matrícula. Se resuelve con una sola query:
+un anti-join (NOT EXISTS) contra LessonProgress, que usa el índice único
+(enrollment, lesson), ordenado por los índices únicos (course, orden) de
+Module y (module, orden) de Lesson.
+"""
+from django.db.models import Exists, OuterRef, Subquery
+
+from courses.models import Lesson
+from .models import LessonProgress
+
+
+def pending_lessons(enrollment_id, course_id):
+    """Lecciones sin completar, en orden. Acepta valores u OuterRef."""
+    completed = LessonProgress.objects.filter(
+        enrollment_id=enrollment_id,
+        lesson_id=OuterRef("pk"),
+        completado=True,
+    )
+    return (
+        Lesson.objects.filter(module__course_id=course_id)
+        .filter(~Exists(completed))
+        .order_by("module__orden", "orden", "id")
+    )
+
+
+def next_lesson(enrollment):
+    """Devuelve la siguiente Lesson (con su módulo) o None si el curso está completo."""
+    return pending_lessons(enrollment.id, enrollment.course_id).select_related("module").first()
+
+
+def next_lesson_id():
+    """
+    Subquery para anotar un queryset de Enrollment con el id de su siguiente
+    lección, así se resuelve para muchas matrículas en la misma query.
+    """
+    return Subquery(pending_lessons(OuterRef(OuterRef("pk")), OuterRef("course_id")).values("id")[:1])
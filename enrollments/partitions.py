@@ -0,0 +1,303 @@
+"""
+Particionado por rango (mensual) de Submission en Postgres, por `fecha`.
+
+Es opcional: solo se aplica si "submission" está en DB_PARTITIONED_TABLES, solo
+en Postgres y solo con `manage.py manage_partitions --convert` (ninguna
+migración lo hace). Los modelos de Django no cambian; la conversión reemplaza
+la tabla por una tabla particionada con las mismas columnas.
+
+La PK pasa a (id, fecha), porque Postgres exige la clave de partición en las
+restricciones únicas, y por lo mismo (user, quiz, attempt) deja de ser único
+en la BD. La numeración la sostiene submit, que bloquea la fila de QuizResult
+del (user, quiz) antes de calcular el intento (ver QuizResult.lock).
+
+Cada mes es una partición <tabla>_pYYYY_MM; `manage_partitions` crea las de
+los próximos meses y `archive_partitions` exporta los meses fríos a NDJSON
+comprimido y los elimina. Antes de borrar, los intentos se acumulan en
+ArchivedSubmissionStats, que rebuild_quiz_results suma a lo que queda: el
+gradebook (QuizResult) y la numeración de intentos no cambian.
+
+LessonProgress no se particiona: complete, next_lesson, recompute_progress y
+el dashboard la buscan por (enrollment, lesson), nunca por fecha, así que
+ninguna partición se descartaría y cada complete movería la fila fuera de la
+DEFAULT.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+
+from .models import ArchivedSubmissionStats, PartitionArchive, Submission
+
+# nombre en DB_PARTITIONED_TABLES -> (modelo, columna de partición, PK de la tabla padre)
+PARTITIONED = {
+    "submission": (Submission, "fecha", ("id", "fecha")),
+}
+
+# Índices de la tabla padre (se propagan a cada partición)
+INDEXES = {
+    "submission": [("user_id", "quiz_id", "attempt"), ("quiz_id",)],
+}
+
+PARTITION_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def enabled_tables():
+    return [name for name in getattr(settings, "DB_PARTITIONED_TABLES", []) if name]
+
+
+def _check(name, conn=None):
+    conn = conn or connection
+    if conn.vendor != "postgresql":
+        raise PartitioningError("El particionado solo está soportado en Postgres.")
+    if name not in PARTITIONED:
+        raise PartitioningError(f"Tabla no particionable: {name} (opciones: {', '.join(PARTITIONED)}).")
+    return PARTITIONED[name]
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, start):
+    return f"{table}_p{start.year:04d}_{start.month:02d}"
+
+
+def is_partitioned(name, conn=None):
+    conn = conn or connection
+    model, _column, _pk = _check(name, conn)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [model._meta.db_table])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(name, conn=None):
+    """[(partición, inicio o None si es DEFAULT, filas estimadas)] ordenadas por fecha."""
+    conn = conn or connection
+    model, _column, _pk = _check(name, conn)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [model._meta.db_table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for relname, estimate in rows:
+        match = PARTITION_RE.search(relname)
+        start = datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc) if match else None
+        partitions.append((relname, start, max(estimate, 0)))
+    return sorted(partitions, key=lambda p: (p[1] is None, p[1].isoformat() if p[1] else ""))
+
+
+def ensure_partitions(name, start, end, conn=None):
+    """
+    Crea las particiones mensuales que falten entre `start` y `end` (incluido
+    el mes de `end`). Si la DEFAULT ya tiene filas de ese mes, se mueven a la
+    partición nueva antes de adjuntarla. Devuelve las particiones creadas.
+    """
+    conn = conn or connection
+    model, column, _pk = _check(name, conn)
+    table = model._meta.db_table
+    existing = {p[0] for p in list_partitions(name, conn)}
+    qn = conn.ops.quote_name
+    created = []
+
+    month = month_start(start)
+    while month <= end:
+        upper = add_months(month, 1)
+        partition = partition_name(table, month)
+        if partition not in existing:
+            with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT EXISTS (SELECT 1 FROM {qn(table + '_default')} WHERE {qn(column)} >= %s AND {qn(column)} < %s)",
+                    [month, upper],
+                )
+                if cursor.fetchone()[0]:
+                    cursor.execute(f"CREATE TABLE {qn(partition)} (LIKE {qn(table)} INCLUDING DEFAULTS)")
+                    cursor.execute(
+                        f"WITH moved AS (DELETE FROM {qn(table + '_default')} "
+                        f"WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) "
+                        f"INSERT INTO {qn(partition)} SELECT * FROM moved",
+                        [month, upper],
+                    )
+                    cursor.execute(
+                        f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(partition)} FOR VALUES FROM (%s) TO (%s)",
+                        [month, upper],
+                    )
+                else:
+                    cursor.execute(
+                        f"CREATE TABLE {qn(partition)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+                        [month, upper],
+                    )
+            created.append(partition)
+        month = upper
+    return created
+
+
+def convert_to_partitioned(name, months_ahead=3, conn=None):
+    """
+    Reemplaza la tabla por una particionada con las mismas columnas y copia
+    las filas. Pensado para correr en una ventana de mantenimiento (la tabla
+    queda bloqueada durante la copia). No hace nada si ya está particionada.
+    """
+    conn = conn or connection
+    model, column, pk = _check(name, conn)
+    if is_partitioned(name, conn):
+        return False
+
+    table = model._meta.db_table
+    legacy = f"{table}_unpartitioned"
+    qn = conn.ops.quote_name
+
+    now = datetime.now(dt_timezone.utc)
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+            # Sin INCLUDING IDENTITY: el id pasa a una secuencia propia (más abajo)
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE ({qn(column)})"
+            )
+            if pk:
+                cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({', '.join(qn(c) for c in pk)})")
+            for i, columns in enumerate(INDEXES[name]):
+                cursor.execute(
+                    f"CREATE INDEX {qn(f'{table}_part_{i}_idx')} ON {qn(table)} ({', '.join(qn(c) for c in columns)})"
+                )
+            for field in model._meta.concrete_fields:
+                if field.is_relation:
+                    cursor.execute(
+                        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_{field.column}_part_fk')} "
+                        f"FOREIGN KEY ({qn(field.column)}) "
+                        f"REFERENCES {qn(field.related_model._meta.db_table)} ({qn(field.target_field.column)}) "
+                        f"DEFERRABLE INITIALLY DEFERRED"
+                    )
+            cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+            cursor.execute(f"SELECT min({qn(column)}), max(id) FROM {qn(legacy)}")
+            oldest, max_id = cursor.fetchone()
+
+        ensure_partitions(name, oldest or now, add_months(month_start(now), months_ahead), conn)
+
+        with conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+            cursor.execute(f"DROP TABLE {qn(legacy)}")
+            sequence = f"{table}_id_seq"
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {qn(sequence)} OWNED BY {qn(table)}.id")
+            cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s)", [sequence])
+            cursor.execute("SELECT setval(%s, %s, false)", [sequence, (max_id or 0) + 1])
+    return True
+
+
+def archive_path(directory, partition):
+    return os.path.join(directory, f"{partition}.ndjson.gz")
+
+
+def export_submissions(start, end, path):
+    """
+    Escribe los Submission de [start, end) en NDJSON comprimido (a un temporal
+    y luego rename). Devuelve (filas, sha256 del archivo).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    rows = 0
+    qs = Submission.objects.filter(fecha__gte=start, fecha__lt=end).order_by("id").values(
+        "id", "user_id", "quiz_id", "attempt", "score", "answers", "fecha"
+    )
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        for row in qs.iterator(chunk_size=2000):
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            fh.write("\n")
+            rows += 1
+    os.replace(tmp, path)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(64 * 1024), b""):
+            digest.update(block)
+    return rows, digest.hexdigest()
+
+
+def accumulate_archived_stats(start, end):
+    """
+    Suma los intentos de [start, end) a ArchivedSubmissionStats. Debe correr en
+    la misma transacción que elimina esas filas.
+    """
+    window = Submission.objects.filter(fecha__gte=start, fecha__lt=end)
+    latest = window.filter(user_id=OuterRef("user_id"), quiz_id=OuterRef("quiz_id")).order_by("-attempt")
+    groups = (
+        window.order_by()
+        .values("user_id", "quiz_id")
+        .annotate(
+            n=Count("id"),
+            best=Max("score"),
+            top=Max("attempt"),
+            last=Max("fecha"),
+            latest=Subquery(latest.values("score")[:1]),
+        )
+    )
+    for row in groups.iterator():
+        stats, _ = ArchivedSubmissionStats.objects.select_for_update().get_or_create(
+            user_id=row["user_id"], quiz_id=row["quiz_id"]
+        )
+        stats.attempts += row["n"]
+        stats.best_score = max(stats.best_score, row["best"])
+        stats.max_attempt = max(stats.max_attempt, row["top"])
+        if stats.last_submitted_at is None or row["last"] > stats.last_submitted_at:
+            stats.latest_score = row["latest"]
+            stats.last_submitted_at = row["last"]
+        stats.save()
+
+
+def archive_submission_partition(partition, start, directory, dry_run=False, conn=None):
+    """
+    Exporta la partición mensual de Submission que empieza en `start`, acumula
+    sus intentos en ArchivedSubmissionStats y la elimina. Devuelve el
+    PartitionArchive (sin guardar si dry_run).
+    """
+    conn = conn or connection
+    model, _column, _pk = _check("submission", conn)
+    table = model._meta.db_table
+    end = add_months(start, 1)
+    path = archive_path(directory, partition)
+
+    rows, sha256 = export_submissions(start, end, path)
+    archive = PartitionArchive(
+        table=table, partition=partition, range_start=start, range_end=end, path=path, rows=rows, sha256=sha256
+    )
+    if dry_run:
+        return archive
+
+    qn = conn.ops.quote_name
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(partition)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"SELECT count(*) FROM {qn(partition)}")
+            if cursor.fetchone()[0] != rows:
+                raise PartitioningError(f"{partition} cambió durante la exportación; reintentar.")
+        accumulate_archived_stats(start, end)
+        with conn.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(partition)}")
+            cursor.execute(f"DROP TABLE {qn(partition)}")
+        archive.save()
+    return archive
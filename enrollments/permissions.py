@@ -1,26 +1,24 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-
-def _ip(user):
-    return getattr(user, "instructor_profile", None)
+from users.principal import get_principal
 
 
 class IsStudentEnabled(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and (u.is_staff or getattr(u, "student_enabled", False)))
+        p = get_principal(request)
+        return bool(p.is_authenticated and (p.is_staff or p.student_enabled))
 
 
 class IsInstructorEnabled(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and (u.is_staff or getattr(u, "instructor_enabled", False)))
+        p = get_principal(request)
+        return bool(p.is_authenticated and (p.is_staff or p.instructor_enabled))
 
 
 class IsStaff(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and u.is_staff)
+        p = get_principal(request)
+        return bool(p.is_authenticated and p.is_staff)
 
 
 class CanReadEnrollments(BasePermission):
@@ -31,60 +29,57 @@ class CanReadEnrollments(BasePermission):
       - Instructor enabled: enrollments de cursos donde es dueño
     """
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and request.method in SAFE_METHODS)
+        p = get_principal(request)
+        return bool(p.is_authenticated and request.method in SAFE_METHODS)
 
     def has_object_permission(self, request, view, obj):
-        u = request.user
-        if u.is_staff:
+        p = get_principal(request)
+        if p.is_staff:
             return True
 
-        if obj.user_id == u.id:
-            return bool(getattr(u, "student_enabled", False))
+        if obj.user_id == p.user_id:
+            return p.student_enabled
 
-        ip = _ip(u)
-        if getattr(u, "instructor_enabled", False) and ip:
-            return obj.course.instructor_id == ip.id
+        if p.is_instructor:
+            return p.owns(obj.course.instructor_id)
 
         return False
 
 
 class CanReadLessonProgress(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and request.method in SAFE_METHODS)
+        p = get_principal(request)
+        return bool(p.is_authenticated and request.method in SAFE_METHODS)
 
     def has_object_permission(self, request, view, obj):
-        u = request.user
-        if u.is_staff:
+        p = get_principal(request)
+        if p.is_staff:
             return True
 
-        if obj.enrollment.user_id == u.id:
-            return bool(getattr(u, "student_enabled", False))
+        if obj.enrollment.user_id == p.user_id:
+            return p.student_enabled
 
-        ip = _ip(u)
-        if getattr(u, "instructor_enabled", False) and ip:
-            return obj.enrollment.course.instructor_id == ip.id
+        if p.is_instructor:
+            return p.owns(obj.enrollment.course.instructor_id)
 
         return False
 
 
 class CanReadSubmissions(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and request.method in SAFE_METHODS)
+        p = get_principal(request)
+        return bool(p.is_authenticated and request.method in SAFE_METHODS)
 
     def has_object_permission(self, request, view, obj):
-        u = request.user
-        if u.is_staff:
+        p = get_principal(request)
+        if p.is_staff:
             return True
 
-        if obj.user_id == u.id:
-            return bool(getattr(u, "student_enabled", False))
+        if obj.user_id == p.user_id:
+            return p.student_enabled
 
-        ip = _ip(u)
-        if getattr(u, "instructor_enabled", False) and ip:
+        if p.is_instructor:
             course = obj.quiz.course or (obj.quiz.module.course if obj.quiz.module_id else None)
-            return bool(course and course.instructor_id == ip.id)
+            return bool(course and p.owns(course.instructor_id))
 
         return False
@@ -0,0 +1,81 @@
+"""
+Reconstrucción de QuizResult a partir de los intentos (Submission).
+
+Recibe los modelos como parámetros (también sirve con modelos históricos en
+un RunPython puntual; las migraciones del repo llevan su propia copia). Si se pasa `archive_model` (ArchivedSubmissionStats),
+los intentos ya archivados se suman a los que quedan en Submission.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def rebuild_quiz_results(submission_model, result_model, batch_size=1000, archive_model=None, **filters):
+    """
+    Recalcula los resúmenes (opcionalmente filtrados por user_id/quiz_id) con
+    un único GROUP BY (user, quiz) y los reescribe en lotes. Devuelve cuántos
+    resúmenes quedaron.
+    """
+    archived = {}
+    if archive_model is not None:
+        archived = {(a.user_id, a.quiz_id): a for a in archive_model.objects.filter(**filters)}
+
+    latest_score = (
+        submission_model.objects.filter(user_id=OuterRef("user_id"), quiz_id=OuterRef("quiz_id"))
+        .order_by("-attempt")
+        .values("score")[:1]
+    )
+    rows = (
+        submission_model.objects.filter(**filters)
+        .order_by()
+        .values("user_id", "quiz_id")
+        .annotate(
+            best=Max("score"),
+            n=Count("id"),
+            last=Max("fecha"),
+            latest=Subquery(latest_score),
+        )
+    )
+
+    total = 0
+    with transaction.atomic():
+        result_model.objects.filter(**filters).delete()
+
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            best, attempts = row["best"], row["n"]
+            old = archived.pop((row["user_id"], row["quiz_id"]), None)
+            if old is not None:
+                # Lo archivado es siempre anterior: solo suma intentos y mejor nota
+                best, attempts = max(best, old.best_score), attempts + old.attempts
+            batch.append(
+                result_model(
+                    user_id=row["user_id"],
+                    quiz_id=row["quiz_id"],
+                    best_score=best,
+                    latest_score=row["latest"],
+                    attempts=attempts,
+                    last_submitted_at=row["last"],
+                )
+            )
+            if len(batch) >= batch_size:
+                result_model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+
+        # Pares sin intentos vivos: el resumen sale entero de lo archivado
+        for old in archived.values():
+            batch.append(
+                result_model(
+                    user_id=old.user_id,
+                    quiz_id=old.quiz_id,
+                    best_score=old.best_score,
+                    latest_score=old.latest_score,
+                    attempts=old.attempts,
+                    last_submitted_at=old.last_submitted_at,
+                )
+            )
+        if batch:
+            result_model.objects.bulk_create(batch)
+            total += len(batch)
+
+    return total
@@ -1,12 +1,20 @@
 from rest_framework import serializers
-from .models import Enrollment, LessonProgress, Submission
+
+from courses.serializers import CourseListSerializer
+from .models import Enrollment, LessonProgress, QuizResult, Submission
 
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
-        fields = ("id", "user", "course", "fecha", "estado", "progreso")
-        read_only_fields = ("id", "user", "fecha", "progreso")
+        fields = ("id", "user", "course", "fecha", "estado", "progreso", "last_activity_at")
+        read_only_fields = ("id", "user", "fecha", "progreso", "last_activity_at")
+
+
+class EnrollmentWithCourseSerializer(EnrollmentSerializer):
+    """my/?include=course: el resumen del curso sale de la fila ya unida (select_related)."""
+
+    course = CourseListSerializer(read_only=True)
 
 
 class LessonProgressSerializer(serializers.ModelSerializer):
@@ -21,3 +29,33 @@ class SubmissionSerializer(serializers.ModelSerializer):
         model = Submission
         fields = ("id", "user", "quiz", "attempt", "score", "answers", "fecha")
         read_only_fields = ("id", "user", "attempt", "score", "fecha")
+
+
+class QuizResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizResult
+        fields = ("id", "user", "quiz", "best_score", "latest_score", "attempts", "last_submitted_at")
+        read_only_fields = fields
+
+
+class NextLessonSerializer(serializers.Serializer):
+    """Respuesta de GET /api/enrollments/enrollments/<id>/next-lesson/."""
+
+    def to_representation(self, instance):
+        enrollment, lesson = instance
+        data = {
+            "enrollment": enrollment.id,
+            "course": enrollment.course_id,
+            "progreso": enrollment.progreso,
+            "completed": lesson is None,
+            "lesson": None,
+        }
+        if lesson is not None:
+            data["lesson"] = {
+                "id": lesson.id,
+                "titulo": lesson.titulo,
+                "tipo": lesson.tipo,
+                "orden": lesson.orden,
+                "module": {"id": lesson.module_id, "titulo": lesson.module.titulo, "orden": lesson.module.orden},
+            }
+        return data
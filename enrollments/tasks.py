@@ -0,0 +1,37 @@
+"""
+Jobs en segundo plano de enrollments (ver jobs.queue). Son idempotentes:
+recalculan desde las filas de origen, así que un reintento no duplica nada.
+"""
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from courses.models import Lesson
+from jobs.queue import job
+from .models import Enrollment, LessonProgress
+
+
+@job("enrollments.recompute_progress")
+def recompute_progress(enrollment_id):
+    try:
+        enrollment = Enrollment.objects.get(pk=enrollment_id)
+    except Enrollment.DoesNotExist:
+        return
+
+    total_lessons = Lesson.objects.filter(module__course_id=enrollment.course_id).count()
+    completed = LessonProgress.objects.filter(
+        enrollment=enrollment,
+        completado=True,
+        lesson__module__course_id=enrollment.course_id,
+    ).count()
+
+    enrollment.progreso = 0 if total_lessons == 0 else round((completed / total_lessons) * 100, 2)
+    enrollment.save(update_fields=["progreso"])
+
+    last_completed = LessonProgress.objects.filter(enrollment=enrollment).aggregate(m=Max("completed_at"))["m"]
+    Enrollment.touch(last_completed, pk=enrollment.pk)
+
+
+@job("enrollments.touch_activity")
+def touch_activity(user_id, course_id, when):
+    Enrollment.touch(parse_datetime(when), user_id=user_id, course_id=course_id)
+
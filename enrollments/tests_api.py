@@ -0,0 +1,497 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from courses.models import Module, Lesson, Quiz, Question, Choice
+from feedback.models import CourseRating
+from jobs.worker import Worker
+from learning_platform_backend.testing import APITestHelpersMixin
+from learning_platform_backend.throttling import SlidingWindowRateThrottle
+from jobs.models import Job
+from .models import Enrollment, LessonProgress, QuizResult, Submission
+from . import partitions
+from .dashboard import build_dashboard
+from .next_lesson import next_lesson
+
+User = get_user_model()
+
+
+class EnrollmentsAPITestMixin(APITestHelpersMixin):
+    def setUp(self):
+        cache.clear()
+        self.instructor = self.make_user("inst", role="instructor")
+        self.course = self.make_course(self.instructor)
+        self.module = Module.objects.create(course=self.course, titulo="M1", orden=1)
+        self.lessons = [
+            Lesson.objects.create(module=self.module, titulo=f"L{i}", tipo="texto", contenido="x", orden=i)
+            for i in range(1, 4)
+        ]
+        self.quiz = Quiz.objects.create(course=self.course, titulo="Quiz 1")
+        question = Question.objects.create(quiz=self.quiz, texto="¿2+2?", orden=1)
+        self.right = Choice.objects.create(question=question, texto="4", correcta=True)
+        self.wrong = Choice.objects.create(question=question, texto="5", correcta=False)
+        self.question = question
+
+    def enroll(self, user, course=None):
+        return Enrollment.objects.create(user=user, course=course or self.course)
+
+    def run_jobs(self):
+        return Worker(batch_size=10).run(burst=True)
+
+
+class ExportTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = [self.make_user(f"s{i}") for i in range(3)]
+        for s in self.students:
+            enrollment = self.enroll(s)
+            LessonProgress.objects.create(enrollment=enrollment, lesson=self.lessons[0], completado=True)
+            Submission.objects.create(user=s, quiz=self.quiz, attempt=1, score=50)
+
+        other = self.make_user("other_inst", role="instructor")
+        other_course = self.make_course(other, titulo="Ajeno")
+        self.enroll(self.students[0], other_course)
+
+    def read_stream(self, res):
+        return b"".join(res.streaming_content).decode()
+
+    def test_enrollments_csv_only_own_courses(self):
+        self.auth_as("inst")
+        res = self.client.get("/api/enrollments/enrollments/export/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        rows = list(csv.reader(io.StringIO(self.read_stream(res))))
+        self.assertEqual(rows[0][:3], ["id", "user_id", "user_username"])
+        self.assertEqual(len(rows), 1 + 3)
+        self.assertTrue(all(r[4] == "Curso" for r in rows[1:]))
+
+    def test_submissions_ndjson(self):
+        self.auth_as("inst")
+        res = self.client.get(f"/api/enrollments/submissions/export/?output=ndjson&course_id={self.course.id}")
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(l) for l in self.read_stream(res).splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0]["quiz_titulo"], "Quiz 1")
+        self.assertEqual(lines[0]["score"], 50)
+
+    def test_lesson_progress_export(self):
+        self.auth_as("inst")
+        res = self.client.get("/api/enrollments/lesson-progress/export/")
+        rows = list(csv.reader(io.StringIO(self.read_stream(res))))
+        self.assertEqual(len(rows), 1 + 3)
+
+    def test_student_cannot_export(self):
+        self.auth_as("s0")
+        res = self.client.get("/api/enrollments/enrollments/export/")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_output(self):
+        self.auth_as("inst")
+        res = self.client.get("/api/enrollments/enrollments/export/?output=xml")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QuizResultTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("stud")
+        self.enroll(self.student)
+
+    def submit(self, choice):
+        return self.client.post(
+            "/api/enrollments/submissions/submit/",
+            {"quiz_id": self.quiz.id, "answers": {str(self.question.id): choice.id}},
+            format="json",
+        )
+
+    def test_submit_maintains_summary(self):
+        self.auth_as("stud")
+        self.assertEqual(self.submit(self.right).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit(self.wrong).status_code, status.HTTP_201_CREATED)
+
+        result = QuizResult.objects.get(user=self.student, quiz=self.quiz)
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(result.best_score, 100)
+        self.assertEqual(result.latest_score, 0)
+
+        res = self.client.get(f"/api/enrollments/submissions/my-results/?course_id={self.course.id}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["best_score"], 100)
+        self.assertEqual(res.data[0]["attempts"], 2)
+
+    def test_rebuild_command_matches_incremental(self):
+        self.auth_as("stud")
+        for choice in (self.wrong, self.right, self.wrong):
+            self.submit(choice)
+        expected = QuizResult.objects.values("user_id", "quiz_id", "best_score", "latest_score", "attempts").get()
+
+        QuizResult.objects.all().delete()
+        call_command("rebuild_quiz_results", stdout=io.StringIO())
+
+        rebuilt = QuizResult.objects.values("user_id", "quiz_id", "best_score", "latest_score", "attempts").get()
+        self.assertEqual(rebuilt, expected)
+
+
+class RateLimitTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("stud")
+        self.auth_as("stud")
+
+    def rates(self, **rates):
+        return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates})
+
+    def at(self, seconds):
+        return mock.patch.object(SlidingWindowRateThrottle, "timer", lambda self: seconds)
+
+    def enroll_course(self):
+        return self.client.post("/api/enrollments/enrollments/enroll/", {"course_id": self.course.id}, format="json")
+
+    def test_enroll_limited_with_retry_after(self):
+        with self.rates(enroll="2/min"), self.at(6000.0):
+            self.assertEqual(self.enroll_course().status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.enroll_course().status_code, status.HTTP_200_OK)
+            res = self.enroll_course()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "60")
+
+    def test_previous_window_weighs_in(self):
+        with self.rates(enroll="2/min"):
+            with self.at(6000.0):
+                self.enroll_course()
+                self.enroll_course()
+            # A mitad de la ventana siguiente cuenta la mitad de la anterior: 2 * 0.5 + 1
+            with self.at(6090.0):
+                self.assertEqual(self.enroll_course().status_code, status.HTTP_200_OK)
+                res = self.enroll_course()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_limits_are_per_user_and_scope(self):
+        self.make_user("stud2")
+        with self.rates(enroll="1/min", submit="5/min"), self.at(6000.0):
+            self.enroll_course()
+            self.assertEqual(self.enroll_course().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            res = self.client.post(
+                "/api/enrollments/submissions/submit/",
+                {"quiz_id": self.quiz.id, "answers": {str(self.question.id): self.right.id}},
+                format="json",
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+            self.auth_as("stud2")
+            self.assertEqual(self.enroll_course().status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)  # los conteos asumen el usuario en caché
+class IdempotencyTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("stud")
+        self.enroll(self.student)
+        self.auth_as("stud")
+
+    def submit(self, choice, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(
+            "/api/enrollments/submissions/submit/",
+            {"quiz_id": self.quiz.id, "answers": {str(self.question.id): choice.id}},
+            format="json",
+            **headers,
+        )
+
+    def test_retried_submit_is_replayed(self):
+        first = self.submit(self.right, key="abc")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retry = self.submit(self.right, key="abc")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["id"], first.data["id"])
+        self.assertEqual(Submission.objects.filter(user=self.student).count(), 1)
+        self.assertEqual(QuizResult.objects.get(user=self.student).attempts, 1)
+
+    def test_key_reused_with_other_body(self):
+        self.submit(self.right, key="abc")
+        res = self.submit(self.wrong, key="abc")
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_without_key_each_request_counts(self):
+        self.submit(self.right)
+        self.submit(self.right)
+        self.assertEqual(Submission.objects.filter(user=self.student).count(), 2)
+
+    def test_keys_are_scoped_per_user(self):
+        self.submit(self.right, key="abc")
+        other = self.make_user("stud2")
+        self.enroll(other)
+        self.auth_as("stud2")
+        res = self.submit(self.right, key="abc")
+        self.assertNotIn("Idempotent-Replayed", res)
+        self.assertEqual(Submission.objects.filter(user=other).count(), 1)
+
+    @override_settings(IDEMPOTENCY_PENDING_TTL=30, IDEMPOTENCY_TTL=3600)
+    def test_pending_reservation_expires_quickly(self):
+        with mock.patch.object(cache, "add", wraps=cache.add) as add, mock.patch.object(
+            cache, "set", wraps=cache.set
+        ) as set_:
+            self.submit(self.right, key="abc")
+        idem_add = [c for c in add.call_args_list if c.args[0].startswith("idem:")]
+        idem_set = [c for c in set_.call_args_list if c.args[0].startswith("idem:")]
+        self.assertEqual(idem_add[0].args[2], 30)
+        self.assertEqual((idem_set[-1].args[1]["state"], idem_set[-1].args[2]), ("done", 3600))
+
+    def test_complete_replay_skips_recount(self):
+        payload = {"lesson_id": self.lessons[0].id}
+        url = "/api/enrollments/lesson-progress/complete/"
+        self.client.post(url, payload, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        with self.assertNumQueries(0):
+            res = self.client.post(url, payload, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.json()["completado"])
+
+
+class DeferredFollowUpTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("stud")
+        self.enrollment = self.enroll(self.student)
+        self.auth_as("stud")
+
+    def complete(self, lesson):
+        return self.client.post("/api/enrollments/lesson-progress/complete/", {"lesson_id": lesson.id}, format="json")
+
+    def test_complete_defers_progress_and_dedupes(self):
+        self.complete(self.lessons[0])
+        self.complete(self.lessons[1])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progreso, 0)
+        self.assertEqual(Job.objects.filter(name="enrollments.recompute_progress", status="pending").count(), 2)
+
+        # Una sola ejecución cubre las dos lecciones
+        self.assertEqual(self.run_jobs(), 1)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progreso, 66.67)
+
+    def test_rate_refreshes_summary(self):
+        self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")  # caché fría: 0 ratings
+        res = self.client.post("/api/feedback/ratings/rate/", {"course_id": self.course.id, "rating": 4}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.run_jobs()
+
+        res = self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")
+        self.assertEqual(res.data["ratings_count"], 1)
+        self.assertEqual(res.data["avg_rating"], 4.0)
+
+    def test_rating_delete_invalidates_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/feedback/ratings/rate/", {"course_id": self.course.id, "rating": 4}, format="json")
+        self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseRating.objects.filter(course=self.course).get().delete()
+        res = self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")
+        self.assertEqual(res.data["ratings_count"], 0)
+
+    def test_async_summary_matches_sync(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/feedback/ratings/rate/", {"course_id": self.course.id, "rating": 3}, format="json")
+        sync = self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")
+        res = self.client.get(f"/api/async/feedback/ratings/summary/?course_id={self.course.id}")
+        self.assertEqual(res.json(), sync.json())
+
+    @override_settings(RATING_SUMMARY_TTL=120)
+    def test_summary_cached_with_finite_ttl(self):
+        with mock.patch.object(cache, "set", wraps=cache.set) as set_:
+            self.client.get(f"/api/feedback/ratings/summary/?course_id={self.course.id}")
+        self.assertEqual([c.args[2] for c in set_.call_args_list if c.args[0].startswith("rating:")], [120])
+
+
+class NextLessonTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Módulo con orden menor creado después: manda el orden, no el id
+        intro = Module.objects.create(course=self.course, titulo="Intro", orden=0)
+        self.intro = Lesson.objects.create(module=intro, titulo="Bienvenida", tipo="texto", contenido="x", orden=9)
+        self.student = self.make_user("s_next")
+        self.enrollment = self.enroll(self.student)
+        self.url = f"/api/enrollments/enrollments/{self.enrollment.id}/next-lesson/"
+        self.auth_as("s_next")
+
+    def complete(self, lesson, completado=True):
+        LessonProgress.objects.create(enrollment=self.enrollment, lesson=lesson, completado=completado)
+
+    def test_follows_module_then_lesson_order(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["lesson"]["id"], self.intro.id)
+        self.assertEqual(res.data["lesson"]["module"]["orden"], 0)
+
+        self.complete(self.intro)
+        self.complete(self.lessons[0])
+        self.complete(self.lessons[1], completado=False)
+        res = self.client.get(self.url)
+        self.assertEqual(res.data["lesson"]["id"], self.lessons[1].id)
+        self.assertFalse(res.data["completed"])
+
+    def test_completed_course_and_single_query(self):
+        for lesson in [self.intro, *self.lessons]:
+            self.complete(lesson)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(next_lesson(self.enrollment))
+        res = self.client.get(self.url)
+        self.assertTrue(res.data["completed"])
+        self.assertIsNone(res.data["lesson"])
+
+    def test_other_students_cannot_read_it(self):
+        self.make_user("s_other")
+        self.auth_as("s_other")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DashboardTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("s_dash")
+        self.enrollment = self.enroll(self.student)
+        self.auth_as("s_dash")
+
+    def add_course(self, titulo):
+        course = self.make_course(self.instructor, titulo=titulo)
+        module = Module.objects.create(course=course, titulo="M", orden=1)
+        Lesson.objects.create(module=module, titulo=f"{titulo} L1", tipo="texto", contenido="x", orden=1)
+        module_quiz = Quiz.objects.create(module=module, titulo=f"{titulo} Q")
+        enrollment = self.enroll(self.student, course)
+        QuizResult.objects.create(user=self.student, quiz=module_quiz, best_score=80, latest_score=60, attempts=2)
+        return enrollment
+
+    def test_returns_course_progress_next_lesson_quizzes_and_rating(self):
+        LessonProgress.objects.create(enrollment=self.enrollment, lesson=self.lessons[0], completado=True)
+        QuizResult.objects.create(user=self.student, quiz=self.quiz, best_score=100, latest_score=100, attempts=1)
+        CourseRating.objects.create(user=self.student, course=self.course, rating=4)
+
+        res = self.client.get("/api/enrollments/enrollments/dashboard/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [item] = res.data
+        self.assertEqual(item["course"]["titulo"], "Curso")
+        self.assertEqual(item["next_lesson"]["id"], self.lessons[1].id)
+        self.assertEqual([q["quiz"] for q in item["recent_quizzes"]], [self.quiz.id])
+        self.assertEqual(item["rating"], {"rated": True, "value": 4})
+
+    def test_query_count_does_not_grow_with_courses(self):
+        with self.assertNumQueries(4):
+            build_dashboard(self.student)
+
+        extra = [self.add_course(f"Extra {i}") for i in range(3)]
+        with self.assertNumQueries(4):
+            data = build_dashboard(self.student)
+        self.assertEqual(len(data), 4)
+        by_enrollment = {item["enrollment"]: item for item in data}
+        self.assertEqual(by_enrollment[extra[0].id]["recent_quizzes"][0]["latest_score"], 60)
+        self.assertEqual(by_enrollment[extra[0].id]["rating"], {"rated": False, "value": None})
+
+
+class MyEnrollmentsTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("s_my")
+        self.enrollments = [self.enroll(self.student)] + [
+            self.enroll(self.student, self.make_course(self.instructor, titulo=f"C{i}")) for i in range(4)
+        ]
+        self.auth_as("s_my")
+
+    def test_orders_by_last_activity_and_embeds_course(self):
+        # Completar una lección del primer curso lo sube al principio
+        self.client.post("/api/enrollments/lesson-progress/complete/", {"lesson_id": self.lessons[0].id})
+        self.run_jobs()
+
+        res = self.client.get("/api/enrollments/enrollments/my/?include=course")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["id"], self.enrollments[0].id)
+        self.assertEqual(res.data[0]["course"]["titulo"], "Curso")
+
+        res = self.client.get("/api/enrollments/enrollments/my/")
+        self.assertEqual(res.data[0]["course"], self.course.id)
+
+    def test_cursor_pagination(self):
+        seen = []
+        url = "/api/enrollments/enrollments/my/?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            seen += [e["id"] for e in res.data["results"]]
+            url = res.data["next"]
+        self.assertEqual(sorted(seen), sorted(e.id for e in self.enrollments))
+
+
+class SubmissionArchiveTests(EnrollmentsAPITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_user("s_arch")
+        self.enroll(self.student)
+        self.auth_as("s_arch")
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+
+    def submit(self, choice):
+        return self.client.post(
+            "/api/enrollments/submissions/submit/",
+            {"quiz_id": self.quiz.id, "answers": {str(self.question.id): choice.id}},
+            format="json",
+        )
+
+    def archive_everything(self):
+        # Lo mismo que archive_submission_partition salvo el DETACH/DROP de Postgres
+        start, end = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        path = partitions.archive_path(self.archive_dir.name, "enrollments_submission_ptest")
+        rows, _sha256 = partitions.export_submissions(start, end, path)
+        with transaction.atomic():
+            partitions.accumulate_archived_stats(start, end)
+            Submission.objects.filter(fecha__gte=start, fecha__lt=end).delete()
+        return path, rows
+
+    def test_archived_attempts_keep_summary_and_numbering(self):
+        self.submit(self.right)
+        self.submit(self.wrong)
+        self.run_jobs()
+
+        path, rows = self.archive_everything()
+        self.assertEqual(rows, 2)
+        with gzip.open(path, "rt") as fh:
+            self.assertEqual([json.loads(line)["attempt"] for line in fh], [1, 2])
+
+        # Rebuild con la tabla vacía: el resumen sale de lo archivado
+        call_command("rebuild_quiz_results", stdout=io.StringIO())
+        result = QuizResult.objects.get(user=self.student, quiz=self.quiz)
+        self.assertEqual((result.attempts, result.best_score, result.latest_score), (2, 100, 0))
+
+        res = self.submit(self.wrong)
+        self.assertEqual(res.data["attempt"], 3)
+        self.run_jobs()
+        result = QuizResult.objects.get(user=self.student, quiz=self.quiz)
+        self.assertEqual((result.attempts, result.best_score, result.latest_score), (3, 100, 0))
+
+    def test_partition_commands_require_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command("manage_partitions", "--table=submission", stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command("archive_partitions", stdout=io.StringIO())
+        # LessonProgress no es particionable
+        with self.assertRaises(CommandError):
+            call_command("manage_partitions", "--table=lessonprogress", stdout=io.StringIO())
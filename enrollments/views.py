@@ -1,31 +1,90 @@
+from django.db import transaction
 from django.db.models import Max, Q
 from django.utils import timezone
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from courses.models import Course, Lesson, Quiz, Question, Choice
-from .models import Enrollment, LessonProgress, Submission
-from .serializers import EnrollmentSerializer, LessonProgressSerializer, SubmissionSerializer
+from courses.visibility import managed
+from jobs.queue import enqueue
+from learning_platform_backend.idempotency import idempotent
+from learning_platform_backend.throttling import ActionRateLimitMixin
+from outbox.events import ENROLLMENT_CREATED, LESSON_COMPLETED, QUIZ_SUBMITTED, record_event
+from users.principal import get_principal
+from .exports import export_format, stream_export
+from .dashboard import build_dashboard
+from .models import Enrollment, LessonProgress, QuizResult, Submission
+from .next_lesson import next_lesson
+from .serializers import (
+    EnrollmentSerializer,
+    EnrollmentWithCourseSerializer,
+    LessonProgressSerializer,
+    NextLessonSerializer,
+    QuizResultSerializer,
+    SubmissionSerializer,
+)
 from .permissions import (
     CanReadEnrollments,
     CanReadLessonProgress,
     CanReadSubmissions,
+    IsInstructorEnabled,
     IsStudentEnabled,
 )
 
 
-def _ip(user):
-    return getattr(user, "instructor_profile", None)
+def _course_q(course_lookups, suffix, value):
+    q = Q()
+    for lookup in course_lookups:
+        q |= Q(**{f"{lookup}{suffix}": value})
+    return q
+
+
+def _export(request, qs, course_lookups, lookups, filename):
+    """
+    Exportación para admin (todo) o instructor (solo sus cursos), filtrable
+    por ?course_id=. `course_lookups` son los caminos hacia Course (varios si
+    el modelo puede colgar de course o de module). Ver enrollments.exports.
+    """
+    output = export_format(request)
+    if output is None:
+        return Response({"output": "Debe ser csv o ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+    qs = managed(qs, get_principal(request), *(f"{lookup}_id" for lookup in course_lookups))
+
+    course_id = request.query_params.get("course_id")
+    if course_id:
+        qs = qs.filter(_course_q(course_lookups, "_id", course_id))
+
+    return stream_export(qs, lookups, output, filename)
+
+
+class MyEnrollmentsPagination(CursorPagination):
+    """
+    Cursor sobre (-last_activity_at, -id), cubierto por enrollment_user_activity_idx.
 
+    last_activity_at es mutable (lo adelantan los jobs de enrollments.tasks):
+    si una matrícula tiene actividad mientras el cliente pagina, salta al
+    principio de la lista. El cursor no lo compensa, así que entre páginas
+    el cliente puede ver esa matrícula dos veces (deduplicar por id) o no
+    verla en esa pasada (aparece al volver a pedir la primera página).
+    """
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+    ordering = ("-last_activity_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class EnrollmentViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = Enrollment.objects.select_related("user", "course", "course__instructor").all()
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated, CanReadEnrollments]
+    throttle_scopes = {"enroll": "enroll"}
 
     # Bloquear CRUD directo
     def create(self, request, *args, **kwargs):
@@ -41,17 +100,16 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         raise MethodNotAllowed(request.method)
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
 
-        if user.is_staff:
+        if p.is_staff:
             return self.queryset
 
-        if user.student_enabled:
-            return self.queryset.filter(user=user)
+        if p.student_enabled:
+            return self.queryset.filter(user_id=p.user_id)
 
-        ip = _ip(user)
-        if user.instructor_enabled and ip:
-            return self.queryset.filter(course__instructor=ip)
+        if p.is_instructor:
+            return self.queryset.filter(course__instructor_id=p.instructor_profile_id)
 
         return self.queryset.none()
 
@@ -61,6 +119,7 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         url_path="enroll",
         permission_classes=[IsAuthenticated, IsStudentEnabled],
     )
+    @idempotent("enroll")
     def enroll(self, request):
         course_id = request.data.get("course_id")
         if not course_id:
@@ -74,10 +133,18 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        enrollment, created = Enrollment.objects.get_or_create(
-            user=request.user,
-            course=course,
-        )
+        with transaction.atomic():
+            enrollment, created = Enrollment.objects.get_or_create(
+                user=request.user,
+                course=course,
+            )
+            if created:
+                record_event(
+                    ENROLLMENT_CREATED,
+                    "enrollment",
+                    enrollment.id,
+                    {"user_id": request.user.id, "course_id": course.id, "fecha": enrollment.fecha},
+                )
         data = EnrollmentSerializer(enrollment).data
         return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
@@ -88,11 +155,61 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated, IsStudentEnabled],
     )
     def my(self, request):
-        qs = Enrollment.objects.filter(user=request.user).select_related("course")
-        return Response(EnrollmentSerializer(qs, many=True).data)
+        """
+        Matrículas del estudiante, de actividad más reciente a más antigua.
+        ?include=course embebe el resumen del curso (un JOIN, sin llamadas
+        extra). Con ?cursor= o ?page_size= la respuesta va paginada por cursor
+        ({next, previous, results}); sin ellos se mantiene la lista completa.
+        El orden es por un campo que cambia: ver MyEnrollmentsPagination.
+        """
+        qs = Enrollment.objects.filter(user=request.user).order_by("-last_activity_at", "-id")
+        serializer_class = EnrollmentSerializer
+        if "course" in request.query_params.get("include", "").split(","):
+            qs = qs.select_related("course")
+            serializer_class = EnrollmentWithCourseSerializer
+
+        if "cursor" in request.query_params or "page_size" in request.query_params:
+            paginator = MyEnrollmentsPagination()
+            page = paginator.paginate_queryset(qs, request, view=self)
+            return paginator.get_paginated_response(serializer_class(page, many=True).data)
+        return Response(serializer_class(qs, many=True).data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="dashboard",
+        permission_classes=[IsAuthenticated, IsStudentEnabled],
+    )
+    def dashboard(self, request):
+        """Panel del estudiante en una sola llamada (ver enrollments.dashboard)."""
+        return Response(build_dashboard(request.user))
+
+    @action(detail=True, methods=["get"], url_path="next-lesson")
+    def next_lesson(self, request, pk=None):
+        """
+        Siguiente lección sin completar (orden de módulo y de lección), para
+        retomar el curso sin descargar todas las lecciones y el progreso.
+        """
+        enrollment = self.get_object()
+        return Response(NextLessonSerializer((enrollment, next_lesson(enrollment))).data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAuthenticated, IsInstructorEnabled],
+    )
+    def export(self, request):
+        return _export(
+            request,
+            Enrollment.objects.all(),
+            ("course",),
+            ("id", "user_id", "user__username", "course_id", "course__titulo", "fecha", "estado", "progreso"),
+            "enrollments",
+        )
 
-class LessonProgressViewSet(viewsets.ModelViewSet):
+
+class LessonProgressViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = LessonProgress.objects.select_related(
         "enrollment",
         "enrollment__user",
@@ -103,6 +220,7 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
     ).all()
     serializer_class = LessonProgressSerializer
     permission_classes = [IsAuthenticated, CanReadLessonProgress]
+    throttle_scopes = {"complete": "complete"}
 
     # Bloquear CRUD directo
     def create(self, request, *args, **kwargs):
@@ -118,19 +236,17 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
         raise MethodNotAllowed(request.method)
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
         qs = self.queryset
 
-        if user.is_staff:
+        if p.is_staff:
             pass
-        elif user.student_enabled:
-            qs = qs.filter(enrollment__user=user)
+        elif p.student_enabled:
+            qs = qs.filter(enrollment__user_id=p.user_id)
+        elif p.is_instructor:
+            qs = qs.filter(enrollment__course__instructor_id=p.instructor_profile_id)
         else:
-            ip = _ip(user)
-            if user.instructor_enabled and ip:
-                qs = qs.filter(enrollment__course__instructor=ip)
-            else:
-                return self.queryset.none()
+            return self.queryset.none()
 
         # NUEVO: permitir filtrar por curso
         course_id = self.request.query_params.get("course_id")
@@ -139,12 +255,37 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAuthenticated, IsInstructorEnabled],
+    )
+    def export(self, request):
+        return _export(
+            request,
+            LessonProgress.objects.all(),
+            ("enrollment__course",),
+            (
+                "id",
+                "enrollment_id",
+                "enrollment__user_id",
+                "enrollment__user__username",
+                "lesson_id",
+                "lesson__titulo",
+                "completado",
+                "completed_at",
+            ),
+            "lesson_progress",
+        )
+
     @action(
         detail=False,
         methods=["post"],
         url_path="complete",
         permission_classes=[IsAuthenticated, IsStudentEnabled],
     )
+    @idempotent("complete")
     def complete(self, request):
         lesson_id = request.data.get("lesson_id")
         if not lesson_id:
@@ -155,42 +296,58 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
         except Lesson.DoesNotExist:
             return Response({"detail": "Lección no existe."}, status=status.HTTP_404_NOT_FOUND)
 
-        try:
-            enrollment = Enrollment.objects.get(
-                user=request.user,
-                course=lesson.module.course,
-                estado="activo",
+        with transaction.atomic():
+            # La matrícula bloqueada serializa los complete concurrentes del
+            # mismo alumno en el curso (get_or_create + recálculo de progreso)
+            try:
+                enrollment = Enrollment.objects.select_for_update().get(
+                    user=request.user,
+                    course=lesson.module.course,
+                    estado="activo",
+                )
+            except Enrollment.DoesNotExist:
+                return Response(
+                    {"detail": "No estás matriculado en este curso."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+
+            progress, _ = LessonProgress.objects.get_or_create(
+                enrollment=enrollment,
+                lesson=lesson,
             )
-        except Enrollment.DoesNotExist:
-            return Response(
-                {"detail": "No estás matriculado en este curso."},
-                status=status.HTTP_403_FORBIDDEN,
+            if progress.completado:
+                # Ya completada: sin evento ni recálculo duplicados
+                return Response(LessonProgressSerializer(progress).data, status=status.HTTP_200_OK)
+
+            progress.completado = True
+            if progress.completed_at is None:
+                progress.completed_at = timezone.now()
+            progress.save(update_fields=["completado", "completed_at"])
+
+            record_event(
+                LESSON_COMPLETED,
+                "enrollment",
+                enrollment.id,
+                {
+                    "user_id": request.user.id,
+                    "course_id": enrollment.course_id,
+                    "lesson_id": lesson.id,
+                    "completed_at": progress.completed_at,
+                },
             )
 
-        progress, _ = LessonProgress.objects.get_or_create(
-            enrollment=enrollment,
-            lesson=lesson,
-        )
-
-        progress.completado = True
-        if progress.completed_at is None:
-            progress.completed_at = timezone.now()
-        progress.save(update_fields=["completado", "completed_at"])
-
-        total_lessons = Lesson.objects.filter(module__course=enrollment.course).count()
-        completed = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            completado=True,
-            lesson__module__course=enrollment.course,
-        ).count()
-
-        enrollment.progreso = 0 if total_lessons == 0 else round((completed / total_lessons) * 100, 2)
-        enrollment.save(update_fields=["progreso"])
+            # Enrollment.progreso se recalcula fuera de la request (enrollments.tasks)
+            enqueue(
+                "enrollments.recompute_progress",
+                {"enrollment_id": enrollment.id},
+                priority=1,
+                dedupe_key=f"progress:{enrollment.id}",
+            )
 
         return Response(LessonProgressSerializer(progress).data, status=status.HTTP_200_OK)
 
 
-class SubmissionViewSet(viewsets.ModelViewSet):
+class SubmissionViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = Submission.objects.select_related(
         "user",
         "quiz",
@@ -200,6 +357,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     ).all()
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated, CanReadSubmissions]
+    throttle_scopes = {"submit": "submit"}
 
     # Bloquear CRUD directo
     def create(self, request, *args, **kwargs):
@@ -215,30 +373,58 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         raise MethodNotAllowed(request.method)
 
     def get_queryset(self):
-        user = self.request.user
+        p = get_principal(self.request)
 
-        if user.is_staff:
+        if p.is_staff:
             return self.queryset
 
-        if user.student_enabled:
-            return self.queryset.filter(user=user)
+        if p.student_enabled:
+            return self.queryset.filter(user_id=p.user_id)
 
-        ip = _ip(user)
-        if user.instructor_enabled and ip:
-            return (
-                self.queryset.filter(
-                    Q(quiz__course__instructor=ip) | Q(quiz__module__course__instructor=ip)
-                ).distinct()
-            )
+        if p.is_instructor:
+            return managed(self.queryset, p, "quiz__course_id", "quiz__module__course_id")
 
         return self.queryset.none()
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAuthenticated, IsInstructorEnabled],
+    )
+    def export(self, request):
+        return _export(
+            request,
+            Submission.objects.all(),
+            ("quiz__course", "quiz__module__course"),
+            ("id", "user_id", "user__username", "quiz_id", "quiz__titulo", "attempt", "score", "fecha"),
+            "submissions",
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="my-results",
+        permission_classes=[IsAuthenticated, IsStudentEnabled],
+    )
+    def my_results(self, request):
+        """
+        Mejor/último puntaje por quiz del usuario, desde el resumen QuizResult
+        (sin recorrer los intentos). Filtrable por ?course_id=.
+        """
+        qs = QuizResult.objects.filter(user=request.user).order_by("quiz_id")
+        course_id = request.query_params.get("course_id")
+        if course_id:
+            qs = qs.filter(Q(quiz__course_id=course_id) | Q(quiz__module__course_id=course_id))
+        return Response(QuizResultSerializer(qs, many=True).data)
+
     @action(
         detail=False,
         methods=["post"],
         url_path="submit",
         permission_classes=[IsAuthenticated, IsStudentEnabled],
     )
+    @idempotent("submit")
     def submit(self, request):
         quiz_id = request.data.get("quiz_id")
         answers = request.data.get("answers", {})
@@ -272,14 +458,6 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        last_attempt = (
-            Submission.objects.filter(user=request.user, quiz=quiz)
-            .aggregate(m=Max("attempt"))
-            .get("m")
-            or 0
-        )
-        attempt = last_attempt + 1
-
         question_ids = list(Question.objects.filter(quiz=quiz).values_list("id", flat=True))
         if not question_ids:
             return Response({"detail": "Quiz sin preguntas."}, status=status.HTTP_400_BAD_REQUEST)
@@ -296,11 +474,45 @@ class SubmissionViewSet(viewsets.ModelViewSet):
 
         score = round((correct / total) * 100, 2)
 
-        submission = Submission.objects.create(
-            user=request.user,
-            quiz=quiz,
-            attempt=attempt,
-            score=score,
-            answers=answers,
-        )
+        with transaction.atomic():
+            # La fila de QuizResult bloqueada serializa los submit concurrentes:
+            # sin ella dos requests leen el mismo máximo y repiten el número de
+            # intento (con la tabla particionada no hay UNIQUE que lo impida).
+            # El resumen cuenta todos los intentos (también los archivados);
+            # solo los posteriores a su último refresco se buscan en Submission,
+            # así con la tabla particionada la query toca las particiones recientes.
+            summary = QuizResult.lock(request.user.id, quiz.id)
+            recent = Submission.objects.filter(user=request.user, quiz=quiz)
+            if summary.last_submitted_at is not None:
+                recent = recent.filter(fecha__gte=summary.last_submitted_at)
+            attempt = max(summary.attempts, recent.aggregate(m=Max("attempt")).get("m") or 0) + 1
+
+            submission = Submission.objects.create(
+                user=request.user,
+                quiz=quiz,
+                attempt=attempt,
+                score=score,
+                answers=answers,
+            )
+            record_event(
+                QUIZ_SUBMITTED,
+                "submission",
+                submission.id,
+                {
+                    "user_id": request.user.id,
+                    "quiz_id": quiz.id,
+                    "course_id": course.id,
+                    "attempt": attempt,
+                    "score": score,
+                    "fecha": submission.fecha,
+                },
+            )
+            # El resumen se actualiza en la misma transacción: gradebook,
+            # my-results y el dashboard lo leen sin esperar a ningún worker
+            summary.add(submission)
+            # Solo last_activity_at (orden de /my/) se deja para la cola
+            enqueue(
+                "enrollments.touch_activity",
+                {"user_id": request.user.id, "course_id": course.id, "when": submission.fecha.isoformat()},
+            )
         return Response(SubmissionSerializer(submission).data, status=status.HTTP_201_CREATED)
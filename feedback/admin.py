@@ -1,16 +1,25 @@
 from django.contrib import admin
+
+from learning_platform_backend.admin_tools import LargeTableAdmin
 from .models import Comment, CourseRating
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ("id", "user", "course", "lesson", "fecha")
-    search_fields = ("user__username", "texto", "course__titulo", "lesson__titulo")
-    list_filter = ("course", "fecha")
+    list_select_related = ("user", "course", "lesson")
+    autocomplete_fields = ("user", "course", "lesson")
+    search_id_fields = ("id", "user_id", "course_id", "lesson_id")
+    search_exact_fields = ("user__username",)
+    ordering = ("-id",)
 
 
 @admin.register(CourseRating)
-class CourseRatingAdmin(admin.ModelAdmin):
+class CourseRatingAdmin(LargeTableAdmin):
     list_display = ("id", "user", "course", "rating", "fecha")
-    search_fields = ("user__username", "course__titulo")
-    list_filter = ("rating", "course")
+    list_filter = ("rating",)
+    list_select_related = ("user", "course")
+    autocomplete_fields = ("user", "course")
+    search_id_fields = ("id", "user_id", "course_id")
+    search_exact_fields = ("user__username",)
+    ordering = ("-id",)
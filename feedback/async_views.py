@@ -0,0 +1,26 @@
+"""
+Variante async (ASGI) de CourseRatingViewSet.summary: mismo JSON y mismas reglas.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+
+from courses.models import Course
+from learning_platform_backend.async_api import error_response, json_response
+from .tasks import get_rating_summary
+
+
+@require_GET
+async def rating_summary(request):
+    """GET /api/async/feedback/ratings/summary/?course_id=ID"""
+    course_id = request.GET.get("course_id")
+    if not course_id:
+        return json_response({"course_id": ["Requerido."]}, status=400)
+
+    course = await Course.objects.filter(id=course_id).only("id", "estado").afirst()
+    if course is None:
+        return error_response("Curso no existe.", 404)
+
+    if course.estado != "publicado":
+        return error_response("Curso no publicado.", 403)
+
+    return json_response(await sync_to_async(get_rating_summary)(course.id))
@@ -1,5 +1,8 @@
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 
 class Comment(models.Model):
@@ -38,3 +41,15 @@ class CourseRating(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.course.titulo} - {self.rating}"
+
+
+# Cualquier alta, cambio o baja (rate, update/destroy del ViewSet, admin) deja
+# sin valor el resumen en caché de /ratings/summary/. Tras el commit, para que
+# nadie recalcule y guarde el estado anterior.
+@receiver(post_save, sender=CourseRating)
+@receiver(post_delete, sender=CourseRating)
+def invalidate_rating_summary(sender, instance, **kwargs):
+    from .tasks import rating_summary_key
+
+    key = rating_summary_key(instance.course_id)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -1,10 +1,12 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from users.principal import get_principal
+
 
 class IsStudentEnabled(BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        return bool(u and u.is_authenticated and (u.is_staff or getattr(u, "student_enabled", False)))
+        p = get_principal(request)
+        return bool(p.is_authenticated and (p.is_staff or p.student_enabled))
 
 
 class CanReadFeedback(BasePermission):
@@ -16,29 +18,25 @@ class CanReadFeedback(BasePermission):
         return request.method in SAFE_METHODS
 
     def has_object_permission(self, request, view, obj):
-        u = request.user
+        p = get_principal(request)
         course = getattr(obj, "course", None)
 
         if course and getattr(course, "estado", None) == "publicado":
             return True
 
-        if not u or not u.is_authenticated:
+        if not p.is_authenticated:
             return False
 
-        if u.is_staff:
+        if p.is_staff:
             return True
 
-        if getattr(u, "instructor_enabled", False):
-            ip = getattr(u, "instructor_profile", None)
-            return bool(ip and getattr(course, "instructor_id", None) == ip.id)
-
-        return False
+        return p.owns(getattr(course, "instructor_id", None))
 
 
 class IsOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
-        u = request.user
-        if not u or not u.is_authenticated:
+        p = get_principal(request)
+        if not p.is_authenticated:
             return False
-        return bool(u.is_staff or getattr(obj, "user_id", None) == u.id)
+        return bool(p.is_staff or getattr(obj, "user_id", None) == p.user_id)
 
@@ -0,0 +1,48 @@
+"""
+Jobs en segundo plano de feedback (ver jobs.queue).
+
+El resumen de ratings vive en la caché con RATING_SUMMARY_TTL: con locmem cada
+proceso tiene su copia, así que el TTL acota cuánto puede quedar viejo en los
+workers web; con una caché compartida, las señales de CourseRating lo borran
+en cuanto cambia.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count
+
+from jobs.queue import job
+from .models import CourseRating
+
+
+def rating_summary_key(course_id):
+    return f"rating:summary:{course_id}"
+
+
+def compute_rating_summary(course_id):
+    agg = CourseRating.objects.filter(course_id=course_id).aggregate(avg=Avg("rating"), count=Count("id"))
+    return {
+        "course_id": int(course_id),
+        "avg_rating": None if agg["avg"] is None else round(float(agg["avg"]), 2),
+        "ratings_count": agg["count"],
+    }
+
+
+def cache_rating_summary(course_id, data):
+    cache.set(rating_summary_key(course_id), data, getattr(settings, "RATING_SUMMARY_TTL", 300))
+
+
+def get_rating_summary(course_id):
+    """
+    Resumen de /ratings/summary/ (síncrona y async): el precalculado por el job
+    de /rate/ o, si no está (caché fría o expirada), calculado aquí.
+    """
+    data = cache.get(rating_summary_key(course_id))
+    if data is None:
+        data = compute_rating_summary(course_id)
+        cache_rating_summary(course_id, data)
+    return data
+
+
+@job("feedback.refresh_rating_summary")
+def refresh_rating_summary(course_id):
+    cache_rating_summary(course_id, compute_rating_summary(course_id))
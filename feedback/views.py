@@ -1,4 +1,4 @@
-from django.db.models import Avg, Count, Q
+from django.db import transaction
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import MethodNotAllowed, PermissionDenied, ValidationError
@@ -6,10 +6,15 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from courses.models import Course
+from courses.visibility import readable
 from enrollments.models import Enrollment
+from jobs.queue import enqueue
+from learning_platform_backend.throttling import ActionRateLimitMixin
+from users.principal import get_principal
 from .models import Comment, CourseRating
 from .serializers import CommentSerializer, CourseRatingSerializer
 from .permissions import CanReadFeedback, IsOwnerOrAdmin, IsStudentEnabled
+from .tasks import get_rating_summary
 
 
 def can_user_write_feedback(user, course: Course) -> bool:
@@ -22,11 +27,12 @@ def can_user_write_feedback(user, course: Course) -> bool:
     return Enrollment.objects.filter(user=user, course=course, estado="activo").exists()
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.select_related(
         "user", "course", "lesson", "lesson__module", "lesson__module__course"
     ).all()
     serializer_class = CommentSerializer
+    throttle_scopes = {"create": "comment"}
 
     def get_permissions(self):
         if self.action in ("list", "retrieve"):
@@ -48,21 +54,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         if lesson_id:
             qs = qs.filter(lesson_id=lesson_id)
 
-        user = getattr(self.request, "user", None)
-
-        if not user or not user.is_authenticated:
-            return qs.filter(course__estado="publicado")
-
-        if user.is_staff:
-            return qs
-
-        if getattr(user, "instructor_enabled", False):
-            ip = getattr(user, "instructor_profile", None)
-            if not ip:
-                return qs.filter(course__estado="publicado")
-            return qs.filter(Q(course__estado="publicado") | Q(course__instructor=ip)).distinct()
-
-        return qs.filter(course__estado="publicado")
+        return readable(qs, get_principal(self.request), "course_id")
 
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
@@ -78,9 +70,10 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class CourseRatingViewSet(viewsets.ModelViewSet):
+class CourseRatingViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = CourseRating.objects.select_related("user", "course").all()
     serializer_class = CourseRatingSerializer
+    throttle_scopes = {"rate": "rate"}
 
     def get_permissions(self):
         if self.action in ("list", "retrieve", "summary"):
@@ -104,20 +97,7 @@ class CourseRatingViewSet(viewsets.ModelViewSet):
         if course_id:
             qs = qs.filter(course_id=course_id)
 
-        user = getattr(self.request, "user", None)
-        if not user or not user.is_authenticated:
-            return qs.filter(course__estado="publicado")
-
-        if user.is_staff:
-            return qs
-
-        if getattr(user, "instructor_enabled", False):
-            ip = getattr(user, "instructor_profile", None)
-            if not ip:
-                return qs.filter(course__estado="publicado")
-            return qs.filter(Q(course__estado="publicado") | Q(course__instructor=ip)).distinct()
-
-        return qs.filter(course__estado="publicado")
+        return readable(qs, get_principal(self.request), "course_id")
 
     @action(detail=False, methods=["post"], url_path="rate")
     def rate(self, request):
@@ -145,11 +125,18 @@ class CourseRatingViewSet(viewsets.ModelViewSet):
         if not can_user_write_feedback(request.user, course):
             raise PermissionDenied("No permitido (requiere estar enrolado y curso publicado).")
 
-        obj, created = CourseRating.objects.update_or_create(
-            user=request.user,
-            course=course,
-            defaults={"rating": rating},
-        )
+        with transaction.atomic():
+            obj, created = CourseRating.objects.update_or_create(
+                user=request.user,
+                course=course,
+                defaults={"rating": rating},
+            )
+            # El agregado de /summary/ se recalcula fuera de la request (feedback.tasks)
+            enqueue(
+                "feedback.refresh_rating_summary",
+                {"course_id": course.id},
+                dedupe_key=f"rating_summary:{course.id}",
+            )
 
         data = CourseRatingSerializer(obj).data
         return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -168,15 +155,4 @@ class CourseRatingViewSet(viewsets.ModelViewSet):
         if course.estado != "publicado":
             raise PermissionDenied("Curso no publicado.")
 
-        agg = CourseRating.objects.filter(course=course).aggregate(
-            avg=Avg("rating"),
-            count=Count("id"),
-        )
-
-        return Response(
-            {
-                "course_id": course.id,
-                "avg_rating": None if agg["avg"] is None else round(float(agg["avg"]), 2),
-                "ratings_count": agg["count"],
-            }
-        )
+        return Response(get_rating_summary(course.id))
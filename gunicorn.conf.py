@@ -0,0 +1,18 @@
+# gunicorn lee este archivo automáticamente desde el directorio de trabajo.
+import os
+import shutil
+
+
+def on_starting(server):
+    # Métricas multiproceso: empezar con el directorio mmap vacío en cada arranque
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "run_after", "duration_ms", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "dedupe_key")
+    ordering = ("-id",)
+    readonly_fields = ("created_at", "started_at", "finished_at", "duration_ms", "locked_by", "locked_at")
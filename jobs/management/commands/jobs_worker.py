@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de jobs de la BD (SELECT ... FOR UPDATE SKIP LOCKED en Postgres)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="Salir cuando la cola quede vacía")
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs reclamados por vuelta (por defecto 10)")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Segundos de espera con la cola vacía")
+        parser.add_argument("--max-jobs", type=int, help="Salir tras procesar N jobs")
+        parser.add_argument("--worker-id", help="Identificador en Job.locked_by (por defecto host:pid)")
+
+    def handle(self, *args, **options):
+        worker = Worker(worker_id=options["worker_id"], batch_size=options["batch_size"])
+        self.stdout.write(f"Worker {worker.worker_id} iniciado.")
+        processed = worker.run(burst=options["burst"], sleep=options["sleep"], max_jobs=options["max_jobs"])
+        self.stdout.write(self.style.SUCCESS(f"Jobs procesados: {processed}."))
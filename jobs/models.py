@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Trabajo diferido en la cola de la BD (ver jobs.queue y jobs.worker).
+    payload son los kwargs del handler registrado con @job(name).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pendiente"
+        RUNNING = "running", "En curso"
+        DONE = "done", "Terminado"
+        FAILED = "failed", "Fallido"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # mayor = antes
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    # Jobs con la misma clave se ejecutan una vez por tanda (ver jobs.worker)
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # Orden en que los workers reclaman trabajo
+            models.Index(fields=["status", "-priority", "run_after", "id"], name="job_claim_idx"),
+            models.Index(fields=["dedupe_key", "status"], name="job_dedupe_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}#{self.pk} ({self.status})"
@@ -0,0 +1,52 @@
+"""
+Registro de handlers y encolado.
+
+    @job("enrollments.recompute_progress")
+    def recompute_progress(enrollment_id): ...
+
+    enqueue("enrollments.recompute_progress", {"enrollment_id": 1})
+
+El job se inserta en la misma BD (y transacción) que la escritura que lo
+origina: si la request hace rollback, el job tampoco existe.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Job
+
+_handlers = {}
+
+
+def job(name):
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    return _handlers.get(name)
+
+
+def enqueue(name, payload=None, priority=0, delay=0, max_attempts=5, dedupe_key=None):
+    """
+    Encola un job y lo devuelve. Siempre inserta: reutilizar un job pendiente
+    no es seguro, porque un worker puede reclamarlo antes de que la transacción
+    de quien encola haga commit y correr sin ver sus filas. Con dedupe_key es
+    el worker quien junta el trabajo: al reclamar un job marca como hechos los
+    demás pendientes con la misma clave (p. ej. recalcular el progreso de una
+    matrícula una sola vez aunque se completen varias lecciones seguidas).
+    """
+    if name not in _handlers:
+        raise KeyError(f"Job no registrado: {name}")
+
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+        dedupe_key=dedupe_key,
+    )
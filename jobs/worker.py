@@ -0,0 +1,158 @@
+"""
+Worker de la cola de jobs (python manage.py jobs_worker).
+
+Reclamo de trabajo:
+- Postgres: SELECT ... FOR UPDATE SKIP LOCKED. Varios workers reclaman en
+  paralelo sin bloquearse ni repetir jobs.
+- Backends sin SKIP LOCKED (SQLite en local): modo degradado. Cada candidato se
+  reclama con un UPDATE condicionado a status=pending y solo gana quien
+  actualiza la fila. Correcto, pero con más queries por job.
+
+Al reclamar un job con dedupe_key, los demás pendientes y listos con la misma
+clave se marcan como hechos sin ejecutarse: ya estaban confirmados en la BD,
+así que la ejecución del reclamado los cubre. Los encolados después (o aún sin
+commit) siguen pendientes y corren en otra vuelta.
+
+Cada job corre en su propia transacción. Si falla, se reintenta con backoff
+exponencial (JOBS_RETRY_BACKOFF * 2^(intentos-1)) hasta max_attempts y luego
+queda en failed con el traceback en last_error. Los jobs en running cuyo
+worker murió se liberan pasado JOBS_LOCK_TIMEOUT.
+"""
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from learning_platform_backend.metrics import record_job
+from .models import Job
+from .queue import get_handler
+
+
+class Worker:
+    def __init__(self, worker_id=None, batch_size=1):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+
+    def run(self, burst=False, sleep=1.0, max_jobs=None):
+        """
+        Procesa jobs hasta que no quedan (burst) o indefinidamente, durmiendo
+        `sleep` segundos cuando la cola está vacía. Devuelve cuántos procesó.
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            done = self.run_once()
+            processed += done
+            if done == 0:
+                if burst:
+                    break
+                time.sleep(sleep)
+        return processed
+
+    def run_once(self):
+        self.release_stale()
+        jobs = self.claim()
+        for job in jobs:
+            self.execute(job)
+        return len(jobs)
+
+    def release_stale(self):
+        timeout = getattr(settings, "JOBS_LOCK_TIMEOUT", 300)
+        cutoff = timezone.now() - timedelta(seconds=timeout)
+        return Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff).update(
+            status=Job.Status.PENDING, locked_by="", locked_at=None
+        )
+
+    def claim(self):
+        now = timezone.now()
+        ready = Job.objects.filter(status=Job.Status.PENDING, run_after__lte=now).order_by(
+            "-priority", "run_after", "id"
+        )
+        claim_fields = {
+            "status": Job.Status.RUNNING,
+            "locked_by": self.worker_id,
+            "locked_at": now,
+            "started_at": now,
+            "attempts": F("attempts") + 1,
+        }
+
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        if skip_locked:
+            with transaction.atomic():
+                ids = list(ready.select_for_update(skip_locked=True).values_list("id", flat=True)[: self.batch_size])
+                Job.objects.filter(id__in=ids).update(**claim_fields)
+        else:
+            ids = []
+            for job_id in ready.values_list("id", flat=True)[: self.batch_size * 4]:
+                if Job.objects.filter(id=job_id, status=Job.Status.PENDING).update(**claim_fields):
+                    ids.append(job_id)
+                if len(ids) >= self.batch_size:
+                    break
+
+        jobs = list(Job.objects.filter(id__in=ids).order_by("-priority", "run_after", "id"))
+        return self.coalesce(jobs, now, skip_locked)
+
+    def coalesce(self, jobs, now, skip_locked):
+        """
+        Deja un job por dedupe_key entre los reclamados y marca como hechos los
+        demás con esa clave, reclamados o pendientes. Devuelve los que corren.
+        """
+        keep, covered, keys = [], [], set()
+        for job in jobs:
+            if job.dedupe_key in keys:
+                covered.append(job.id)
+                continue
+            if job.dedupe_key:
+                keys.add(job.dedupe_key)
+            keep.append(job)
+        if not keys:
+            return keep
+
+        done = {"status": Job.Status.DONE, "finished_at": now, "last_error": "", "locked_by": "", "locked_at": None}
+        duplicates = Job.objects.filter(dedupe_key__in=keys, status=Job.Status.PENDING, run_after__lte=now)
+        with transaction.atomic():
+            if skip_locked:
+                duplicates = duplicates.select_for_update(skip_locked=True)
+            covered += list(duplicates.values_list("id", flat=True))
+            Job.objects.filter(id__in=covered).update(**done)
+        return keep
+
+    def execute(self, job):
+        handler = get_handler(job.name)
+        start = time.perf_counter()
+        error = None
+
+        if handler is None:
+            error = f"Job no registrado: {job.name}"
+        elif job.attempts > job.max_attempts:
+            error = "Superado max_attempts (worker caído durante la ejecución)."
+        else:
+            try:
+                with transaction.atomic():
+                    handler(**job.payload)
+            except Exception:
+                error = traceback.format_exc()
+
+        elapsed = time.perf_counter() - start
+        now = timezone.now()
+        fields = {"finished_at": now, "duration_ms": elapsed * 1000, "locked_by": "", "locked_at": None}
+
+        if error is None:
+            fields.update(status=Job.Status.DONE, last_error="")
+            result = "done"
+        elif handler is not None and job.attempts < job.max_attempts:
+            backoff = getattr(settings, "JOBS_RETRY_BACKOFF", 5) * 2 ** (job.attempts - 1)
+            fields.update(status=Job.Status.PENDING, run_after=now + timedelta(seconds=backoff), last_error=error)
+            result = "retry"
+        else:
+            fields.update(status=Job.Status.FAILED, last_error=error)
+            result = "failed"
+
+        Job.objects.filter(pk=job.pk).update(**fields)
+        record_job(job.name, result, elapsed)
+        return result
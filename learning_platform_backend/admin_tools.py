@@ -0,0 +1,91 @@
+"""
+Base para changelists del admin sobre tablas grandes (matrículas, intentos,
+feedback).
+
+- EstimatedCountPaginator: sin filtros, el total sale de pg_class.reltuples
+  (estadística de ANALYZE; en una tabla particionada, la suma de sus
+  particiones) en vez de un COUNT(*) sobre millones de filas.
+  Con filtros, o en otros motores, cuenta exacto.
+- LargeTableAdmin: paginador anterior, sin el segundo COUNT(*) del total
+  (show_full_result_count) y búsqueda por igualdad sobre columnas indexadas:
+  un número busca por id y FKs, un texto por username exacto. El icontains por
+  defecto del admin (LIKE '%x%') recorre la tabla entera.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where:
+            estimate = estimated_row_count(qs.model, qs.db)
+            if estimate is not None and estimate >= getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100_000):
+                return estimate
+        return super().count
+
+
+def estimated_row_count(model, using="default"):
+    """Filas según las estadísticas de Postgres, o None si no hay estimación."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        # El padre de una tabla particionada (Submission, ver
+        # enrollments.partitions) no guarda filas: su reltuples queda en -1 y
+        # la estimación es la suma de sus particiones. -1 en una partición es
+        # que nunca se analizó; se ignora salvo que ninguna tenga estadística.
+        cursor.execute(
+            """
+            SELECT c.reltuples::bigint, p.partrelid IS NOT NULL,
+                   (SELECT sum(pc.reltuples)::bigint FROM pg_inherits i
+                    JOIN pg_class pc ON pc.oid = i.inhrelid
+                    WHERE i.inhparent = c.oid AND pc.reltuples >= 0)
+            FROM pg_class c LEFT JOIN pg_partitioned_table p ON p.partrelid = c.oid
+            WHERE c.oid = to_regclass(%s)
+            """,
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    estimate, partitioned, partitions = row
+    if partitioned:
+        return partitions
+    # -1: tabla nunca analizada
+    return estimate if estimate >= 0 else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    # Campos comparados con un término numérico (id, FKs: todos con índice)
+    search_id_fields = ("id",)
+    # Campos comparados por igualdad con un término de texto (índice único / FK)
+    search_exact_fields = ()
+    # Solo para que el admin muestre el cuadro; la búsqueda es get_search_results
+    search_fields = ("=id",)
+    search_help_text = "Id numérico (propio o de usuario/curso/quiz) o username exacto."
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        q = Q()
+        if term.isdigit():
+            for field in self.search_id_fields:
+                q |= Q(**{field: int(term)})
+        else:
+            for field in self.search_exact_fields:
+                q |= Q(**{field: term})
+        if not q:
+            return queryset.none(), False
+        return queryset.filter(q), False
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform_backend.settings')
+# Stack de middleware 100% async (sin WhiteNoise); ver settings.ASGI_MODE.
+# Servir con: uvicorn learning_platform_backend.asgi:application --workers N
+os.environ.setdefault('DJANGO_ASGI_MODE', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,54 @@
+"""
+Utilidades para las vistas async de solo lectura (montadas bajo /api/async/).
+
+DRF no soporta vistas async, así que estas vistas son vistas Django `async def`
+que reutilizan los serializers de DRF sobre instancias ya cargadas (sin acceso
+lazy a la BD) y responden con el mismo JSON que sus equivalentes síncronas.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+
+from users.authentication import CachedJWTAuthentication
+from users.principal import principal_for_user
+
+
+class AsyncAuthError(Exception):
+    """Token inválido: la vista responde 401 con el mismo cuerpo que DRF."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.data = data
+
+    def response(self):
+        return json_response(self.data, status=401)
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def error_response(detail, status):
+    return json_response({"detail": detail}, status=status)
+
+
+def _resolve_principal(request):
+    # Igual que DEFAULT_AUTHENTICATION_CLASSES: JWT y, si no hay, la sesión
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException as exc:
+        data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        raise AsyncAuthError(data)
+    user = result[0] if result else request.user
+    principal = principal_for_user(user)
+    request._principal = principal
+    return principal
+
+
+async def aget_principal(request):
+    """
+    Principal de la request (ver users.principal). La autenticación y la
+    relación instructor_profile se resuelven en un hilo: son código síncrono.
+    """
+    return await sync_to_async(_resolve_principal)(request)
@@ -0,0 +1,18 @@
+"""
+Rutas de lectura async, espejo de las rutas síncronas bajo /api/async/.
+Pensadas para servirse con un servidor ASGI (ver asgi.py).
+"""
+from django.urls import path
+
+from courses import async_views as courses_views
+from enrollments import async_views as enrollments_views
+from feedback import async_views as feedback_views
+
+urlpatterns = [
+    path("courses/courses/", courses_views.course_list, name="async-course-list"),
+    path("courses/courses/<int:pk>/", courses_views.course_detail, name="async-course-detail"),
+    path("courses/student-modules/", courses_views.student_course_modules, name="async-student-course-modules"),
+    path("courses/student-lessons/", courses_views.student_course_lessons, name="async-student-course-lessons"),
+    path("enrollments/enrollments/my/", enrollments_views.my_enrollments, name="async-enrollment-my"),
+    path("feedback/ratings/summary/", feedback_views.rating_summary, name="async-rating-summary"),
+]
@@ -0,0 +1,60 @@
+"""
+System checks sobre la caché compartida.
+
+Idempotency-Key (idempotency.py), los límites de tasa (throttling.py) y el lock
+single-flight de la caché de respuestas (response_cache.py) se coordinan entre
+workers con cache.add y cache.incr. Eso solo es correcto si la caché es
+compartida y esas operaciones son atómicas: Redis (o memcached). Con locmem
+cada proceso tiene su copia (dos workers aceptan la misma clave y cada límite
+se multiplica por el número de workers); FileBasedCache y DatabaseCache son
+compartidas, pero add/incr son leer-y-escribir sin lock.
+
+En desarrollo (locmem, un proceso) el aviso es esperable; en producción,
+CACHE_BACKEND=redis.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends que no comparten datos entre procesos
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# Compartidos y con add/incr atómicos
+ATOMIC_SHARED_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+)
+
+
+@register()
+def check_atomic_cache(app_configs, **kwargs):
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend in ATOMIC_SHARED_BACKENDS:
+        return []
+
+    users = ["Idempotency-Key"]
+    if getattr(settings, "RATE_LIMIT_ENABLED", True):
+        users.append("RATE_LIMIT_ENABLED")
+    if getattr(settings, "RESPONSE_CACHE_ENABLED", False):
+        users.append("RESPONSE_CACHE_ENABLED (single-flight)")
+    hint = "Usar CACHE_BACKEND=redis en producción."
+
+    if backend in PER_PROCESS_BACKENDS:
+        return [
+            Warning(
+                f"{', '.join(users)} usan una caché por proceso ({backend}): con varios workers "
+                "una misma Idempotency-Key se acepta en cada uno y los límites se multiplican.",
+                hint=hint,
+                id="learning_platform_backend.W001",
+            )
+        ]
+    return [
+        Warning(
+            f"{', '.join(users)} necesitan cache.add/cache.incr atómicos y {backend} no los garantiza.",
+            hint=hint,
+            id="learning_platform_backend.W002",
+        )
+    ]
@@ -0,0 +1,133 @@
+"""
+Enrutado de lecturas a réplicas (DATABASE_REPLICAS).
+
+ReplicaReadMiddleware marca las requests de la API con método seguro
+(GET/HEAD/OPTIONS) para que ReplicaRouter envíe sus lecturas a una réplica;
+todo lo demás (escrituras, admin, requests no seguras) usa `default`.
+
+Read-your-writes: tras una request no segura de un usuario autenticado se
+guarda en caché una marca con TTL REPLICA_STICKY_SECONDS; mientras exista, sus
+lecturas siguen yendo al primario. La marca vive en la caché `default`, que
+debe ser compartida entre workers para que esto funcione en producción.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_read_alias = ContextVar("replica_read_alias", default=None)
+
+
+def pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Las lecturas de este usuario van al primario durante REPLICA_STICKY_SECONDS."""
+    ttl = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+    if user_id is not None and ttl > 0:
+        cache.set(pin_key(user_id), True, ttl)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(pin_key(user_id)) is not None
+
+
+def choose_replica():
+    replicas = getattr(settings, "DATABASE_REPLICAS", [])
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+    """Lecturas a la réplica elegida para la request en curso; escrituras a `default`."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas tienen los mismos datos que el primario
+        aliases = {PRIMARY, *getattr(settings, "DATABASE_REPLICAS", [])}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def _request_user_id(request):
+    """
+    Id del usuario sin tocar la BD: la sesión si la hay; si no, el claim del JWT
+    (solo se verifica la firma). Un token inválido cuenta como anónimo: la vista
+    responderá 401 igualmente.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header is not None else None
+    if raw is None:
+        return None
+    try:
+        return auth.get_validated_token(raw).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ReplicaReadMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_alias.set(self._read_alias_for(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self._after(request)
+        return response
+
+    async def __acall__(self, request):
+        # La sesión y la caché son síncronas
+        token = _read_alias.set(await sync_to_async(self._read_alias_for)(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        await sync_to_async(self._after)(request)
+        return response
+
+    def _read_alias_for(self, request):
+        if request.method not in SAFE_METHODS or not request.path.startswith("/api/"):
+            return None
+        if not getattr(settings, "DATABASE_REPLICAS", []):
+            return None
+        if is_pinned(_request_user_id(request)):
+            return None
+        return choose_replica()
+
+    def _after(self, request):
+        if request.method in SAFE_METHODS:
+            return
+        # DRF deja en la HttpRequest el usuario autenticado por la vista
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
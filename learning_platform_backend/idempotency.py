@@ -0,0 +1,116 @@
+"""
+Soporte de la cabecera Idempotency-Key para acciones de escritura.
+
+@idempotent("scope") envuelve el handler: la primera request con una clave
+reserva la entrada en la caché compartida (cache.add) por
+IDEMPOTENCY_PENDING_TTL, ejecuta la vista y guarda status + cuerpo renderizado
+durante IDEMPOTENCY_TTL. Los reintentos con
+la misma clave (por usuario) reciben esa respuesta sin volver a ejecutar la
+vista, con la cabecera Idempotent-Replayed: true.
+
+- Misma clave con otro cuerpo: 422.
+- Misma clave mientras la primera sigue en curso: 409. Si el worker muere a
+  mitad (timeout, OOM) la reserva caduca sola con IDEMPOTENCY_PENDING_TTL.
+- Errores 5xx o excepciones: no se guardan; el cliente puede reintentar.
+Sin cabecera, la acción se comporta como siempre.
+
+La reserva depende de que cache.add sea atómico y compartido entre workers:
+requiere Redis (ver checks.check_atomic_cache).
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PENDING = "pending"
+
+
+def idempotency_cache_key(scope, user_id, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"idem:{scope}:{user_id}:{digest}"
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(entry):
+    response = HttpResponse(entry["body"], status=entry["status"], content_type=entry["content_type"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(scope):
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"{HEADER} demasiado larga (máx. {MAX_KEY_LENGTH})."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            cache_key = idempotency_cache_key(scope, request.user.pk, key)
+            fingerprint = _fingerprint(request)
+            ttl = getattr(settings, "IDEMPOTENCY_TTL", 3600)
+            pending_ttl = getattr(settings, "IDEMPOTENCY_PENDING_TTL", 30)
+
+            if not cache.add(cache_key, {"state": PENDING, "fingerprint": fingerprint}, pending_ttl):
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    if entry["fingerprint"] != fingerprint:
+                        return Response(
+                            {"detail": f"{HEADER} ya usada con otro cuerpo."},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        )
+                    if entry["state"] == PENDING:
+                        return Response(
+                            {"detail": f"Hay una request con esta {HEADER} en curso."},
+                            status=status.HTTP_409_CONFLICT,
+                        )
+                    return _replay(entry)
+                # Expiró entre add() y get(): se trata como primera request
+                cache.set(cache_key, {"state": PENDING, "fingerprint": fingerprint}, pending_ttl)
+
+            try:
+                response = handler(view, request, *args, **kwargs)
+            except Exception:
+                cache.delete(cache_key)
+                raise
+
+            if response.status_code >= 500 or not isinstance(response, Response):
+                cache.delete(cache_key)
+                return response
+
+            renderer = request.accepted_renderer
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            body = renderer.render(response.data, request.accepted_media_type, view.get_renderer_context())
+            cache.set(
+                cache_key,
+                {
+                    "state": "done",
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "body": body,
+                    "content_type": content_type,
+                },
+                ttl,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,78 @@
+"""
+LRU en memoria del proceso, acotado por bytes, para respuestas ya codificadas.
+
+Es el primer nivel de @cache_response(local=True): cada worker de gunicorn
+guarda aquí los cuerpos JSON más pedidos y se ahorra el viaje a la caché
+compartida y la deserialización. La coherencia entre workers no depende del
+TTL: las claves incluyen las versiones de grupo, que se leen de la caché
+compartida en cada request (ver response_cache.get_versions).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LocalLRU:
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, nbytes):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        self.size -= self._entries.pop(key)[2]
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def local_cache():
+    """LRU del proceso, creada con RESPONSE_CACHE_LOCAL_MAX_BYTES / _TTL."""
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                _local = LocalLRU(
+                    getattr(settings, "RESPONSE_CACHE_LOCAL_MAX_BYTES", 32 * 1024 * 1024),
+                    getattr(settings, "RESPONSE_CACHE_LOCAL_TTL", 60),
+                )
+    return _local
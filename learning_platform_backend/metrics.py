@@ -0,0 +1,193 @@
+"""
+Métricas de runtime en formato Prometheus.
+
+MetricsMiddleware registra por vista (nombre de la ruta): contador de requests,
+histograma de latencia, histograma de queries SQL por request y excepciones.
+record_cache() alimenta el ratio de aciertos de caché y record_job() las
+métricas de la cola de jobs (jobs.worker).
+
+Con varios workers de gunicorn, definir PROMETHEUS_MULTIPROC_DIR: cada proceso
+escribe sus valores en archivos mmap de ese directorio y GET /metrics los agrega
+(ver gunicorn.conf.py para la limpieza del directorio).
+"""
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNRESOLVED = "<unresolved>"
+
+REQUESTS = Counter(
+    "lms_http_requests_total",
+    "Requests HTTP por vista, método y status.",
+    ["view", "method", "status"],
+)
+LATENCY = Histogram(
+    "lms_http_request_duration_seconds",
+    "Latencia de requests HTTP por vista.",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    "lms_db_queries_per_request",
+    "Queries SQL ejecutadas por request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+EXCEPTIONS = Counter(
+    "lms_http_exceptions_total",
+    "Excepciones no manejadas por vista.",
+    ["view", "exception"],
+)
+JOBS = Counter(
+    "lms_jobs_total",
+    "Ejecuciones de jobs en segundo plano por job y resultado (done/retry/failed).",
+    ["job", "result"],
+)
+JOB_DURATION = Histogram(
+    "lms_job_duration_seconds",
+    "Duración de los jobs en segundo plano.",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+CACHE_REQUESTS = Counter(
+    "lms_cache_requests_total",
+    "Lecturas de caché por caché y resultado (hit/miss).",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache_name, hit):
+    CACHE_REQUESTS.labels(cache_name, "hit" if hit else "miss").inc()
+
+
+def record_job(name, result, seconds):
+    JOBS.labels(name, result).inc()
+    JOB_DURATION.labels(name).observe(seconds)
+
+
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match.route or UNRESOLVED
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._enabled(request):
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with self._count_queries(counter):
+            response = self.get_response(request)
+        self._observe(request, response, counter, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self._enabled(request):
+            return await self.get_response(request)
+
+        # Las conexiones son por hilo y el ORM async ejecuta las queries en el
+        # hilo de sync_to_async (thread_sensitive: uno por request en ASGI). El
+        # contador se instala y se quita en ese hilo; en el del event loop no
+        # vería ninguna query.
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        stack = await sync_to_async(self._count_queries)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self._observe(request, response, counter, time.perf_counter() - start)
+        return response
+
+    def _enabled(self, request):
+        return getattr(settings, "METRICS_ENABLED", False) and request.path != "/metrics"
+
+    def _count_queries(self, counter):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        return stack
+
+    def _observe(self, request, response, counter, elapsed):
+        view = _view_label(request)
+        REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+        LATENCY.labels(view, request.method).observe(elapsed)
+        DB_QUERIES.labels(view).observe(counter.count)
+
+    def process_exception(self, request, exception):
+        if getattr(settings, "METRICS_ENABLED", False):
+            EXCEPTIONS.labels(_view_label(request), type(exception).__name__).inc()
+        return None
+
+
+def _metrics_allowed(request):
+    """
+    Acceso a /metrics: IP en METRICS_ALLOWED_IPS o cabecera
+    `Authorization: Bearer <METRICS_TOKEN>`. Sin ninguna de las dos
+    configuradas se deniega siempre.
+    """
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", None) or ()
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if allowed_ips and request.META.get("REMOTE_ADDR") in allowed_ips:
+        return True
+    if token:
+        return constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+    return False
+
+
+def metrics_view(request):
+    """
+    GET /metrics (interno). Solo para las IPs de METRICS_ALLOWED_IPS o quien
+    presente METRICS_TOKEN; sin ninguno configurado responde 403.
+    """
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,172 @@
+"""
+Perfilado bajo demanda para usuarios staff.
+
+Cualquier request de la API acepta ``?__profile=cpu`` o ``?__profile=sql``:
+- cpu: ejecuta la vista bajo cProfile y devuelve las funciones más costosas.
+- sql: captura cada sentencia SQL con su duración y la línea del proyecto que la originó.
+
+Si PROFILING_REPORT_DIR está configurado, el reporte se guarda en disco y la
+respuesta original se devuelve con la cabecera X-Profile-Report; si no, el
+reporte reemplaza el cuerpo de la respuesta.
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+import traceback
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException
+
+from users.authentication import CachedJWTAuthentication
+
+PROFILE_PARAM = "__profile"
+PROFILE_MODES = ("cpu", "sql")
+
+
+def _resolve_user(request):
+    """
+    Los endpoints DRF autentican con JWT dentro de la vista, así que aquí
+    request.user solo refleja la sesión. Si no hay sesión, probamos el token.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+def _project_frame(stack):
+    """Primer frame (desde la vista hacia afuera) que pertenece al código del proyecto."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(stack):
+        filename = frame.filename
+        if filename.startswith(base_dir) and "site-packages" not in filename and not filename.endswith("profiling.py"):
+            return f"{Path(filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class SQLCapture:
+    """execute_wrapper que registra sql, duración y origen de cada query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "duration_ms": round(duration_ms, 3),
+                    "origin": _project_frame(traceback.extract_stack()[:-1]),
+                }
+            )
+
+    def report(self):
+        return {
+            "count": len(self.queries),
+            "total_ms": round(sum(q["duration_ms"] for q in self.queries), 3),
+            "queries": self.queries,
+        }
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        mode = request.GET.get(PROFILE_PARAM)
+        if (
+            mode not in PROFILE_MODES
+            or not getattr(settings, "PROFILING_ENABLED", False)
+            or not self._is_staff(request)
+        ):
+            return self.get_response(request)
+
+        if mode == "cpu":
+            response, report, content_type = self._profile_cpu(request)
+        else:
+            response, report, content_type = self._profile_sql(request)
+
+        report_dir = getattr(settings, "PROFILING_REPORT_DIR", None)
+        if report_dir:
+            name = self._store(report_dir, mode, report, content_type)
+            response["X-Profile-Report"] = name
+            return response
+
+        if content_type == "application/json":
+            report_response = JsonResponse(report)
+        else:
+            report_response = HttpResponse(report, content_type=content_type)
+        report_response["X-Profile-Status"] = str(response.status_code)
+        return report_response
+
+    async def __acall__(self, request):
+        # Bajo ASGI el perfil se toma en modo síncrono (la vista se adapta con
+        # async_to_sync): sirve igual para ver queries y tiempos de la vista.
+        if request.GET.get(PROFILE_PARAM) not in PROFILE_MODES or not getattr(settings, "PROFILING_ENABLED", False):
+            return await self.get_response(request)
+        return await sync_to_async(self._sync_profile)(request)
+
+    def _sync_profile(self, request):
+        sync_self = ProfilingMiddleware(async_to_sync(self.get_response))
+        return sync_self(request)
+
+    def _is_staff(self, request):
+        user = _resolve_user(request)
+        return bool(user and user.is_authenticated and user.is_staff)
+
+    def _profile_cpu(self, request):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(getattr(settings, "PROFILING_CPU_LIMIT", 50))
+        return response, out.getvalue(), "text/plain; charset=utf-8"
+
+    def _profile_sql(self, request):
+        capture = SQLCapture()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(capture))
+            response = self.get_response(request)
+        return response, capture.report(), "application/json"
+
+    def _store(self, report_dir, mode, report, content_type):
+        path = Path(report_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        ext = "json" if content_type == "application/json" else "txt"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{mode}-{uuid.uuid4().hex[:8]}.{ext}"
+        body = json.dumps(report, indent=2) if ext == "json" else report
+        (path / name).write_text(body, encoding="utf-8")
+        return name
+
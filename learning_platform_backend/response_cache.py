@@ -0,0 +1,214 @@
+"""
+Caché de respuestas por vista para DRF.
+
+@cache_response envuelve un handler (list, get, ...) y guarda el cuerpo
+renderizado de las respuestas 200 en la caché RESPONSE_CACHE_ALIAS y,
+opcionalmente, en una LRU del proceso (local_cache). La clave combina:
+
+- el namespace de la vista,
+- la ruta y la query string (ordenada),
+- la "audiencia" del principal (vary_on), no el usuario concreto: p. ej.
+  anónimos y alumnos ven el mismo catálogo y comparten entrada,
+- las versiones de los grupos de datos de los que depende la respuesta
+  (versions). bump_version() invalida de golpe todas las entradas de un grupo
+  sin tener que conocer sus claves; se llama desde las señales de los modelos.
+  drop_stale() hace lo mismo con las copias de respaldo de single_flight.
+
+Los permisos de la vista (has_permission) se evalúan antes del handler, así que
+un hit nunca se salta los permisos.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from users.principal import get_principal
+from .local_cache import local_cache
+from .metrics import record_cache
+
+VERSION_PREFIX = "rc:v:"
+STALE_VERSION_PREFIX = "rc:sv:"
+KEY_PREFIX = "rc:"
+
+
+def response_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def audience(p):
+    """
+    Audiencia para vistas cuyo resultado depende solo de la visibilidad de
+    cursos (ver courses.visibility.visible_courses).
+    """
+    if p.is_staff:
+        return "staff"
+    if p.is_instructor:
+        return f"instructor:{p.instructor_profile_id}"
+    return "public"
+
+
+def everyone(p):
+    """Para vistas cuya respuesta no depende de quién pregunta."""
+    return "all"
+
+
+def _seed_version():
+    # Tras un flush de la caché compartida las versiones arrancan en un valor
+    # nuevo: las entradas que sigan en las LRU locales no pueden volver a coincidir.
+    return time.time_ns() // 1000
+
+
+def get_versions(groups, prefix=VERSION_PREFIX):
+    """Versión actual de cada grupo (se inicializa si no existe)."""
+    if not groups:
+        return []
+    cache = response_cache()
+    keys = [f"{prefix}{g}" for g in groups]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _seed_version(), None)
+            found[key] = cache.get(key)
+    return [found[k] for k in keys]
+
+
+def bump_version(*groups, prefix=VERSION_PREFIX):
+    cache = response_cache()
+    for group in groups:
+        key = f"{prefix}{group}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed_version(), None)
+
+
+def drop_stale(*groups):
+    """
+    Descarta las copias "stale" de single_flight de estos grupos. bump_version
+    no las toca a propósito (sobreviven a las ediciones); esto es para cuando
+    el contenido deja de poder mostrarse (despublicado, borrado).
+    """
+    bump_version(*groups, prefix=STALE_VERSION_PREFIX)
+
+
+def response_cache_key(namespace, request, variant, versions):
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.lists()))
+    raw = f"{request.path}?{query}|{variant}|{','.join(map(str, versions))}"
+    return f"{KEY_PREFIX}{namespace}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _cached_response(body, renderer, tier, state="HIT"):
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f"{content_type}; charset={renderer.charset}"
+    response = HttpResponse(body, content_type=content_type)
+    response["X-Cache"] = state
+    response["X-Cache-Tier"] = tier
+    return response
+
+
+def cache_response(namespace, timeout=None, vary_on=audience, versions=None, local=False, single_flight=False):
+    """
+    Decorador para handlers de vistas DRF.
+
+    namespace: nombre corto de la vista (también etiqueta de métricas).
+    timeout: segundos; por defecto RESPONSE_CACHE_TIMEOUT.
+    vary_on: función Principal -> str con la audiencia.
+    versions: función (request, **kwargs de la URL) -> lista de grupos de versión.
+    local: añade la LRU del proceso (local_cache) delante de la compartida.
+    single_flight: ante un miss, solo quien consigue el lock de la clave
+        reconstruye; el resto sirve la última versión conocida (X-Cache: STALE)
+        o espera hasta RESPONSE_CACHE_SINGLE_FLIGHT_WAIT segundos a que aparezca
+        la nueva. Evita que cientos de requests reconstruyan a la vez el mismo
+        recurso cuando se invalida.
+
+    Se guarda el cuerpo ya renderizado: un hit no vuelve a serializar. Solo se
+    cachean respuestas JSON; el browsable API pasa directo al handler.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            renderer = request.accepted_renderer
+            if not getattr(settings, "RESPONSE_CACHE_ENABLED", True) or renderer.format != "json":
+                return handler(view, request, *args, **kwargs)
+
+            cache = response_cache()
+            groups = versions(request, **kwargs) if versions else []
+            variant = vary_on(get_principal(request))
+            key = response_cache_key(namespace, request, variant, get_versions(groups))
+
+            if local:
+                body = local_cache().get(key)
+                record_cache(f"{namespace}:local", body is not None)
+                if body is not None:
+                    return _cached_response(body, renderer, "local")
+
+            body = cache.get(key)
+            record_cache(namespace, body is not None)
+            if body is not None:
+                if local:
+                    local_cache().set(key, body, len(body))
+                return _cached_response(body, renderer, "shared")
+
+            # Con las versiones "stale" de los grupos, no las normales: sobrevive
+            # a bump_version pero no a drop_stale
+            stale_key = None
+            if single_flight:
+                stale_versions = get_versions(groups, prefix=STALE_VERSION_PREFIX)
+                stale_key = response_cache_key(namespace, request, variant, ["stale", *stale_versions])
+
+            def build():
+                try:
+                    response = handler(view, request, *args, **kwargs)
+                except Exception:
+                    # Http404/PermissionDenied salen como excepción hacia DRF
+                    if stale_key:
+                        cache.delete(stale_key)
+                    raise
+                if isinstance(response, Response) and response.status_code == 200:
+                    body = renderer.render(response.data, request.accepted_media_type, view.get_renderer_context())
+                    ttl = timeout if timeout is not None else getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+                    cache.set(key, body, ttl)
+                    if stale_key:
+                        cache.set(stale_key, body, getattr(settings, "RESPONSE_CACHE_STALE_TIMEOUT", 3600))
+                    if local:
+                        local_cache().set(key, body, len(body))
+                elif stale_key:
+                    # Cualquier otra respuesta: la copia vieja ya no debe servirse a nadie
+                    cache.delete(stale_key)
+                response["X-Cache"] = "MISS"
+                return response
+
+            if not single_flight:
+                return build()
+
+            lock_key = f"{key}:lock"
+            if cache.add(lock_key, 1, getattr(settings, "RESPONSE_CACHE_LOCK_TIMEOUT", 10)):
+                try:
+                    return build()
+                finally:
+                    cache.delete(lock_key)
+
+            # Otro worker está reconstruyendo esta clave
+            stale = cache.get(stale_key)
+            if stale is not None:
+                return _cached_response(stale, renderer, "shared", state="STALE")
+
+            deadline = time.monotonic() + getattr(settings, "RESPONSE_CACHE_SINGLE_FLIGHT_WAIT", 2.0)
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                body = cache.get(key)
+                if body is not None:
+                    return _cached_response(body, renderer, "shared")
+                if cache.get(lock_key) is None:
+                    break  # terminó sin cachear (p. ej. 404): resolvemos nosotros
+            return build()
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -7,6 +7,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Subidas reanudables de archivos de lección (courses.uploads)
+LESSON_UPLOAD_TEMP_DIR = config("LESSON_UPLOAD_TEMP_DIR", default=str(MEDIA_ROOT / "uploads_tmp"))
+LESSON_UPLOAD_MAX_CHUNK = config("LESSON_UPLOAD_MAX_CHUNK", default=8 * 1024 * 1024, cast=int)
+LESSON_UPLOAD_MAX_SIZE = config("LESSON_UPLOAD_MAX_SIZE", default=500 * 1024 * 1024, cast=int)
+# Subidas sin partes nuevas en este plazo: las borra gc_lesson_blobs
+LESSON_UPLOAD_EXPIRY_HOURS = config("LESSON_UPLOAD_EXPIRY_HOURS", default=24, cast=float)
+
 # Seguridad / entorno
 SECRET_KEY = config("SECRET_KEY", default="django-insecure-change-me")
 DEBUG = config("DEBUG", default=True, cast=bool)
@@ -41,6 +48,8 @@ INSTALLED_APPS = [
     "courses",
     "enrollments",
     "feedback",
+    "jobs",
+    "outbox",
 ]
 
 MIDDLEWARE = [
@@ -50,8 +59,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "learning_platform_backend.db_router.ReplicaReadMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "learning_platform_backend.profiling.ProfilingMiddleware",
 ]
 
 AUTH_USER_MODEL = "users.User"
@@ -86,6 +97,27 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura (opcional): DB_REPLICA_HOSTS=host1,host2. Los GET de la
+# API leen de una réplica salvo que el usuario haya escrito hace menos de
+# REPLICA_STICKY_SECONDS (ver learning_platform_backend/db_router.py).
+DB_REPLICA_HOSTS = config("DB_REPLICA_HOSTS", default="", cast=Csv())
+for i, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f"replica_{i}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica_")]
+DATABASE_ROUTERS = ["learning_platform_backend.db_router.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+
+# Particionado mensual opcional (solo Postgres) de Submission:
+# DB_PARTITIONED_TABLES=submission y `manage_partitions --convert` en una
+# ventana de mantenimiento. Ver enrollments/partitions.py.
+DB_PARTITIONED_TABLES = config("DB_PARTITIONED_TABLES", default="", cast=Csv())
+DB_PARTITION_MONTHS_AHEAD = config("DB_PARTITION_MONTHS_AHEAD", default=3, cast=int)
+SUBMISSION_ARCHIVE_DIR = config("SUBMISSION_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -95,14 +127,119 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+# WhiteNoise es solo síncrono: bajo ASGI (ver asgi.py) forzaría a Django a
+# adaptar cada request a un hilo, así que ahí los estáticos se sirven aparte.
+ASGI_MODE = config("DJANGO_ASGI_MODE", default=False, cast=bool)
+if not ASGI_MODE:
+    MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+
+# Perfilado bajo demanda (?__profile=cpu|sql), solo para staff. Apagado salvo
+# que se active explícitamente en el entorno.
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_REPORT_DIR = config("PROFILING_REPORT_DIR", default=None)
+PROFILING_CPU_LIMIT = config("PROFILING_CPU_LIMIT", default=50, cast=int)
+
+# Métricas Prometheus en /metrics (multiproceso vía PROMETHEUS_MULTIPROC_DIR).
+# El endpoint responde 403 salvo a las IPs de METRICS_ALLOWED_IPS o a quien
+# envíe "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="", cast=Csv())
+METRICS_TOKEN = config("METRICS_TOKEN", default=None)
+MIDDLEWARE.insert(0, "learning_platform_backend.metrics.MetricsMiddleware")
+
+# Cachés. CACHE_BACKEND=locmem (desarrollo, por proceso), file (compartida
+# entre los workers de un host) o redis (compartida entre hosts; requiere el
+# paquete redis y CACHE_LOCATION=redis://host:6379/1). En producción, redis:
+# Idempotency-Key, los límites de tasa y el single-flight necesitan add/incr
+# atómicos y compartidos (check learning_platform_backend.W001/W002).
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_DEFAULT_LOCATIONS = {
+    "locmem": "lms-default",
+    "file": str(BASE_DIR / ".cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": config("CACHE_LOCATION", default=CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
+        "KEY_PREFIX": "lms",
+    }
+}
+
+# Caché de respuestas por vista (@cache_response)
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+# Primer nivel en memoria de cada worker (@cache_response(local=True))
+RESPONSE_CACHE_LOCAL_MAX_BYTES = config("RESPONSE_CACHE_LOCAL_MAX_BYTES", default=32 * 1024 * 1024, cast=int)
+RESPONSE_CACHE_LOCAL_TTL = config("RESPONSE_CACHE_LOCAL_TTL", default=60, cast=int)
+# Single-flight (@cache_response(single_flight=True)): lock de reconstrucción,
+# espera máxima de los demás y vida de la copia "stale" que se sirve mientras tanto
+RESPONSE_CACHE_LOCK_TIMEOUT = config("RESPONSE_CACHE_LOCK_TIMEOUT", default=10, cast=int)
+RESPONSE_CACHE_SINGLE_FLIGHT_WAIT = config("RESPONSE_CACHE_SINGLE_FLIGHT_WAIT", default=2.0, cast=float)
+RESPONSE_CACHE_STALE_TIMEOUT = config("RESPONSE_CACHE_STALE_TIMEOUT", default=3600, cast=int)
+
+# Caché del usuario autenticado (segundos). Solo con una caché compartida entre
+# procesos: con locmem la invalidación no llegaría a los demás workers.
+AUTH_USER_CACHE_ENABLED = config("AUTH_USER_CACHE_ENABLED", default=CACHE_BACKEND != "locmem", cast=bool)
+AUTH_USER_CACHE_TTL = config("AUTH_USER_CACHE_TTL", default=60, cast=int)
+
+# Resumen de ratings por curso en caché (/api/feedback/ratings/summary/)
+RATING_SUMMARY_TTL = config("RATING_SUMMARY_TTL", default=300, cast=int)
+
+# Exportaciones en streaming (filas por fetch del cursor)
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Límites por acción de escritura (ver learning_platform_backend/throttling.py)
+    "DEFAULT_THROTTLE_RATES": {
+        "enroll": config("RATE_LIMIT_ENROLL", default="30/min"),
+        "complete": config("RATE_LIMIT_COMPLETE", default="120/min"),
+        "submit": config("RATE_LIMIT_SUBMIT", default="30/min"),
+        "rate": config("RATE_LIMIT_RATE", default="20/min"),
+        "comment": config("RATE_LIMIT_COMMENT", default="20/min"),
+        "register": config("RATE_LIMIT_REGISTER", default="10/hour"),
+    },
 }
+
+RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+
+# Cola de jobs en la BD (python manage.py jobs_worker)
+JOBS_LOCK_TIMEOUT = config("JOBS_LOCK_TIMEOUT", default=300, cast=int)
+JOBS_RETRY_BACKOFF = config("JOBS_RETRY_BACKOFF", default=5, cast=int)
+
+# Outbox de eventos (python manage.py relay_outbox). Sinks al estilo de CACHES;
+# OUTBOX_HTTP_URL añade un HTTPSink además del archivo NDJSON local.
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=500, cast=int)
+OUTBOX_SINKS = [
+    {
+        "BACKEND": "outbox.sinks.NDJSONFileSink",
+        "OPTIONS": {"path": config("OUTBOX_NDJSON_PATH", default=str(BASE_DIR / "outbox.ndjson"))},
+    },
+]
+OUTBOX_HTTP_URL = config("OUTBOX_HTTP_URL", default=None)
+if OUTBOX_HTTP_URL:
+    OUTBOX_SINKS.append({"BACKEND": "outbox.sinks.HTTPSink", "OPTIONS": {"url": OUTBOX_HTTP_URL}})
+
+# Admin: sin filtros, las tablas con más filas que esto muestran el total estimado
+# (pg_class.reltuples) en vez de COUNT(*). Ver learning_platform_backend/admin_tools.py.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000, cast=int)
+
+# Respuestas guardadas para reintentos con Idempotency-Key (segundos). La
+# reserva "en curso" dura solo IDEMPOTENCY_PENDING_TTL (el timeout de gunicorn):
+# si el worker muere a mitad, la clave no queda respondiendo 409 una hora.
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=3600, cast=int)
+IDEMPOTENCY_PENDING_TTL = config("IDEMPOTENCY_PENDING_TTL", default=30, cast=int)
@@ -0,0 +1,15 @@
+"""
+Settings para la suite de tests:
+
+    python manage.py test --settings=learning_platform_backend.test_settings
+
+Añade `replica_test`, una segunda base real (no espejo) que los tests del
+router usan como réplica para comprobar qué lecturas llegan a cada base.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES["replica_test"] = {
+    **DATABASES["default"],
+    "TEST": {"NAME": f"test_{DATABASES['default']['NAME']}_replica"},
+}
@@ -0,0 +1,37 @@
+"""
+Ayudas compartidas por los tests de la API (APITestCase) de todas las apps.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from courses.models import Course
+
+User = get_user_model()
+
+
+class APITestHelpersMixin:
+    password = "testpass123"
+
+    def auth_as(self, username, password=None):
+        res = self.client.post(
+            "/api/token/",
+            {"username": username, "password": password or self.password},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + res.data["access"])
+
+    def make_user(self, username, **extra):
+        return User.objects.create_user(username=username, password=self.password, **extra)
+
+    def make_course(self, instructor, estado="publicado", titulo="Curso"):
+        # Los permisos comparan Course.instructor_id contra el id del InstructorProfile
+        return Course.objects.create(
+            instructor_id=instructor.instructor_profile.id,
+            titulo=titulo,
+            descripcion="Descripción",
+            categoria="Tecnología",
+            nivel="Básico",
+            duracion=60,
+            estado=estado,
+        )
@@ -0,0 +1,218 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from courses.models import Course
+from enrollments.models import Enrollment
+from .admin_tools import EstimatedCountPaginator
+from .checks import check_atomic_cache
+from .db_router import ReplicaRouter, pin_key
+from .local_cache import LocalLRU
+from .testing import APITestHelpersMixin
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTests(APITestHelpersMixin, APITestCase):
+    def test_non_staff_flag_is_ignored(self):
+        User.objects.create_user(username="u1", password="testpass123")
+        self.auth_as("u1")
+
+        res = self.client.get("/api/users/users/me/?__profile=sql")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], "u1")
+        self.assertNotIn("X-Profile-Status", res)
+
+    def test_staff_sql_report(self):
+        User.objects.create_user(username="admin1", password="testpass123", role="admin")
+        self.auth_as("admin1")
+
+        res = self.client.get("/api/users/users/?__profile=sql")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Profile-Status"], "200")
+        report = res.json()
+        self.assertGreaterEqual(report["count"], 1)
+        self.assertIn("duration_ms", report["queries"][0])
+
+    def test_staff_cpu_report(self):
+        User.objects.create_user(username="admin2", password="testpass123", role="admin")
+        self.auth_as("admin2")
+
+        res = self.client.get("/api/users/users/me/?__profile=cpu")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("cumulative", res.content.decode())
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        User.objects.create_user(username="admin3", password="testpass123", role="admin")
+        self.auth_as("admin3")
+
+        res = self.client.get("/api/users/users/me/?__profile=sql")
+        self.assertEqual(res.data["username"], "admin3")
+
+
+class MetricsEndpointTests(APITestCase):
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_metrics_exposes_per_view_series(self):
+        self.client.get("/api/users/users/me/")
+
+        res = self.client.get("/metrics")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn('lms_http_requests_total{method="GET",status="401",view="user-me"}', body)
+        self.assertIn("lms_http_request_duration_seconds_bucket", body)
+        self.assertIn("lms_db_queries_per_request_bucket", body)
+
+    async def test_async_request_counts_queries(self):
+        # Sin WhiteNoise (solo sync) la cadena es async y MetricsMiddleware corre
+        # en el event loop; el ORM async consulta desde el hilo de sync_to_async
+        middleware = [m for m in settings.MIDDLEWARE if not m.startswith("whitenoise.")]
+        sample = ("lms_db_queries_per_request_sum", {"view": "async-course-list"})
+        before = REGISTRY.get_sample_value(*sample) or 0
+
+        with self.settings(MIDDLEWARE=middleware):
+            res = await self.async_client.get("/api/async/courses/courses/")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(REGISTRY.get_sample_value(*sample) - before, 0)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_metrics_restricted_by_ip(self):
+        res = self.client.get("/metrics")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN=None)
+    def test_metrics_denied_without_allowlist_or_token(self):
+        res = self.client.get("/metrics")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="s3cret")
+    def test_metrics_with_token(self):
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer nope").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+
+@skipUnless("replica_test" in settings.DATABASES, "requiere --settings=learning_platform_backend.test_settings")
+@override_settings(DATABASE_REPLICAS=["replica_test"], REPLICA_STICKY_SECONDS=30)
+class ReplicaRoutingTests(APITestHelpersMixin, APITestCase):
+    # Dos bases reales: lo escrito en `default` no aparece en la "réplica"
+    databases = {"default", "replica_test"}
+
+    def setUp(self):
+        cache.clear()
+        self.course = self.make_course(self.make_user("inst", role="instructor"))
+        # El alumno ya está replicado; el curso todavía no
+        self.student = self.make_user("stud")
+        self.student.save(using="replica_test", force_insert=True)
+        self.auth_as("stud")
+
+    def test_safe_api_requests_read_from_replica(self):
+        res = self.client.get("/api/courses/courses/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_reads_stick_to_primary_after_write(self):
+        res = self.client.post("/api/enrollments/enrollments/enroll/", {"course_id": self.course.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get("/api/enrollments/enrollments/my/")
+        self.assertEqual([e["course"] for e in res.data], [self.course.id])
+
+        cache.delete(pin_key(self.student.pk))
+        res = self.client.get("/api/enrollments/enrollments/my/")
+        self.assertEqual(res.data, [])
+
+    def test_auth_user_is_read_from_primary(self):
+        # Aún no replicado: autenticar contra la réplica daría 401
+        self.make_user("nuevo", email="nuevo@example.com")
+        self.auth_as("nuevo")
+        res = self.client.get("/api/users/users/me/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], "nuevo")
+
+    def test_router_outside_requests_uses_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Course), "default")
+        self.assertEqual(router.db_for_write(Course), "default")
+
+
+class LocalLRUTests(SimpleTestCase):
+    def test_evicts_least_recently_used_by_bytes(self):
+        lru = LocalLRU(max_bytes=10, ttl=60)
+        lru.set("a", b"aaaa", 4)
+        lru.set("b", b"bbbb", 4)
+        lru.get("a")
+        lru.set("c", b"cccc", 4)
+
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), b"aaaa")
+        self.assertEqual(lru.size, 8)
+
+    def test_expired_and_oversized_entries(self):
+        lru = LocalLRU(max_bytes=10, ttl=0)
+        lru.set("a", b"a", 1)
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 0)
+
+        lru.ttl = 60
+        lru.set("big", b"x" * 11, 11)
+        self.assertIsNone(lru.get("big"))
+
+
+def _cache(backend):
+    return {"default": {"BACKEND": f"django.core.cache.backends.{backend}", "LOCATION": "/tmp/lms-check"}}
+
+
+class AtomicCacheCheckTests(SimpleTestCase):
+    def test_warns_unless_cache_is_shared_and_atomic(self):
+        with override_settings(CACHES=_cache("locmem.LocMemCache")):
+            self.assertEqual([w.id for w in check_atomic_cache(None)], ["learning_platform_backend.W001"])
+        with override_settings(CACHES=_cache("filebased.FileBasedCache")):
+            self.assertEqual([w.id for w in check_atomic_cache(None)], ["learning_platform_backend.W002"])
+        with override_settings(CACHES=_cache("redis.RedisCache")):
+            self.assertEqual(check_atomic_cache(None), [])
+
+
+class LargeTableAdminTests(APITestHelpersMixin, APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username="root", password="testpass123", email="r@x.io")
+        self.client.force_login(self.admin_user)
+        self.course = self.make_course(self.make_user("inst_adm", role="instructor"))
+        self.students = [self.make_user(f"alumno{i}") for i in range(3)]
+        self.enrollments = [Enrollment.objects.create(user=s, course=self.course) for s in self.students]
+
+    def test_search_uses_exact_ids_and_usernames(self):
+        url = "/admin/enrollments/enrollment/"
+        res = self.client.get(url, {"q": "alumno1"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([e.pk for e in res.context["cl"].result_list], [self.enrollments[1].pk])
+
+        res = self.client.get(url, {"q": "alumno"})  # sin LIKE: no hay coincidencias parciales
+        self.assertEqual(len(res.context["cl"].result_list), 0)
+
+        res = self.client.get(url, {"q": str(self.course.id)})
+        self.assertIn(self.enrollments[2].pk, [e.pk for e in res.context["cl"].result_list])
+
+    def test_fk_widgets_are_autocomplete(self):
+        res = self.client.get("/admin/enrollments/submission/add/")
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "admin-autocomplete")
+
+        params = {"app_label": "enrollments", "model_name": "enrollment", "field_name": "user"}
+        # username exacto sin distinguir mayúsculas (user_username_upper_idx), sin prefijos
+        res = self.client.get("/admin/autocomplete/", {**params, "term": "ALUMNO1"})
+        self.assertEqual([r["id"] for r in res.json()["results"]], [str(self.students[1].pk)])
+        res = self.client.get("/admin/autocomplete/", {**params, "term": "alumno"})
+        self.assertEqual(res.json()["results"], [])
+
+    def test_paginator_counts_exactly_without_postgres_stats(self):
+        paginator = EstimatedCountPaginator(Enrollment.objects.order_by("-id"), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
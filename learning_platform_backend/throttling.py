@@ -0,0 +1,94 @@
+"""
+Límites de tasa para los endpoints de escritura.
+
+SlidingWindowRateThrottle aproxima una ventana deslizante con dos contadores de
+ventana fija en la caché compartida: estimado = anterior * (1 - fracción
+transcurrida) + actual. El contador actual se sube con cache.incr, así que el
+caso normal cuesta un incr + un get, sin listas de timestamps como
+SimpleRateThrottle. Requiere Redis: con locmem cada worker cuenta por su lado y
+FileBasedCache no hace incr atómico (ver checks.check_atomic_cache).
+
+Las tasas son por scope, en REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+("30/min", "10/hour", ...). Las vistas asignan scopes por acción con
+ActionRateLimitMixin.throttle_scopes. Al rechazar, DRF responde 429 con
+Retry-After (wait()).
+"""
+import math
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    def __init__(self, scope):
+        self.scope = scope
+        super().__init__()
+        self.wait_seconds = None
+
+    def get_rate(self):
+        # Se lee en cada request (no en la definición de la clase): un scope sin
+        # tasa configurada no limita
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        # Usuario si está autenticado; IP (respetando NUM_PROXIES) si no
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request, view):
+        if not getattr(settings, "RATE_LIMIT_ENABLED", True) or self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = (now % self.duration) / self.duration
+
+        current = self._incr(f"{key}:{window}")
+        if current > self.num_requests:
+            self.wait_seconds = self.duration * (1 - elapsed)
+            return False
+
+        previous = self.cache.get(f"{key}:{window - 1}", 0)
+        if previous * (1 - elapsed) + current > self.num_requests:
+            # El peso de la ventana anterior baja linealmente: esperar hasta que
+            # previous * (1 - f) + current <= num_requests
+            target = 1 - (self.num_requests - current) / previous
+            self.wait_seconds = self.duration * (target - elapsed)
+            return False
+
+        return True
+
+    def _incr(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Primera request de la ventana; add() puede perder la carrera con otro worker
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def wait(self):
+        if self.wait_seconds is None:
+            return None
+        return max(1, math.ceil(self.wait_seconds))
+
+
+class ActionRateLimitMixin:
+    """
+    throttle_scopes = {"<acción>": "<scope>"}: las acciones listadas usan
+    SlidingWindowRateThrottle con la tasa de ese scope; el resto, los
+    throttles por defecto de la vista.
+    """
+
+    throttle_scopes = {}
+
+    def get_throttles(self):
+        scope = self.throttle_scopes.get(self.action)
+        if scope is None:
+            return super().get_throttles()
+        return [SlidingWindowRateThrottle(scope)]
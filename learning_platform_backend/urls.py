@@ -6,9 +6,12 @@ from django.conf.urls.static import static
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .metrics import metrics_view
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
 
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
@@ -19,6 +22,9 @@ urlpatterns = [
     path("api/courses/", include("courses.urls")),
     path("api/enrollments/", include("enrollments.urls")),
     path("api/feedback/", include("feedback.urls")),
+
+    # Lectura async (ASGI)
+    path("api/async/", include("learning_platform_backend.async_urls")),
 ]
 
 # Media en desarrollo: el helper static() solo funciona en DEBUG y con prefijo local (/media/)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "event_type", "aggregate_type", "aggregate_id", "created_at", "published_at", "attempts")
+    list_filter = ("event_type",)
+    search_fields = ("event_type", "aggregate_type")
+    ordering = ("-id",)
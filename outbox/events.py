@@ -0,0 +1,25 @@
+"""
+Registro de eventos en el outbox. Llamar dentro del transaction.atomic() de la
+escritura: el evento existe si y solo si el cambio se confirmó.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import OutboxEvent
+
+LESSON_COMPLETED = "lesson.completed"
+QUIZ_SUBMITTED = "quiz.submitted"
+ENROLLMENT_CREATED = "enrollment.created"
+COURSE_PUBLISHED = "course.published"
+
+
+def record_event(event_type, aggregate_type, aggregate_id, payload):
+    # Fechas/decimales a JSON antes de guardar (JSONField no usa DjangoJSONEncoder)
+    payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+    return OutboxEvent.objects.create(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+    )
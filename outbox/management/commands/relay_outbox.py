@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from outbox.relay import RelayError, purge_published, relay_batch
+from outbox.sinks import load_sinks
+
+
+class Command(BaseCommand):
+    help = "Entrega los eventos pendientes del outbox a los sinks de OUTBOX_SINKS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="Salir cuando no queden eventos pendientes")
+        parser.add_argument("--batch-size", type=int, help="Eventos por lote (por defecto OUTBOX_BATCH_SIZE)")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Segundos de espera sin eventos o tras un fallo")
+        parser.add_argument("--purge-days", type=int, help="Antes de empezar, borrar publicados hace más de N días")
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            deleted = purge_published(timezone.now() - timedelta(days=options["purge_days"]))
+            self.stdout.write(f"Eventos publicados borrados: {deleted}.")
+
+        sinks = load_sinks()
+        batch_size = options["batch_size"] or getattr(settings, "OUTBOX_BATCH_SIZE", 500)
+        total = 0
+        while True:
+            try:
+                sent = relay_batch(sinks, batch_size=batch_size)
+            except RelayError as exc:
+                self.stderr.write(str(exc))
+                if options["burst"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            total += sent
+            if sent == 0:
+                if options["burst"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Eventos entregados: {total}."))
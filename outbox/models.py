@@ -0,0 +1,41 @@
+from django.db import models
+from django.db.models import Q
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento de dominio escrito en la misma transacción que el cambio que lo
+    origina. relay_outbox lo entrega a los sinks configurados (OUTBOX_SINKS)
+    y marca published_at. Entrega al-menos-una-vez: los consumidores
+    deduplican por id.
+    """
+
+    event_type = models.CharField(max_length=50)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.BigIntegerField()
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # El relay solo recorre lo pendiente
+            models.Index(fields=["id"], condition=Q(published_at__isnull=True), name="outbox_pending_idx"),
+            models.Index(fields=["aggregate_type", "aggregate_id"], name="outbox_aggregate_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.aggregate_type}#{self.aggregate_id}"
+
+    def as_message(self):
+        return {
+            "id": self.id,
+            "type": self.event_type,
+            "aggregate_type": self.aggregate_type,
+            "aggregate_id": self.aggregate_id,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat(),
+        }
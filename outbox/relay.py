@@ -0,0 +1,57 @@
+"""
+Relay del outbox: lee eventos pendientes por lotes, los entrega a todos los
+sinks y los marca publicados.
+
+Como jobs.worker, en Postgres el lote se reclama con FOR UPDATE SKIP LOCKED y
+el lock se mantiene mientras se entrega: dos relays no envían el mismo lote.
+Sin SKIP LOCKED (SQLite) se asume un único relay. Si un sink falla, el lote
+entero queda pendiente (los sinks que ya lo recibieron lo recibirán otra vez).
+Para orden estricto por id, correr un solo relay.
+"""
+import traceback
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEvent
+from .sinks import load_sinks
+
+
+class RelayError(Exception):
+    pass
+
+
+def relay_batch(sinks=None, batch_size=500):
+    """Entrega un lote. Devuelve cuántos eventos quedaron publicados."""
+    sinks = load_sinks() if sinks is None else sinks
+
+    with transaction.atomic():
+        pending = OutboxEvent.objects.filter(published_at__isnull=True).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending[:batch_size])
+        if not events:
+            return 0
+
+        messages = [e.as_message() for e in events]
+        ids = [e.id for e in events]
+        try:
+            for sink in sinks:
+                sink.send(messages)
+        except Exception as exc:
+            failure, error = exc, traceback.format_exc()
+        else:
+            OutboxEvent.objects.filter(id__in=ids).update(
+                published_at=timezone.now(), attempts=F("attempts") + 1, last_error=""
+            )
+            return len(ids)
+
+    OutboxEvent.objects.filter(id__in=ids).update(attempts=F("attempts") + 1, last_error=error)
+    raise RelayError(f"Fallo entregando {len(ids)} eventos: {failure}") from failure
+
+
+def purge_published(before):
+    """Borra eventos ya publicados antes de `before`. Devuelve cuántos."""
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=before).delete()
+    return deleted
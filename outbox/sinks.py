@@ -0,0 +1,56 @@
+"""
+Destinos del relay del outbox. Se configuran en OUTBOX_SINKS, al estilo de
+CACHES:
+
+    OUTBOX_SINKS = [
+        {"BACKEND": "outbox.sinks.NDJSONFileSink", "OPTIONS": {"path": "/var/lms/events.ndjson"}},
+        {"BACKEND": "outbox.sinks.HTTPSink", "OPTIONS": {"url": "https://analytics/ingest"}},
+    ]
+
+Un sink recibe lotes de mensajes (OutboxEvent.as_message()) y lanza una
+excepción si no pudo entregarlos: el lote queda pendiente y se reintenta.
+"""
+import json
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class NDJSONFileSink:
+    """Añade un evento por línea a un archivo local."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def send(self, messages):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            for message in messages:
+                fh.write(json.dumps(message, ensure_ascii=False) + "\n")
+            fh.flush()
+
+
+class HTTPSink:
+    """POST del lote como NDJSON. Cualquier status fuera de 2xx es un fallo."""
+
+    def __init__(self, url, timeout=10, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/x-ndjson", **(headers or {})}
+
+    def send(self, messages):
+        body = "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in messages).encode()
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        # urlopen lanza HTTPError para 4xx/5xx
+        with self.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def urlopen(self, request, timeout):
+        return urllib.request.urlopen(request, timeout=timeout)
+
+
+def load_sinks(config=None):
+    config = getattr(settings, "OUTBOX_SINKS", []) if config is None else config
+    return [import_string(entry["BACKEND"])(**entry.get("OPTIONS", {})) for entry in config]
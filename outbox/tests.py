@@ -0,0 +1,102 @@
+import json
+import tempfile
+import urllib.error
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from courses.models import Module, Lesson, Quiz, Question, Choice
+from learning_platform_backend.testing import APITestHelpersMixin
+from .events import record_event
+from .models import OutboxEvent
+from .relay import RelayError, relay_batch
+from .sinks import HTTPSink, NDJSONFileSink
+
+class MemorySink:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, messages):
+        self.messages.extend(messages)
+
+
+class OutboxWritesTests(APITestHelpersMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = self.make_user("inst", role="instructor")
+        self.course = self.make_course(self.instructor, estado="borrador")
+        module = Module.objects.create(course=self.course, titulo="M1", orden=1)
+        self.lesson = Lesson.objects.create(module=module, titulo="L1", tipo="texto", contenido="x", orden=1)
+        self.quiz = Quiz.objects.create(course=self.course, titulo="Quiz 1")
+        question = Question.objects.create(quiz=self.quiz, texto="¿2+2?", orden=1)
+        self.answers = {str(question.id): Choice.objects.create(question=question, texto="4", correcta=True).id}
+        self.make_user("stud")
+
+    def test_learning_flow_records_events(self):
+        self.auth_as("inst")
+        # Repetir publish, enroll o complete no cambia el estado: sin eventos duplicados
+        self.client.post(f"/api/courses/courses/{self.course.id}/publish/")
+        res = self.client.post(f"/api/courses/courses/{self.course.id}/publish/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.auth_as("stud")
+        self.client.post("/api/enrollments/enrollments/enroll/", {"course_id": self.course.id}, format="json")
+        self.client.post("/api/enrollments/enrollments/enroll/", {"course_id": self.course.id}, format="json")
+        self.client.post("/api/enrollments/lesson-progress/complete/", {"lesson_id": self.lesson.id}, format="json")
+        res = self.client.post("/api/enrollments/lesson-progress/complete/", {"lesson_id": self.lesson.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.post(
+            "/api/enrollments/submissions/submit/", {"quiz_id": self.quiz.id, "answers": self.answers}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        events = list(OutboxEvent.objects.order_by("id").values_list("event_type", flat=True))
+        self.assertEqual(events, ["course.published", "enrollment.created", "lesson.completed", "quiz.submitted"])
+        submitted = OutboxEvent.objects.get(event_type="quiz.submitted")
+        self.assertEqual(submitted.payload["score"], 100)
+
+    def test_rejected_write_records_nothing(self):
+        self.auth_as("stud")
+        res = self.client.post("/api/enrollments/enrollments/enroll/", {"course_id": self.course.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class RelayTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            record_event("lesson.completed", "enrollment", i, {"n": i})
+
+    def test_batches_and_marks_published(self):
+        sink = MemorySink()
+        self.assertEqual(relay_batch([sink], batch_size=2), 2)
+        self.assertEqual(relay_batch([sink], batch_size=2), 1)
+        self.assertEqual(relay_batch([sink], batch_size=2), 0)
+        self.assertEqual([m["payload"]["n"] for m in sink.messages], [0, 1, 2])
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+    def test_failing_sink_keeps_batch_pending(self):
+        sink = HTTPSink("http://analytics.invalid/ingest")
+        error = urllib.error.URLError("down")
+        with mock.patch.object(sink, "urlopen", side_effect=error), self.assertRaises(RelayError):
+            relay_batch([sink])
+
+        self.assertEqual(OutboxEvent.objects.filter(published_at__isnull=True).count(), 3)
+        self.assertIn("down", OutboxEvent.objects.first().last_error)
+
+    def test_ndjson_and_http_sinks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "events.ndjson"
+            http = HTTPSink("http://analytics.invalid/ingest")
+            with mock.patch.object(http, "urlopen") as urlopen:
+                relay_batch([NDJSONFileSink(path), http])
+
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+            self.assertEqual([m["aggregate_id"] for m in lines], [0, 1, 2])
+            request = urlopen.call_args.args[0]
+            self.assertEqual(request.get_method(), "POST")
+            self.assertEqual(len(request.data.decode().splitlines()), 3)
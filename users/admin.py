@@ -1,6 +1,16 @@
 from django.contrib import admin
 from .models import User, StudentProfile, InstructorProfile
 
-admin.site.register(User)
 admin.site.register(StudentProfile)
 admin.site.register(InstructorProfile)
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ("id", "username", "email", "role", "is_staff")
+    list_filter = ("role", "is_staff")
+    # Lo usan los autocomplete de matrículas, intentos y feedback. Solo
+    # username exacto (sin distinguir mayúsculas), servido por
+    # user_username_upper_idx: `^` compila a UPPER(col) LIKE 'X%', que ningún
+    # índice resuelve, y email no tiene índice.
+    search_fields = ("=username",)
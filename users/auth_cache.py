@@ -0,0 +1,57 @@
+"""
+Caché corta del usuario autenticado (ver users.authentication.CachedJWTAuthentication).
+
+Se invalida desde las señales de users.models cada vez que se guarda o borra un
+User o su InstructorProfile (set_role, enable_student, enable_instructor,
+admin_flags, me, change_password, ...).
+
+La invalidación solo llega a todos los workers si la caché es compartida
+(file o redis): con locmem cada proceso seguiría sirviendo su copia de un
+usuario desactivado hasta AUTH_USER_CACHE_TTL. Por eso AUTH_USER_CACHE_ENABLED
+viene apagado con locmem y check_shared_cache lo marca como error si se fuerza.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Error, register
+
+# Importarlo también registra check_atomic_cache (idempotencia y límites de tasa)
+from learning_platform_backend.checks import PER_PROCESS_BACKENDS
+
+AUTH_USER_CACHE_PREFIX = "auth:user:"
+
+
+def auth_cache_enabled():
+    return getattr(settings, "AUTH_USER_CACHE_ENABLED", False)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if not auth_cache_enabled() or settings.CACHES["default"]["BACKEND"] not in PER_PROCESS_BACKENDS:
+        return []
+    return [
+        Error(
+            "AUTH_USER_CACHE_ENABLED requiere una caché compartida entre procesos.",
+            hint="Usar CACHE_BACKEND=file o redis, o desactivar AUTH_USER_CACHE_ENABLED.",
+            id="users.E001",
+        )
+    ]
+
+
+def user_cache_key(user_id):
+    return f"{AUTH_USER_CACHE_PREFIX}{user_id}"
+
+
+def get_cached_user_data(user_id):
+    if not auth_cache_enabled():
+        return None
+    return cache.get(user_cache_key(user_id))
+
+
+def set_cached_user_data(user_id, data):
+    if not auth_cache_enabled():
+        return
+    cache.set(user_cache_key(user_id), data, getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
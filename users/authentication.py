@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from learning_platform_backend.metrics import record_cache
+from .auth_cache import get_cached_user_data, set_cached_user_data
+from .models import InstructorProfile
+
+User = get_user_model()
+
+# Nunca guardamos el hash de la contraseña en caché: queda diferido y se carga
+# de la BD solo si algo lo necesita (check_password, etc.).
+_UNCACHED_FIELDS = ("password",)
+
+
+def _cached_attnames():
+    return [f.attname for f in User._meta.concrete_fields if f.attname not in _UNCACHED_FIELDS]
+
+
+def _serialize_user(user):
+    ip = getattr(user, "instructor_profile", None)
+    return {
+        "fields": {name: getattr(user, name) for name in _cached_attnames()},
+        "instructor_profile_id": ip.id if ip else None,
+    }
+
+
+def _build_user(data):
+    # Lo que quede diferido (password, campos del perfil) se carga del primario
+    db = router.db_for_write(User)
+    names = [name for name in _cached_attnames() if name in data["fields"]]
+    user = User.from_db(db, names, [data["fields"][name] for name in names])
+
+    # Pre-cargar la relación inversa: getattr(user, "instructor_profile", None)
+    # ya no hace query. El perfil solo trae id/user_id; el resto queda diferido.
+    ip_id = data["instructor_profile_id"]
+    profile = None
+    if ip_id is not None:
+        profile = InstructorProfile.from_db(db, ["id", "user_id"], [ip_id, user.id])
+    User._meta.get_field("instructor_profile").set_cached_value(user, profile)
+    # Campos posiblemente viejos (hasta AUTH_USER_CACHE_TTL): User.save lo rechaza
+    user._from_auth_cache = True
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve el usuario (flags + id del InstructorProfile)
+    desde una caché de TTL corto (AUTH_USER_CACHE_TTL) en lugar de consultar
+    users_user y users_instructorprofile en cada request.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # La revocación compara contra el hash de la contraseña: ir a la BD.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        data = get_cached_user_data(user_id)
+        record_cache("auth_user", data is not None)
+
+        if data is None:
+            # Siempre del primario: una réplica atrasada podría devolver (y dejar
+            # en caché) un is_active o role anterior a la última invalidación.
+            try:
+                user = self.user_model.objects.db_manager(router.db_for_write(self.user_model)).select_related(
+                    "instructor_profile"
+                ).get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            set_cached_user_data(user_id, _serialize_user(user))
+        else:
+            user = _build_user(data)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
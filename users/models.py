@@ -1,9 +1,12 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.functions import Upper
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .auth_cache import invalidate_cached_user
+
 
 class User(AbstractUser):
     class Role(models.TextChoices):
@@ -35,7 +38,19 @@ class User(AbstractUser):
         related_query_name="user",
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Búsqueda del admin y autocompletes (`=username` es iexact:
+            # UPPER(username) = UPPER(%s)); el índice único no la cubre
+            models.Index(Upper("username"), name="user_username_upper_idx"),
+        ]
+
     def save(self, *args, **kwargs):
+        # Un usuario armado desde la caché de auth puede traer is_active/role
+        # viejos: guardarlo los escribiría de vuelta en la BD
+        if getattr(self, "_from_auth_cache", False):
+            raise RuntimeError("Usuario cargado desde la caché de auth: recargarlo de la BD antes de guardar.")
+
         # Admin: marcar como staff (y opcionalmente superuser)
         if self.role == self.Role.ADMIN:
             self.is_staff = True
@@ -94,3 +109,15 @@ def ensure_profiles_for_user(sender, instance, created, **kwargs):
         return
     StudentProfile.objects.get_or_create(user=instance)
     InstructorProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_auth_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=InstructorProfile)
+@receiver(post_delete, sender=InstructorProfile)
+def invalidate_profile_auth_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
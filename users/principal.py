@@ -0,0 +1,68 @@
+"""
+Principal de la request: flags de rol + id del InstructorProfile, resueltos una
+sola vez por request y compartidos por permisos y filtros de querysets.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: Optional[int]
+    is_authenticated: bool
+    is_staff: bool
+    student_enabled: bool
+    instructor_enabled: bool
+    instructor_profile_id: Optional[int]
+
+    @property
+    def is_instructor(self):
+        """Instructor habilitado y con InstructorProfile."""
+        return bool(self.instructor_enabled and self.instructor_profile_id is not None)
+
+    def owns(self, instructor_id):
+        """True si el instructor_id de un curso corresponde a este instructor."""
+        return self.is_instructor and instructor_id == self.instructor_profile_id
+
+
+ANONYMOUS = Principal(
+    user_id=None,
+    is_authenticated=False,
+    is_staff=False,
+    student_enabled=False,
+    instructor_enabled=False,
+    instructor_profile_id=None,
+)
+
+
+def principal_for_user(user):
+    if not user or not user.is_authenticated:
+        return ANONYMOUS
+    ip = getattr(user, "instructor_profile", None)
+    return Principal(
+        user_id=user.pk,
+        is_authenticated=True,
+        is_staff=bool(user.is_staff),
+        student_enabled=bool(getattr(user, "student_enabled", False)),
+        instructor_enabled=bool(getattr(user, "instructor_enabled", False)),
+        instructor_profile_id=ip.id if ip else None,
+    )
+
+
+def get_principal(request):
+    """
+    Devuelve el Principal de la request (DRF Request o HttpRequest), memoizado
+    en el HttpRequest subyacente. Se recalcula si el usuario cambió (p. ej. la
+    primera llamada ocurrió antes de que DRF autenticara el JWT).
+    """
+    http_request = getattr(request, "_request", request)
+    user = getattr(request, "user", None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    cached = getattr(http_request, "_principal", None)
+    if cached is not None and cached.user_id == user_id:
+        return cached
+
+    principal = principal_for_user(user)
+    http_request._principal = principal
+    return principal
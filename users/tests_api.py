@@ -1,7 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from learning_platform_backend.testing import APITestHelpersMixin
+from .auth_cache import check_shared_cache, get_cached_user_data
+from .authentication import _build_user
+
 User = get_user_model()
 
 
@@ -147,3 +153,93 @@ class UsersAPITests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertTrue(res.data["instructor_enabled"])
         self.assertFalse(res.data["is_active"])
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)
+class CachedJWTAuthenticationTests(APITestHelpersMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_second_request_skips_user_lookup(self):
+        User.objects.create_user(username="c1", password="testpass123", email="c1@example.com")
+        self.auth_as("c1")
+        self.client.get("/api/users/users/me/")
+
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/users/users/me/")
+        self.assertEqual(res.data["username"], "c1")
+        self.assertEqual(res.data["email"], "c1@example.com")
+
+    def test_cached_user_carries_instructor_profile(self):
+        u = User.objects.create_user(username="c2", password="testpass123", role="instructor")
+        self.auth_as("c2")
+        self.client.get("/api/users/users/me/")
+
+        user = _build_user(get_cached_user_data(u.id))
+        with self.assertNumQueries(0):
+            self.assertEqual(user.instructor_profile.id, u.instructor_profile.id)
+            self.assertTrue(user.instructor_enabled)
+
+    def test_admin_flags_invalidates_cache(self):
+        User.objects.create_user(username="cadmin", password="testpass123", role="admin")
+        target = User.objects.create_user(username="c3", password="testpass123")
+
+        target_token = self.client.post(
+            "/api/token/",
+            {"username": "c3", "password": "testpass123"},
+            format="json",
+        ).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + target_token)
+        self.assertEqual(self.client.get("/api/users/users/me/").status_code, status.HTTP_200_OK)
+
+        self.auth_as("cadmin")
+        res = self.client.patch(
+            f"/api/users/users/{target.id}/admin-flags/",
+            {"is_active": False},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + target_token)
+        res = self.client.get("/api/users/users/me/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_change_password_does_not_write_back_cached_flags(self):
+        User.objects.create_user(username="cadmin2", password="testpass123", role="admin")
+        target = User.objects.create_user(username="c4", password="testpass123")
+        target_token = self.client.post(
+            "/api/token/", {"username": "c4", "password": "testpass123"}, format="json"
+        ).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + target_token)
+        self.client.get("/api/users/users/me/")
+
+        # Desactivado por otra vía sin invalidar la caché (p. ej. otro worker)
+        User.objects.filter(pk=target.pk).update(is_active=False)
+
+        res = self.client.post(
+            "/api/users/users/change-password/",
+            {"old_password": "testpass123", "new_password": "otraClave456!"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(User.objects.get(pk=target.pk).is_active)
+
+    def test_cached_user_cannot_be_saved(self):
+        u = User.objects.create_user(username="c5", password="testpass123")
+        self.auth_as("c5")
+        self.client.get("/api/users/users/me/")
+
+        with self.assertRaises(RuntimeError):
+            _build_user(get_cached_user_data(u.id)).save()
+
+    @override_settings(AUTH_USER_CACHE_ENABLED=False)
+    def test_disabled_cache_reads_user_every_request(self):
+        u = User.objects.create_user(username="c6", password="testpass123")
+        self.auth_as("c6")
+        self.client.get("/api/users/users/me/")
+        self.assertIsNone(get_cached_user_data(u.id))
+
+    def test_requires_shared_cache(self):
+        self.assertEqual([e.id for e in check_shared_cache(None)], ["users.E001"])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp/x"}}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from learning_platform_backend.throttling import ActionRateLimitMixin
 from .models import StudentProfile, InstructorProfile
 from .serializers import (
     UserPublicSerializer,
@@ -18,8 +19,9 @@ from .permissions import IsAdmin, IsSelfOrAdmin, IsSelfProfileOrAdmin
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ActionRateLimitMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
+    throttle_scopes = {"register_student": "register", "register_instructor": "register"}
 
     def get_permissions(self):
         # Público SOLO para register
@@ -47,21 +49,24 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request):
         if request.method == "GET":
             return Response(UserPublicSerializer(request.user).data)
-        serializer = UserMeUpdateSerializer(request.user, data=request.data, partial=True)
+        # request.user puede venir de la caché de auth: se escribe sobre la fila actual
+        user = User.objects.get(pk=request.user.pk)
+        serializer = UserMeUpdateSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(UserPublicSerializer(request.user).data)
+        return Response(UserPublicSerializer(user).data)
 
     @action(detail=False, methods=["post"], url_path="change-password")
     def change_password(self, request):
         serializer = PasswordChangeSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        if not request.user.check_password(serializer.validated_data["old_password"]):
+        user = User.objects.get(pk=request.user.pk)
+        if not user.check_password(serializer.validated_data["old_password"]):
             return Response({"detail": "Contraseña actual incorrecta."}, status=status.HTTP_400_BAD_REQUEST)
 
-        request.user.set_password(serializer.validated_data["new_password"])
-        request.user.save()
+        user.set_password(serializer.validated_data["new_password"])
+        user.save(update_fields=["password"])
         return Response({"detail": "Contraseña actualizada."})
 
     @action(detail=False, methods=["post"], url_path="register-student")